@@ -0,0 +1,513 @@
+#!/usr/bin/env python3
+"""Pooled GitHub HTTP client for the repository automation scripts.
+
+Contract:
+- Stdlib only (`http.client`), so it can be imported by `hourly-review-monitor.py`,
+  `architecture_audit.py` and other helpers in `scripts/` without extra dependencies.
+- One keep-alive connection is reused for every request made through a client instance. A request
+  that fails on a dropped connection is resent once (a timed-out one up to `timeout_retries` times),
+  but only when resending is safe (idempotent methods and GraphQL queries); writes such as comment
+  creation are never replayed.
+- The token is taken from `GH_TOKEN`/`GITHUB_TOKEN`, falling back to the token `gh` already has.
+- `GITHUB_API_URL` overrides the API base URL (used by tests to target a local stand-in server).
+- An optional `ResponseCache` persists ETag/Last-Modified validators so unchanged reads are
+  answered by `304 Not Modified`, which GitHub does not count against the primary rate limit.
+- An optional `RateLimitBudget` tracks `X-RateLimit-*` headers, paces calls when the budget runs
+  low and retries rate-limited responses (403/429) after a jittered backoff.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import http.client
+import json
+import os
+import random
+import re
+import subprocess
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+from urllib.parse import urlsplit
+
+DEFAULT_API_URL = "https://api.github.com"
+DEFAULT_TIMEOUT_SECONDS = 30.0
+USER_AGENT = "fiber-link-automation"
+LINK_NEXT_RE = re.compile(r'<([^>]+)>\s*;\s*rel="next"')
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+def is_retry_safe(method: str, resource: str, payload: Any) -> bool:
+    """True when resending the request cannot apply a change twice."""
+    if method.upper() in IDEMPOTENT_METHODS:
+        return True
+    query = payload.get("query") if resource == "graphql" and isinstance(payload, dict) else None
+    return isinstance(query, str) and not query.lstrip().startswith("mutation")
+
+
+class GitHubHttpError(RuntimeError):
+    def __init__(self, status: int, method: str, path: str, body: str) -> None:
+        super().__init__(f"GitHub API {method} {path} failed with HTTP {status}: {body[:200]}")
+        self.status = status
+        self.method = method
+        self.path = path
+        self.body = body
+
+
+@dataclass
+class GitHubResponse:
+    status: int
+    headers: Dict[str, str] = field(default_factory=dict)
+    body: bytes = b""
+
+    def header(self, name: str) -> str | None:
+        return self.headers.get(name.lower())
+
+    def json(self) -> Any:
+        if not self.body:
+            return None
+        return json.loads(self.body.decode("utf-8"))
+
+
+class ResponseCache:
+    """Disk-backed LRU cache of decoded GitHub responses keyed by request target.
+
+    Entries keep the decoded payload next to its validators, so a `304` (or a hit inside the
+    endpoint's max-age) hands back the stored object without re-reading or re-parsing a body.
+    Size is bounded by entry count and by the approximate encoded payload bytes. All methods
+    are thread-safe so several clients (one per worker thread) can share one cache.
+    """
+
+    def __init__(
+        self,
+        path: str | Path | None,
+        max_entries: int = 256,
+        max_bytes: int = 8 * 1024 * 1024,
+        max_age_rules: Sequence[Tuple[str, float]] = (),
+        default_max_age: float = 0.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = Path(path) if path else None
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_rules = [(re.compile(pattern), float(seconds)) for pattern, seconds in max_age_rules]
+        self.default_max_age = default_max_age
+        self.clock = clock
+        self.entries: "OrderedDict[str, dict]" = OrderedDict()
+        self.total_bytes = 0
+        self.dirty = False
+        self.stats = {"fresh": 0, "notModified": 0, "misses": 0, "evictions": 0}
+        self.lock = threading.RLock()
+        self._load()
+
+    def _load(self) -> None:
+        if self.path is None:
+            return
+        try:
+            raw = json.loads(self.path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return
+        for item in raw.get("entries", []) if isinstance(raw, dict) else []:
+            if isinstance(item, list) and len(item) == 2 and isinstance(item[1], dict):
+                self.entries[str(item[0])] = item[1]
+                self.total_bytes += int(item[1].get("size", 0))
+        self._evict()
+
+    def max_age_for(self, key: str) -> float:
+        for pattern, seconds in self.max_age_rules:
+            if pattern.search(key):
+                return seconds
+        return self.default_max_age
+
+    def get(self, key: str) -> dict | None:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.dirty = True
+            return entry
+
+    def record(self, stat: str) -> None:
+        with self.lock:
+            self.stats[stat] += 1
+
+    def is_fresh(self, key: str, entry: dict) -> bool:
+        return self.clock() - float(entry.get("storedAt", 0)) < self.max_age_for(key)
+
+    def put(self, key: str, payload: Any, headers: Dict[str, str]) -> None:
+        entry = {
+            "payload": payload,
+            "etag": headers.get("etag"),
+            "lastModified": headers.get("last-modified"),
+            "link": headers.get("link"),
+            "storedAt": self.clock(),
+            "size": len(json.dumps(payload, separators=(",", ":"))),
+        }
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= int(previous.get("size", 0))
+            self.entries[key] = entry
+            self.total_bytes += entry["size"]
+            self.dirty = True
+            self._evict()
+
+    def touch(self, key: str) -> None:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                entry["storedAt"] = self.clock()
+                self.dirty = True
+
+    def _evict(self) -> None:
+        while self.entries and (len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes):
+            _, evicted = self.entries.popitem(last=False)
+            self.total_bytes -= int(evicted.get("size", 0))
+            self.stats["evictions"] += 1
+            self.dirty = True
+
+    def flush(self) -> None:
+        with self.lock:
+            if self.path is None or not self.dirty:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(prefix=f".{self.path.name}.", dir=str(self.path.parent))
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"version": 1, "entries": [[key, entry] for key, entry in self.entries.items()]}, f, separators=(",", ":"))
+            os.replace(tmp_name, self.path)
+            self.dirty = False
+
+
+def is_rate_limited(status: int, headers: Dict[str, str], body: str = "") -> bool:
+    if status == 429:
+        return True
+    if status != 403:
+        return False
+    return headers.get("x-ratelimit-remaining") == "0" or "retry-after" in headers or "rate limit" in body.lower()
+
+
+class RateLimitBudget:
+    """Thread-safe view of the remaining GitHub rate-limit budget per resource (`core`, `graphql`, ...).
+
+    Fed from response headers or a `/rate_limit` payload. When a resource drops below
+    `pace_below`, `pace()` spreads the remaining calls evenly until the window resets; rate-limited
+    responses wait for `Retry-After`/the reset time (or an exponential step) plus jitter.
+    """
+
+    def __init__(
+        self,
+        pace_below: int = 100,
+        max_pace_seconds: float = 5.0,
+        max_backoff_seconds: float = 60.0,
+        max_retries: int = 3,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+        jitter: Callable[[], float] = random.random,
+    ) -> None:
+        self.pace_below = pace_below
+        self.max_pace_seconds = max_pace_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.max_retries = max_retries
+        self.clock = clock
+        self.sleep = sleep
+        self.jitter = jitter
+        self.resources: Dict[str, dict] = {}
+        self.stats = {"throttled": 0, "waitedSeconds": 0.0}
+        self.lock = threading.Lock()
+
+    def update(self, resource: str, remaining: int, limit: int | None = None, reset: float | None = None) -> None:
+        with self.lock:
+            entry = self.resources.setdefault(resource, {})
+            entry["remaining"] = remaining
+            if limit is not None:
+                entry["limit"] = limit
+            if reset is not None:
+                entry["reset"] = reset
+
+    def update_from_headers(self, headers: Dict[str, str]) -> None:
+        try:
+            remaining = int(headers["x-ratelimit-remaining"])
+        except (KeyError, ValueError):
+            return
+        limit = headers.get("x-ratelimit-limit")
+        reset = headers.get("x-ratelimit-reset")
+        self.update(
+            headers.get("x-ratelimit-resource") or "core",
+            remaining,
+            int(limit) if limit and limit.isdigit() else None,
+            float(reset) if reset and reset.isdigit() else None,
+        )
+
+    def update_from_rate_limit(self, payload: Any) -> None:
+        """Load every resource from a `GET /rate_limit` response (which is not itself rate limited)."""
+        resources = payload.get("resources") if isinstance(payload, dict) else None
+        for resource, values in (resources or {}).items():
+            if isinstance(values, dict) and isinstance(values.get("remaining"), int):
+                self.update(resource, values["remaining"], values.get("limit"), values.get("reset"))
+
+    def remaining(self, resource: str) -> int | None:
+        with self.lock:
+            return self.resources.get(resource, {}).get("remaining")
+
+    def is_low(self, threshold: int, resources: Sequence[str] = ("core", "graphql")) -> bool:
+        return any(value is not None and value < threshold for value in (self.remaining(resource) for resource in resources))
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "resources": {name: dict(entry) for name, entry in self.resources.items()},
+                "throttled": self.stats["throttled"],
+                "waitedSeconds": round(self.stats["waitedSeconds"], 3),
+            }
+
+    def _wait(self, seconds: float) -> None:
+        if seconds <= 0:
+            return
+        with self.lock:
+            self.stats["waitedSeconds"] += seconds
+        self.sleep(seconds)
+
+    def pace(self, resource: str) -> None:
+        with self.lock:
+            entry = dict(self.resources.get(resource, {}))
+        remaining = entry.get("remaining")
+        reset = entry.get("reset")
+        if remaining is None or reset is None or remaining >= self.pace_below:
+            return
+        window = max(0.0, float(reset) - self.clock())
+        self._wait(min(self.max_pace_seconds, window / max(remaining, 1)))
+
+    def backoff(self, attempt: int, headers: Dict[str, str]) -> None:
+        with self.lock:
+            self.stats["throttled"] += 1
+        retry_after = headers.get("retry-after")
+        reset = headers.get("x-ratelimit-reset")
+        if retry_after and retry_after.isdigit():
+            delay = float(retry_after)
+        elif headers.get("x-ratelimit-remaining") == "0" and reset and reset.isdigit():
+            delay = max(0.0, float(reset) - self.clock())
+        else:
+            delay = float(2**attempt)
+        delay = min(self.max_backoff_seconds, delay)
+        self._wait(delay + delay * 0.25 * self.jitter())
+
+
+def resolve_token() -> str | None:
+    for var_name in ("GH_TOKEN", "GITHUB_TOKEN"):
+        token = (os.environ.get(var_name) or "").strip()
+        if token:
+            return token
+    try:
+        proc = subprocess.run(["gh", "auth", "token"], check=True, capture_output=True, text=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return proc.stdout.strip() or None
+
+
+class GitHubHttpClient:
+    """Keep-alive GitHub REST/GraphQL client.
+
+    A single `http.client` connection is opened lazily and reused; it is transparently
+    re-established once if the server closed it between requests.
+    """
+
+    def __init__(
+        self,
+        base_url: str | None = None,
+        token: str | None = None,
+        timeout: float = DEFAULT_TIMEOUT_SECONDS,
+        cache: ResponseCache | None = None,
+        budget: RateLimitBudget | None = None,
+        timeout_provider: Callable[[], float] | None = None,
+        timeout_retries: int = 0,
+    ) -> None:
+        parsed = urlsplit(base_url or os.environ.get("GITHUB_API_URL") or DEFAULT_API_URL)
+        self.scheme = parsed.scheme or "https"
+        self.host = parsed.hostname or "api.github.com"
+        self.port = parsed.port
+        self.base_path = parsed.path.rstrip("/")
+        self.token = token if token is not None else resolve_token()
+        self.timeout = timeout
+        self.cache = cache
+        self.budget = budget
+        # Called before every request for its socket timeout (e.g. the time left before a deadline);
+        # it may raise to refuse the request. Timed-out retry-safe requests are retried `timeout_retries` times.
+        self.timeout_provider = timeout_provider
+        self.timeout_retries = timeout_retries
+        self.connections_opened = 0
+        self.stats = {"requests": 0, "bytesReceived": 0, "retries": 0}
+        self._conn: http.client.HTTPConnection | None = None
+
+    def _connection(self) -> http.client.HTTPConnection:
+        if self._conn is None:
+            conn_cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+            self._conn = conn_cls(self.host, self.port, timeout=self.timeout)
+            self.connections_opened += 1
+        return self._conn
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        if self.cache is not None:
+            self.cache.flush()
+
+    def _resolve_path(self, path: str) -> str:
+        if path.startswith(("http://", "https://")):
+            parsed = urlsplit(path)
+            return parsed.path + (f"?{parsed.query}" if parsed.query else "")
+        if not path.startswith("/"):
+            path = f"/{path}"
+        if self.base_path and not path.startswith(f"{self.base_path}/"):
+            path = f"{self.base_path}{path}"
+        return path
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        payload: Any = None,
+        headers: Dict[str, str] | None = None,
+    ) -> GitHubResponse:
+        target = self._resolve_path(path)
+        request_headers = {
+            "Accept": "application/vnd.github+json",
+            "User-Agent": USER_AGENT,
+            "X-GitHub-Api-Version": "2022-11-28",
+        }
+        if self.token:
+            request_headers["Authorization"] = f"Bearer {self.token}"
+        body = None
+        if payload is not None:
+            body = json.dumps(payload).encode("utf-8")
+            request_headers["Content-Type"] = "application/json"
+        if headers:
+            request_headers.update(headers)
+
+        resource = "graphql" if target.endswith("/graphql") else "core"
+        retry_safe = is_retry_safe(method, resource, payload)
+        if self.budget is not None:
+            self.budget.pace(resource)
+        reconnected = False
+        throttled = 0
+        timed_out = 0
+        while True:
+            conn = self._connection()
+            if self.timeout_provider is not None:
+                conn.timeout = self.timeout_provider()
+                if conn.sock is not None:
+                    conn.sock.settimeout(conn.timeout)
+            self.stats["requests"] += 1
+            try:
+                conn.request(method, target, body=body, headers=request_headers)
+                resp = conn.getresponse()
+                # Drain the body so the connection can be reused for the next request.
+                data = resp.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                self.close()
+                # GitHub may have applied a write before the connection dropped; never replay it.
+                if reconnected or not retry_safe:
+                    raise
+                reconnected = True
+                self.stats["retries"] += 1
+                continue
+            except TimeoutError:
+                self.close()
+                if timed_out >= self.timeout_retries or not retry_safe:
+                    raise
+                timed_out += 1
+                self.stats["retries"] += 1
+                continue
+            self.stats["bytesReceived"] += len(data)
+            response_headers = {name.lower(): value for name, value in resp.getheaders()}
+            if resp.will_close:
+                self.close()
+            if self.budget is not None:
+                self.budget.update_from_headers(response_headers)
+                if throttled < self.budget.max_retries and is_rate_limited(
+                    resp.status, response_headers, data.decode("utf-8", errors="replace")
+                ):
+                    self.budget.backoff(throttled, response_headers)
+                    throttled += 1
+                    self.stats["retries"] += 1
+                    continue
+            return GitHubResponse(status=resp.status, headers=response_headers, body=data)
+
+    def _get_json(self, path: str) -> Tuple[Any, str | None]:
+        """GET a JSON document, revalidating through the response cache when one is configured."""
+        key = f"GET {self._resolve_path(path)}"
+        entry = self.cache.get(key) if self.cache is not None else None
+        if entry is not None and self.cache.is_fresh(key, entry):
+            self.cache.record("fresh")
+            return entry["payload"], entry.get("link")
+
+        headers: Dict[str, str] = {}
+        if entry is not None and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        elif entry is not None and entry.get("lastModified"):
+            headers["If-Modified-Since"] = entry["lastModified"]
+        response = self.request("GET", path, headers=headers)
+        if response.status == 304 and entry is not None:
+            self.cache.record("notModified")
+            self.cache.touch(key)
+            return entry["payload"], entry.get("link")
+        if response.status >= 400:
+            raise GitHubHttpError(response.status, "GET", path, response.body.decode("utf-8", errors="replace"))
+        payload = response.json()
+        if self.cache is not None:
+            self.cache.record("misses")
+            if response.header("etag") or response.header("last-modified") or self.cache.max_age_for(key) > 0:
+                self.cache.put(key, payload, response.headers)
+        return payload, response.header("link")
+
+    def request_json(self, method: str, path: str, payload: Any = None) -> Any:
+        if method == "GET" and payload is None:
+            return self._get_json(path)[0]
+        response = self.request(method, path, payload)
+        if response.status >= 400:
+            raise GitHubHttpError(response.status, method, path, response.body.decode("utf-8", errors="replace"))
+        return response.json()
+
+    def iter_pages(self, path: str) -> Iterator[Any]:
+        """Yield each decoded page, following `Link: rel="next"` until the last page."""
+        next_path: str | None = path
+        while next_path:
+            page, link = self._get_json(next_path)
+            if page is not None:
+                yield page
+            match = LINK_NEXT_RE.search(link or "")
+            next_path = match.group(1) if match else None
+
+    def paginate(self, path: str) -> List[Any]:
+        items: List[Any] = []
+        for page in self.iter_pages(path):
+            if isinstance(page, list):
+                items.extend(page)
+            else:
+                items.append(page)
+        return items
+
+    def graphql(self, query: str, variables: Dict[str, Any] | None = None, use_cache: bool = True) -> dict:
+        """Run a GraphQL query; `use_cache=False` always asks GitHub and leaves the cache untouched."""
+        body = {"query": query, "variables": variables or {}}
+        # GraphQL responses carry no validators, so they can only be reused within the max-age.
+        key = "POST /graphql " + hashlib.sha256(json.dumps(body, sort_keys=True).encode("utf-8")).hexdigest()
+        cache = self.cache if use_cache else None
+        entry = cache.get(key) if cache is not None else None
+        if entry is not None and cache.is_fresh(key, entry):
+            cache.record("fresh")
+            return entry["payload"]
+        payload = self.request_json("POST", "/graphql", body)
+        if not isinstance(payload, dict):
+            return {}
+        if payload.get("errors"):
+            raise GitHubHttpError(200, "POST", "/graphql", json.dumps(payload["errors"]))
+        data = payload.get("data") or {}
+        if cache is not None and cache.max_age_for(key) > 0:
+            cache.record("misses")
+            cache.put(key, data, {})
+        return data
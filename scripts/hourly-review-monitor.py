@@ -4,20 +4,46 @@
 Modes:
 - scan: gather findings and persist state JSON for later reporting.
 - report: summarize persisted findings from the last 60 minutes.
+- daemon: keep state in memory and repeat scan cycles, sleeping until `nextActionAt` (SIGHUP wakes early).
+- webhook: serve signed GitHub webhooks, apply them to the entity tables and scan on change.
+- should-run: exit 0 when the persisted `nextActionAt` is due, 1 otherwise; reads local state only.
+- serve: read-only JSON API (`/latest`, `/report?hours=N`, `/prs/<n>`) over the persisted state.
 """
 
 from __future__ import annotations
 
 import argparse
+import bisect
+import fcntl
+import hashlib
+import heapq
+import hmac
+import itertools
 import json
+import math
 import os
+import queue
 import re
+import signal
 import subprocess
+import sys
+import tempfile
+import threading
 import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, HTTPServer, ThreadingHTTPServer
 from pathlib import Path
-from typing import Dict, List, Set, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Set, Tuple, TypeVar
+from urllib.parse import parse_qs, urlsplit
 
+from github_client import GitHubHttpClient, GitHubHttpError, RateLimitBudget, ResponseCache, is_rate_limited
+from monitor_metrics import MetricsServer, render_prometheus, write_textfile
+from monitor_state_db import StateDb
+
+T = TypeVar("T")
 REPO = "Keith-CY/fiber-link"
 STATE_FILE = "/root/.openclaw/workspace/memory/fiber-link-task1-state.json"
 REPO_ROOT = Path(__file__).resolve().parents[1]
@@ -26,14 +52,77 @@ AUDIT_DELTA_MARKER = "<!-- fiber-link-hourly-audit-delta -->"
 DIGEST_MARKER = "<!-- fiber-link-unchanged-digest -->"
 
 
+class ScanTimeout(RuntimeError):
+    """A GitHub call ran out of per-call retries or the scan-wide deadline expired."""
+
+
 def run_gh(args: List[str]) -> str:
-    proc = subprocess.run(
-        ["gh", "-R", REPO, *args],
-        check=True,
-        capture_output=True,
-        text=True,
-    )
-    return proc.stdout.strip()
+    attempt = 0
+    timed_out = 0
+    while True:
+        try:
+            timeout = github_call_timeout()
+            record_gh_call("calls")
+            proc = subprocess.run(
+                ["gh", "-R", REPO, *args],
+                check=True,
+                capture_output=True,
+                text=True,
+                timeout=timeout,
+            )
+            record_gh_call("bytes", len(proc.stdout))
+            return proc.stdout.strip()
+        except subprocess.TimeoutExpired as exc:
+            # GitHub may have applied a timed-out write, so only reads are retried.
+            if timed_out >= TASK1_GH_CALL_RETRIES or not gh_call_is_retry_safe(args):
+                raise ScanTimeout(f"gh {' '.join(args[:2])} timed out after {timed_out + 1} attempts") from exc
+            timed_out += 1
+        except subprocess.CalledProcessError as exc:
+            # `gh` hides response headers, so rate limiting is recognised from its error text.
+            if attempt >= _RATE_BUDGET.max_retries or not is_rate_limit_error(exc):
+                raise
+            _RATE_BUDGET.backoff(attempt, {})
+            attempt += 1
+        record_gh_call("retries")
+
+
+GH_API_BODY_FLAGS = {"-f", "-F", "--field", "--raw-field", "--input"}
+
+
+def gh_call_is_retry_safe(args: List[str]) -> bool:
+    """True for read-only `gh` invocations: `gh api` sends a write for `-X` non-GET or any body field."""
+    if not args or args[0] != "api":
+        return True
+    if args[1:2] == ["graphql"]:
+        queries = [arg.split("=", 1)[1] for arg in args if arg.startswith("query=")]
+        return bool(queries) and not any(query.lstrip().startswith("mutation") for query in queries)
+    for flag, value in zip(args, args[1:]):
+        if flag in ("-X", "--method") and value.upper() not in ("GET", "HEAD"):
+            return False
+    return not GH_API_BODY_FLAGS.intersection(args)
+
+
+def record_gh_call(counter: str, amount: int = 1) -> None:
+    with _GH_CALL_STATS_LOCK:
+        _GH_CALL_STATS[counter] += amount
+
+
+def github_call_timeout() -> float:
+    """Timeout for the next GitHub call: the per-call limit, shortened to what is left of the scan deadline."""
+    if _SCAN_DEADLINE is None:
+        return TASK1_GH_CALL_TIMEOUT_SECONDS
+    remaining = _SCAN_DEADLINE - time.monotonic()
+    if remaining <= 0:
+        raise ScanTimeout(f"scan deadline of {TASK1_SCAN_DEADLINE_SECONDS:g}s expired")
+    return min(TASK1_GH_CALL_TIMEOUT_SECONDS, remaining)
+
+
+def is_rate_limit_error(exc: Exception) -> bool:
+    if isinstance(exc, GitHubHttpError):
+        return is_rate_limited(exc.status, {}, exc.body)
+    if isinstance(exc, subprocess.CalledProcessError):
+        return is_rate_limited(403, {}, str(exc.stderr or ""))
+    return False
 
 
 def parse_positive_int_env_value(var_name: str, default: int) -> int:
@@ -58,6 +147,11 @@ def parse_positive_float_env_value(var_name: str, default: float) -> float:
     return parsed if parsed > 0 else default
 
 
+def parse_choice_env_value(var_name: str, choices: Tuple[str, ...], default: str) -> str:
+    raw = (os.environ.get(var_name) or "").strip().lower()
+    return raw if raw in choices else default
+
+
 # Runtime knobs (env-overridable for different repo/watch cadences):
 # keep defaults conservative and backward-compatible for existing CRON scheduling.
 CHECK_INTERVAL_MINUTES = parse_positive_int_env_value("TASK1_CHECK_INTERVAL_MINUTES", 20)
@@ -84,6 +178,319 @@ TEST_FILES_DRIFT_ALERT_THRESHOLD = parse_positive_int_env_value("TASK1_TEST_FILE
 TASK1_IDLE_LIGHTWEIGHT_STREAK_THRESHOLD = parse_positive_int_env_value("TASK1_IDLE_LIGHTWEIGHT_STREAK_THRESHOLD", 1)
 TASK1_IDLE_DIGEST_STREAK_THRESHOLD = parse_positive_int_env_value("TASK1_IDLE_DIGEST_STREAK_THRESHOLD", 3)
 TASK1_IDLE_DIGEST_INTERVAL_RUNS = parse_positive_int_env_value("TASK1_IDLE_DIGEST_INTERVAL_RUNS", 3)
+# Cross-run Source PR state index: MERGED/CLOSED are reused forever, OPEN only within this TTL.
+TASK1_SOURCE_PR_OPEN_TTL_MINUTES = parse_positive_int_env_value("TASK1_SOURCE_PR_OPEN_TTL_MINUTES", 60)
+TERMINAL_PR_STATES = {"MERGED", "CLOSED"}
+KNOWN_PR_STATES = TERMINAL_PR_STATES | {"OPEN"}
+# Sync strategy: `full` re-lists every open issue/PR, `incremental` keeps entity tables in state and
+# only fetches items updated since the stored watermark, with a periodic full reconcile.
+TASK1_SYNC_MODE = parse_choice_env_value("TASK1_SYNC_MODE", ("full", "incremental"), "full")
+TASK1_FULL_RECONCILE_HOURS = parse_positive_float_env_value("TASK1_FULL_RECONCILE_HOURS", 6.0)
+# Retained run history. The JSON file stores runs as keyframes plus deltas against the previous
+# run, so the default keeps two weeks at the 20m cadence; decoding the latest run replays at most
+# `TASK1_RUN_KEYFRAME_INTERVAL - 1` deltas.
+MAX_STATE_RUNS = parse_positive_int_env_value("TASK1_STATE_MAX_RUNS", 14 * 24 * 3)
+TASK1_RUN_KEYFRAME_INTERVAL = parse_positive_int_env_value("TASK1_RUN_KEYFRAME_INTERVAL", 36)
+# Append-only per-PR transition log (`prEventLog` in state); the oldest events are dropped past this size.
+TASK1_PR_EVENT_LOG_MAX_EVENTS = parse_positive_int_env_value("TASK1_PR_EVENT_LOG_MAX_EVENTS", 2000)
+# Tiered retention (raw runs -> hourly rollups -> daily rollups), each tier bounded by encoded bytes.
+# Rollup buckets are maintained by `save_state` and let `run_report` cover windows older than the raw runs.
+TASK1_RUN_HISTORY_MAX_BYTES = parse_positive_int_env_value("TASK1_RUN_HISTORY_MAX_BYTES", 8 * 1024 * 1024)
+TASK1_HOURLY_ROLLUP_MAX_BYTES = parse_positive_int_env_value("TASK1_HOURLY_ROLLUP_MAX_BYTES", 512 * 1024)
+TASK1_DAILY_ROLLUP_MAX_BYTES = parse_positive_int_env_value("TASK1_DAILY_ROLLUP_MAX_BYTES", 256 * 1024)
+# How long a run waits for another invocation to release the state lock before giving up (exit 1).
+# Waiting only helps against another one-shot scan: while a daemon/webhook process holds the lock it
+# never lets go, so scans give up at once with STATE_LOCK_HELD_EXIT_STATUS instead.
+TASK1_STATE_LOCK_TIMEOUT_SECONDS = parse_positive_float_env_value("TASK1_STATE_LOCK_TIMEOUT_SECONDS", 300.0)
+# EX_TEMPFAIL: cron wrappers can tell "a long-running monitor owns the state" from a real failure.
+STATE_LOCK_HELD_EXIT_STATUS = 75
+LONG_RUNNING_MODES = ("daemon", "webhook")
+# State storage: `json` rewrites STATE_FILE on every save, `sqlite` appends rows to an indexed
+# database (imported from STATE_FILE on first use).
+TASK1_STATE_BACKEND = parse_choice_env_value("TASK1_STATE_BACKEND", ("json", "sqlite"), "json")
+TASK1_STATE_DB_FILE = os.environ.get("TASK1_STATE_DB_FILE") or str(Path(STATE_FILE).with_suffix(".sqlite3"))
+# Issue fields kept by `project_issue` after fetch. The body is reduced to its Source PR binding
+# (`sourcePr`) and a `bodyHash` unless `body` is listed here explicitly.
+TASK1_ISSUE_RETAINED_FIELDS = tuple(
+    field.strip()
+    for field in (os.environ.get("TASK1_ISSUE_RETAINED_FIELDS") or "number,title,url,labels,assignees,updatedAt").split(",")
+    if field.strip()
+)
+# Snapshot lists whose issue/PR dicts are interned into `snapshotEntities` when the JSON state is
+# written: each run stores `<number>@<content hash>` references instead of repeating the dicts.
+# Fields derived from elapsed time change on every run, so they stay in the run next to the
+# reference (`{"entity": ref, "unchangedHours": ...}`) and unchanged PRs share one entity.
+VOLATILE_ENTITY_FIELDS = ("unchangedHours", "noUpdateStreak", "noUpdateHours", "approvedButUnmergedHours")
+INTERNED_SNAPSHOT_LIST_KEYS = (
+    "open",
+    "openUnbound",
+    "assigned",
+    "assignedUnbound",
+    "nbs",
+    "nbsUnbound",
+    "changeRequests",
+    "newOpenPrs",
+    "openPrs",
+    "shaChangedPrs",
+    "staleOpenPrs",
+    "staleOpenPrsDigest",
+    "staleOpenPrsAll",
+    "ownerPingCandidates",
+    "approvedButUnmerged",
+    "stableTerminalPrs",
+)
+ENTITY_REF_RE = re.compile(r"^\d+@[0-9a-f]{16}$")
+# Snapshot keys promoted to top-level state by `save_state` instead of being retained per run.
+STATE_ONLY_SNAPSHOT_KEYS = (
+    "sourcePrState",
+    "entityTables",
+    "syncWatermarks",
+    "lastFullSyncAt",
+    "remoteProbe",
+    "lastFetchAt",
+    "prEventLog",
+)
+# `--only-changes` scans first compare a one-query repo fingerprint with the stored one and reuse the
+# latest run when nothing moved; a full scan is still forced once the reuse window below expires.
+TASK1_CHANGE_PROBE = parse_choice_env_value("TASK1_CHANGE_PROBE", ("on", "off"), "on")
+TASK1_CHANGE_PROBE_MAX_SKIP_MINUTES = parse_positive_int_env_value("TASK1_CHANGE_PROBE_MAX_SKIP_MINUTES", 120)
+# Fetch strategy: `cli` pages open issues and open PRs separately (one cursor-paginated GraphQL
+# query per resource, or REST pages for issues on the http backend) and looks Source PR states up
+# per issue; `graphql` batches open issues, open PRs and Source PR states into one paginated query.
+TASK1_FETCH_MODE = parse_choice_env_value("TASK1_FETCH_MODE", ("cli", "graphql"), "cli")
+TASK1_GRAPHQL_PAGE_SIZE = min(100, parse_positive_int_env_value("TASK1_GRAPHQL_PAGE_SIZE", 100))
+# Upper bound for filtered `gh ... list` calls, which otherwise stop at the CLI default of 30 items.
+TASK1_LIST_LIMIT = parse_positive_int_env_value("TASK1_LIST_LIMIT", 5000)
+# Daemon mode never sleeps less than this between cycles, even when nextActionAt is already due.
+TASK1_DAEMON_MIN_SLEEP_SECONDS = parse_positive_float_env_value("TASK1_DAEMON_MIN_SLEEP_SECONDS", 30.0)
+# Prometheus textfile-collector target written (atomically) after every scan; unset disables it.
+TASK1_PROMETHEUS_TEXTFILE = os.environ.get("TASK1_PROMETHEUS_TEXTFILE") or ""
+# Daemon/webhook modes also serve `/metrics` from memory when TASK1_METRICS_PORT is set.
+TASK1_METRICS_HOST = os.environ.get("TASK1_METRICS_HOST") or "127.0.0.1"
+# Webhook mode listens here; the HMAC secret comes from TASK1_WEBHOOK_SECRET at startup.
+TASK1_WEBHOOK_HOST = os.environ.get("TASK1_WEBHOOK_HOST") or "127.0.0.1"
+TASK1_WEBHOOK_PORT = parse_positive_int_env_value("TASK1_WEBHOOK_PORT", 8787)
+# Deliveries arriving within this window are coalesced into one scan.
+TASK1_WEBHOOK_DEBOUNCE_SECONDS = parse_positive_float_env_value("TASK1_WEBHOOK_DEBOUNCE_SECONDS", 5.0)
+# Serve mode answers read-only state queries here.
+TASK1_SERVE_HOST = os.environ.get("TASK1_SERVE_HOST") or "127.0.0.1"
+TASK1_SERVE_PORT = parse_positive_int_env_value("TASK1_SERVE_PORT", 8788)
+# Serve mode answers one connection at a time, so a client that stays idle longer than this is dropped.
+TASK1_SERVE_CLIENT_TIMEOUT_SECONDS = parse_positive_float_env_value("TASK1_SERVE_CLIENT_TIMEOUT_SECONDS", 5.0)
+WEBHOOK_EVENTS = ("pull_request", "pull_request_review", "issues")
+# State keys `apply_webhook_event` patches in place, outside `save_state`/`save_metadata`.
+WEBHOOK_PATCHED_STATE_KEYS = ("entityTables", "sourcePrState")
+WEBHOOK_REVIEW_DECISIONS = {"approved": "APPROVED", "changes_requested": "CHANGES_REQUESTED", "dismissed": "REVIEW_REQUIRED"}
+# Worker limit for independent GitHub reads/writes (list calls, Source PR lookups, comment upserts).
+# 1 keeps the historical strictly sequential behavior; results are merged in submission order either way.
+TASK1_FETCH_CONCURRENCY = parse_positive_int_env_value("TASK1_FETCH_CONCURRENCY", 1)
+# GitHub transport: `gh` spawns the CLI per call, `http` reuses one pooled keep-alive connection.
+TASK1_GITHUB_BACKEND = parse_choice_env_value("TASK1_GITHUB_BACKEND", ("gh", "http"), "gh")
+# Conditional-request cache for the `http` backend. REST reads are revalidated with ETags every run
+# (a 304 is free against the primary rate limit); the max-age knobs let hot endpoints skip the
+# round-trip entirely, and are the only reuse possible for GraphQL, which has no validators.
+TASK1_HTTP_CACHE_FILE = os.environ.get("TASK1_HTTP_CACHE_FILE") or str(Path(STATE_FILE).with_name("fiber-link-task1-http-cache.json"))
+TASK1_HTTP_CACHE_MAX_ENTRIES = parse_positive_int_env_value("TASK1_HTTP_CACHE_MAX_ENTRIES", 256)
+TASK1_HTTP_CACHE_MAX_BYTES = parse_positive_int_env_value("TASK1_HTTP_CACHE_MAX_BYTES", 8 * 1024 * 1024)
+TASK1_HTTP_CACHE_PR_STATE_MAX_AGE_SECONDS = parse_positive_float_env_value("TASK1_HTTP_CACHE_PR_STATE_MAX_AGE_SECONDS", 300.0)
+TASK1_HTTP_CACHE_GRAPHQL_MAX_AGE_SECONDS = parse_positive_float_env_value("TASK1_HTTP_CACHE_GRAPHQL_MAX_AGE_SECONDS", 60.0)
+
+# One keep-alive client per live thread (connections are not shareable), all backed by one response
+# cache. Fetches fan out on one long-lived executor, so its workers keep their connections warm across
+# calls and scans; clients of threads that have exited are closed and their counters folded into
+# `_RETIRED_HTTP_STATS` so call totals never go backwards.
+_HTTP_CLIENTS: Dict[threading.Thread, GitHubHttpClient] = {}
+_HTTP_CACHE: ResponseCache | None = None
+_HTTP_CLIENTS_LOCK = threading.Lock()
+_RETIRED_HTTP_STATS = {"requests": 0, "bytesReceived": 0, "retries": 0}
+_FETCH_EXECUTOR: ThreadPoolExecutor | None = None
+_FETCH_EXECUTOR_WORKERS = 0
+_FETCH_EXECUTOR_LOCK = threading.Lock()
+_STATE_DB: StateDb | None = None
+# `gh` subprocess counters; HTTP clients keep their own `stats`. Both feed `github_call_totals`.
+_GH_CALL_STATS = {"calls": 0, "bytes": 0, "retries": 0}
+_GH_CALL_STATS_LOCK = threading.Lock()
+_METRICS_SERVER: MetricsServer | None = None
+# Bumped on every state write in this process, so query caches notice writes within one mtime tick.
+_STATE_GENERATION = 0
+
+
+# Hard upper bound for one scan's GitHub I/O; every call's timeout is capped by what is left of it.
+# On expiry the scan falls back to the last persisted run, marked `dataSource: stale-source`.
+TASK1_SCAN_DEADLINE_SECONDS = parse_positive_float_env_value("TASK1_SCAN_DEADLINE_SECONDS", 900.0)
+TASK1_GH_CALL_TIMEOUT_SECONDS = parse_positive_float_env_value("TASK1_GH_CALL_TIMEOUT_SECONDS", 60.0)
+TASK1_GH_CALL_RETRIES = parse_positive_int_env_value("TASK1_GH_CALL_RETRIES", 2)
+# Monotonic deadline of the scan in progress (None outside scans).
+_SCAN_DEADLINE: float | None = None
+# Below this many remaining calls (core or GraphQL), analyze() switches to the lightweight
+# classification path that resolves Source PRs from the open-PR set instead of per-issue lookups.
+TASK1_RATE_LIMIT_LOW_WATERMARK = parse_positive_int_env_value("TASK1_RATE_LIMIT_LOW_WATERMARK", 500)
+# Below this many remaining calls, HTTP requests are spread evenly over the rest of the window.
+TASK1_RATE_LIMIT_PACE_BELOW = parse_positive_int_env_value("TASK1_RATE_LIMIT_PACE_BELOW", 100)
+TASK1_RATE_LIMIT_MAX_RETRIES = parse_positive_int_env_value("TASK1_RATE_LIMIT_MAX_RETRIES", 3)
+TASK1_RATE_LIMIT_MAX_BACKOFF_SECONDS = parse_positive_float_env_value("TASK1_RATE_LIMIT_MAX_BACKOFF_SECONDS", 60.0)
+_RATE_BUDGET = RateLimitBudget(
+    pace_below=TASK1_RATE_LIMIT_PACE_BELOW,
+    max_backoff_seconds=TASK1_RATE_LIMIT_MAX_BACKOFF_SECONDS,
+    max_retries=TASK1_RATE_LIMIT_MAX_RETRIES,
+)
+
+
+def refresh_rate_budget() -> None:
+    """Load the current budget from `/rate_limit`, which GitHub does not count against any limit.
+
+    The HTTP backend keeps the budget current from response headers, so it only needs this once.
+    """
+    if TASK1_GITHUB_BACKEND == "http" and _RATE_BUDGET.remaining("core") is not None:
+        return
+    try:
+        if TASK1_GITHUB_BACKEND == "http":
+            payload = get_http_client().request("GET", "/rate_limit").json()
+        else:
+            payload = json.loads(run_gh(["api", "rate_limit"]) or "{}")
+    except (subprocess.CalledProcessError, GitHubHttpError, OSError, ValueError, ScanTimeout):
+        return
+    _RATE_BUDGET.update_from_rate_limit(payload)
+
+
+def build_http_cache() -> ResponseCache:
+    return ResponseCache(
+        TASK1_HTTP_CACHE_FILE,
+        max_entries=TASK1_HTTP_CACHE_MAX_ENTRIES,
+        max_bytes=TASK1_HTTP_CACHE_MAX_BYTES,
+        max_age_rules=[
+            (r"^GET \S*/pulls/\d+$", TASK1_HTTP_CACHE_PR_STATE_MAX_AGE_SECONDS),
+            (r"^POST /graphql ", TASK1_HTTP_CACHE_GRAPHQL_MAX_AGE_SECONDS),
+        ],
+    )
+
+
+def get_http_client() -> GitHubHttpClient:
+    global _HTTP_CACHE
+    thread = threading.current_thread()
+    with _HTTP_CLIENTS_LOCK:
+        client = _HTTP_CLIENTS.get(thread)
+        if client is None:
+            for owner in [owner for owner in _HTTP_CLIENTS if not owner.is_alive()]:
+                retired = _HTTP_CLIENTS.pop(owner)
+                retired.close()
+                for counter in _RETIRED_HTTP_STATS:
+                    _RETIRED_HTTP_STATS[counter] += retired.stats[counter]
+            if _HTTP_CACHE is None:
+                _HTTP_CACHE = build_http_cache()
+            client = _HTTP_CLIENTS[thread] = GitHubHttpClient(
+                cache=_HTTP_CACHE,
+                budget=_RATE_BUDGET,
+                timeout_provider=github_call_timeout,
+                timeout_retries=TASK1_GH_CALL_RETRIES,
+            )
+        return client
+
+
+def github_call_totals() -> Dict[str, int]:
+    with _GH_CALL_STATS_LOCK:
+        totals = dict(_GH_CALL_STATS)
+    with _HTTP_CLIENTS_LOCK:
+        for stats in [_RETIRED_HTTP_STATS, *(client.stats for client in _HTTP_CLIENTS.values())]:
+            totals["calls"] += stats["requests"]
+            totals["bytes"] += stats["bytesReceived"]
+            totals["retries"] += stats["retries"]
+    return totals
+
+
+@contextmanager
+def timed_phase(timings: Dict[str, dict] | None, name: str) -> Iterator[None]:
+    """Add the wall time and GitHub calls/bytes/retries spent inside the block to `timings[name]`."""
+    if timings is None:
+        yield
+        return
+    calls_before = github_call_totals()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        calls_after = github_call_totals()
+        entry = timings.setdefault(name, {"seconds": 0.0, "calls": 0, "bytes": 0, "retries": 0})
+        entry["seconds"] = round(entry["seconds"] + time.perf_counter() - started, 4)
+        for counter in ("calls", "bytes", "retries"):
+            entry[counter] += calls_after[counter] - calls_before[counter]
+
+
+def export_metrics(snapshot: dict) -> None:
+    """Publish a scan's metrics to the Prometheus textfile and/or the in-process `/metrics` endpoint."""
+    if not TASK1_PROMETHEUS_TEXTFILE and _METRICS_SERVER is None:
+        return
+    text = render_prometheus(snapshot)
+    if TASK1_PROMETHEUS_TEXTFILE:
+        try:
+            write_textfile(TASK1_PROMETHEUS_TEXTFILE, text)
+        except OSError as exc:
+            print(f"metrics export failed: {exc}", file=sys.stderr)
+    if _METRICS_SERVER is not None:
+        _METRICS_SERVER.publish(text)
+
+
+def start_metrics_server() -> None:
+    global _METRICS_SERVER
+    port = parse_positive_int_env("TASK1_METRICS_PORT")
+    if port is not None and _METRICS_SERVER is None:
+        _METRICS_SERVER = MetricsServer(TASK1_METRICS_HOST, port).start()
+
+
+def stop_metrics_server() -> None:
+    global _METRICS_SERVER
+    if _METRICS_SERVER is not None:
+        _METRICS_SERVER.close()
+        _METRICS_SERVER = None
+
+
+def close_http_client() -> None:
+    global _HTTP_CACHE, _FETCH_EXECUTOR
+    with _FETCH_EXECUTOR_LOCK:
+        if _FETCH_EXECUTOR is not None:
+            _FETCH_EXECUTOR.shutdown(wait=True)
+            _FETCH_EXECUTOR = None
+    with _HTTP_CLIENTS_LOCK:
+        for client in _HTTP_CLIENTS.values():
+            client.close()
+        _HTTP_CLIENTS.clear()
+        _HTTP_CACHE = None
+
+
+def get_state_db() -> StateDb:
+    global _STATE_DB
+    if _STATE_DB is None:
+        _STATE_DB = StateDb(TASK1_STATE_DB_FILE)
+        if _STATE_DB.is_empty() and os.path.exists(STATE_FILE):
+            _STATE_DB.import_json_state(load_json_state(), max_runs=MAX_STATE_RUNS)
+    return _STATE_DB
+
+
+def close_state_db() -> None:
+    global _STATE_DB
+    if _STATE_DB is not None:
+        _STATE_DB.close()
+        _STATE_DB = None
+
+
+def run_concurrently(calls: List[Callable[[], T]]) -> List[T]:
+    """Run independent calls on the shared pool of `TASK1_FETCH_CONCURRENCY` workers.
+
+    Results come back in submission order, so callers merge them exactly as a serial loop would.
+    """
+    global _FETCH_EXECUTOR, _FETCH_EXECUTOR_WORKERS
+    if TASK1_FETCH_CONCURRENCY <= 1 or len(calls) <= 1:
+        return [call() for call in calls]
+    with _FETCH_EXECUTOR_LOCK:
+        if _FETCH_EXECUTOR is None or _FETCH_EXECUTOR_WORKERS != TASK1_FETCH_CONCURRENCY:
+            if _FETCH_EXECUTOR is not None:
+                _FETCH_EXECUTOR.shutdown(wait=False)
+            _FETCH_EXECUTOR = ThreadPoolExecutor(max_workers=TASK1_FETCH_CONCURRENCY, thread_name_prefix="github-fetch")
+            _FETCH_EXECUTOR_WORKERS = TASK1_FETCH_CONCURRENCY
+        pool = _FETCH_EXECUTOR
+    futures = [pool.submit(call) for call in calls]
+    return [future.result() for future in futures]
+
 
 def parse_positive_int_env(var_name: str) -> int | None:
     raw = os.environ.get(var_name)
@@ -96,21 +503,30 @@ def parse_positive_int_env(var_name: str) -> int | None:
     return parsed if parsed > 0 else None
 
 
-def list_json(resource: str, assignee: str | None = None, label: str | None = None) -> List[dict]:
-    if resource == "issue":
-        args = ["issue", "list", "--state", "open", "--json", "number,title,url,body,labels,assignees"]
-    elif resource == "pr":
-        args = [
-            "pr",
-            "list",
-            "--state",
-            "open",
-            "--json",
-            "number,title,url,reviewDecision,body,headRefName,headRefOid,updatedAt,author",
-        ]
-    else:
+# Within this many seconds of the last GitHub fetch, `analyze()` rebuilds the snapshot from the
+# persisted entity tables (re-evaluating only time-dependent fields) instead of fetching again.
+# Unset disables reuse; when set, full-listing modes also persist the entity tables.
+TASK1_SNAPSHOT_MAX_AGE_SECONDS = parse_positive_int_env("TASK1_SNAPSHOT_MAX_AGE_SECONDS")
+
+
+def list_json(resource: str, assignee: str | None = None, label: str | None = None) -> Iterable[dict]:
+    """List every open issue or PR in the `gh --json` shape.
+
+    Unfiltered listings stream through `iter_list_pages` in every fetch mode, so the result is a
+    lazy iterator that fetches the next page only when the consumer reaches it; filtered listings
+    are a single `gh ... list` call and return a list.
+    """
+    if resource not in ("issue", "pr"):
         raise ValueError(resource)
+    if not assignee and not label:
+        return itertools.chain.from_iterable(iter_list_pages(resource))
 
+    if resource == "issue":
+        fields = "number,title,url,body,labels,assignees,updatedAt"
+    else:
+        fields = "number,title,url,reviewDecision,body,headRefName,headRefOid,updatedAt,author"
+    # `gh ... list` has no cursor to follow, so filtered listings are one call capped by the limit.
+    args = [resource, "list", "--state", "open", "--json", fields, "--limit", str(TASK1_LIST_LIMIT)]
     if assignee:
         args.extend(["--assignee", assignee])
     if label:
@@ -120,6 +536,323 @@ def list_json(resource: str, assignee: str | None = None, label: str | None = No
     return json.loads(raw or "[]")
 
 
+GRAPHQL_ISSUE_FIELDS = "number title url body updatedAt labels(first: 50) { nodes { name } } assignees(first: 20) { nodes { login } }"
+GRAPHQL_PR_FIELDS = "number title url reviewDecision body headRefName headRefOid updatedAt author { login }"
+
+
+def build_open_items_query(issue_cursor: str | None, pr_cursor: str | None, fetch_issues: bool, fetch_prs: bool, lookup_prs: List[int]) -> str:
+    sections: List[str] = []
+    if fetch_issues:
+        after = f", after: {json.dumps(issue_cursor)}" if issue_cursor else ""
+        sections.append(
+            f"issues(states: OPEN, first: {TASK1_GRAPHQL_PAGE_SIZE}{after}) "
+            f"{{ pageInfo {{ hasNextPage endCursor }} nodes {{ {GRAPHQL_ISSUE_FIELDS} }} }}"
+        )
+    if fetch_prs:
+        after = f", after: {json.dumps(pr_cursor)}" if pr_cursor else ""
+        sections.append(
+            f"pullRequests(states: OPEN, first: {TASK1_GRAPHQL_PAGE_SIZE}{after}) "
+            f"{{ pageInfo {{ hasNextPage endCursor }} nodes {{ {GRAPHQL_PR_FIELDS} }} }}"
+        )
+    for pr_num in lookup_prs:
+        sections.append(f"sourcePr{pr_num}: pullRequest(number: {pr_num}) {{ number state }}")
+    return "query($owner: String!, $name: String!) { repository(owner: $owner, name: $name) { " + " ".join(sections) + " } }"
+
+
+def run_graphql(query: str, variables: Dict[str, str] | None = None, use_cache: bool = True) -> dict:
+    if variables is None:
+        owner, name = REPO.split("/", 1)
+        variables = {"owner": owner, "name": name}
+    if TASK1_GITHUB_BACKEND == "http":
+        return get_http_client().graphql(query, variables, use_cache=use_cache)
+    args = ["api", "graphql", "-f", f"query={query}"]
+    for var_name, value in variables.items():
+        args.extend(["-f", f"{var_name}={value}"])
+    raw = run_gh(args)
+    payload = json.loads(raw or "{}")
+    return payload.get("data") or {}
+
+
+def _graphql_issue_to_cli_shape(node: dict) -> dict:
+    return {
+        "number": node.get("number"),
+        "title": node.get("title"),
+        "url": node.get("url"),
+        "body": node.get("body") or "",
+        "updatedAt": node.get("updatedAt"),
+        "labels": list((node.get("labels") or {}).get("nodes") or []),
+        "assignees": list((node.get("assignees") or {}).get("nodes") or []),
+    }
+
+
+def _rest_pr_to_cli_shape(item: dict, review_decision: str | None) -> dict:
+    head = item.get("head") if isinstance(item.get("head"), dict) else {}
+    user = item.get("user") if isinstance(item.get("user"), dict) else {}
+    return {
+        "number": item.get("number"),
+        "title": item.get("title"),
+        "url": item.get("html_url"),
+        "body": item.get("body") or "",
+        "headRefName": head.get("ref"),
+        "headRefOid": head.get("sha"),
+        "updatedAt": item.get("updated_at"),
+        "author": {"login": user.get("login")},
+        "reviewDecision": review_decision,
+    }
+
+
+def _rest_issue_to_cli_shape(item: dict) -> dict:
+    return {
+        "number": item.get("number"),
+        "title": item.get("title"),
+        "url": item.get("html_url"),
+        "body": item.get("body") or "",
+        "updatedAt": item.get("updated_at"),
+        "labels": [{"name": label.get("name")} for label in item.get("labels") or [] if isinstance(label, dict)],
+        "assignees": [{"login": user.get("login")} for user in item.get("assignees") or [] if isinstance(user, dict)],
+    }
+
+
+def iter_list_pages(resource: str) -> Iterator[List[dict]]:
+    """Yield all open issues or PRs one page at a time, following cursors until exhausted."""
+    if TASK1_GITHUB_BACKEND == "http" and resource == "issue":
+        # REST list pages carry ETags, so unchanged pages are revalidated with a free 304.
+        for page in get_http_client().iter_pages(f"/repos/{REPO}/issues?state=open&per_page=100"):
+            items = page if isinstance(page, list) else [page]
+            yield [_rest_issue_to_cli_shape(item) for item in items if isinstance(item, dict) and "pull_request" not in item]
+        return
+
+    connection_name = "issues" if resource == "issue" else "pullRequests"
+    cursor: str | None = None
+    while True:
+        query = build_open_items_query(cursor, cursor, resource == "issue", resource == "pr", [])
+        connection = (run_graphql(query).get("repository") or {}).get(connection_name) or {}
+        nodes = [node for node in connection.get("nodes") or [] if isinstance(node, dict)]
+        yield [_graphql_issue_to_cli_shape(node) for node in nodes] if resource == "issue" else nodes
+        page_info = connection.get("pageInfo") or {}
+        if not page_info.get("hasNextPage"):
+            return
+        cursor = page_info.get("endCursor")
+
+
+def iter_chunks(items: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    iterator = iter(items)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def search_updated_items(resource: str, since: str) -> List[dict]:
+    """Return issues or PRs (any state) updated at or after `since`, in the `gh --json` shape plus `state`."""
+    kind, fields = ("issue", GRAPHQL_ISSUE_FIELDS) if resource == "issue" else ("pr", GRAPHQL_PR_FIELDS)
+    node_type = "Issue" if resource == "issue" else "PullRequest"
+    query = (
+        "query($searchQuery: String!, $cursor: String) { "
+        f"search(type: ISSUE, query: $searchQuery, first: {TASK1_GRAPHQL_PAGE_SIZE}, after: $cursor) "
+        f"{{ pageInfo {{ hasNextPage endCursor }} nodes {{ ... on {node_type} {{ {fields} state }} }} }} }}"
+    )
+    variables = {"searchQuery": f"repo:{REPO} is:{kind} updated:>={since}"}
+    items: List[dict] = []
+    while True:
+        connection = run_graphql(query, variables).get("search") or {}
+        for node in connection.get("nodes") or []:
+            if not isinstance(node, dict) or not isinstance(node.get("number"), int):
+                continue
+            item = _graphql_issue_to_cli_shape(node) if resource == "issue" else dict(node)
+            item["state"] = str(node.get("state") or "").upper()
+            items.append(item)
+        page_info = connection.get("pageInfo") or {}
+        if not page_info.get("hasNextPage"):
+            return items
+        variables = {**variables, "cursor": page_info.get("endCursor") or ""}
+
+
+def _max_updated_at(items: List[dict], floor: str | None) -> str | None:
+    # ISO-8601 UTC strings from GitHub compare correctly as text.
+    candidates = [item.get("updatedAt") for item in items if isinstance(item.get("updatedAt"), str)]
+    if isinstance(floor, str):
+        candidates.append(floor)
+    return max(candidates) if candidates else None
+
+
+def _table_items(table: Dict[str, dict]) -> List[dict]:
+    # Newest first, matching the default `gh ... list` ordering.
+    return [table[key] for key in sorted(table, key=int, reverse=True)]
+
+
+def build_entity_tables(raw_prs: Iterable[dict], raw_issues: Iterable[dict]) -> Dict[str, Dict[str, dict]]:
+    tables: Dict[str, Dict[str, dict]] = {"pr": {}, "issue": {}}
+    for resource, items in (("pr", raw_prs), ("issue", raw_issues)):
+        project = project_issue if resource == "issue" else project_pr
+        for item in items:
+            if isinstance(item.get("number"), int):
+                tables[resource][str(item["number"])] = project(item)
+    return tables
+
+
+def fresh_entity_tables(state: dict, now_ts: int) -> Dict[str, Dict[str, dict]] | None:
+    """Return the persisted entity tables while their fetch is within `TASK1_SNAPSHOT_MAX_AGE_SECONDS`."""
+    tables = state.get("entityTables")
+    fetched_at = state.get("lastFetchAt")
+    if TASK1_SNAPSHOT_MAX_AGE_SECONDS is None or not isinstance(fetched_at, (int, float)):
+        return None
+    if now_ts - fetched_at >= TASK1_SNAPSHOT_MAX_AGE_SECONDS:
+        return None
+    if not isinstance(tables, dict) or not all(isinstance(tables.get(resource), dict) for resource in ("pr", "issue")):
+        return None
+    return tables
+
+
+def sync_open_items(
+    state: dict, now_ts: int, known_source_pr_states: Dict[int, str] | None = None, search_updates: bool = True
+) -> Tuple[List[dict], List[dict], Dict[int, str], dict]:
+    """Incrementally sync open issues/PRs into the entity tables persisted in state.
+
+    A full listing runs when no tables exist yet or the last full sync is older than
+    `TASK1_FULL_RECONCILE_HOURS` (this also catches deletions/transfers the search cannot see).
+    Otherwise only items updated since each resource's `updatedAt` watermark are fetched;
+    items that are no longer OPEN are dropped from the table. With `search_updates=False` (webhook
+    mode, where deliveries already patched the tables) the tables are used as they are.
+
+    Returns:
+      raw_open_prs, open_issues, source_pr_states, sync_state (persisted snapshot keys)
+    """
+    tables = state.get("entityTables") if isinstance(state.get("entityTables"), dict) else {}
+    watermarks = state.get("syncWatermarks") if isinstance(state.get("syncWatermarks"), dict) else {}
+    last_full_sync_at = state.get("lastFullSyncAt")
+    source_pr_states: Dict[int, str] = {}
+    full_sync = (
+        not isinstance(tables.get("pr"), dict)
+        or not isinstance(tables.get("issue"), dict)
+        or not isinstance(last_full_sync_at, (int, float))
+        or now_ts - last_full_sync_at >= TASK1_FULL_RECONCILE_HOURS * 3600
+        or not all(isinstance(watermarks.get(resource), str) for resource in ("pr", "issue"))
+    )
+
+    if full_sync:
+        if TASK1_FETCH_MODE == "graphql":
+            raw_prs, raw_issues, source_pr_states = fetch_open_items_graphql(known_source_pr_states)
+        else:
+            raw_prs, raw_issues = list(list_json("pr")), list(list_json("issue"))
+        next_tables = build_entity_tables(raw_prs, raw_issues)
+        next_watermarks: Dict[str, str | None] = {
+            resource: _max_updated_at(items, watermarks.get(resource)) for resource, items in (("pr", raw_prs), ("issue", raw_issues))
+        }
+        last_full_sync_at = now_ts
+    else:
+        next_tables = {resource: dict(tables[resource]) for resource in ("pr", "issue")}
+        next_watermarks = {}
+        for resource in ("pr", "issue"):
+            changed = search_updated_items(resource, watermarks[resource]) if search_updates else []
+            for item in changed:
+                key = str(item["number"])
+                if item.pop("state", "OPEN") == "OPEN":
+                    next_tables[resource][key] = project_issue(item) if resource == "issue" else project_pr(item)
+                else:
+                    next_tables[resource].pop(key, None)
+            next_watermarks[resource] = _max_updated_at(changed, watermarks[resource])
+
+    sync_state = {
+        "entityTables": next_tables,
+        "syncWatermarks": next_watermarks,
+        "lastFullSyncAt": last_full_sync_at,
+        "syncMode": "full" if full_sync else ("incremental" if search_updates else "event"),
+    }
+    return _table_items(next_tables["pr"]), _table_items(next_tables["issue"]), source_pr_states, sync_state
+
+
+def fetch_open_items_graphql(known_source_pr_states: Dict[int, str] | None = None) -> Tuple[List[dict], List[dict], Dict[int, str]]:
+    """Fetch open PRs, open issues and referenced Source PR states in batched GraphQL round-trips.
+
+    Each round-trip requests the next page of both connections and resolves the Source PR
+    references discovered in the previous page, so the total is one query per page (plus at
+    most one trailing lookup query). Results keep the `gh ... --json` shape so downstream
+    classification consumes them unchanged.
+
+    `known_source_pr_states` (terminal states from the persisted index) are never re-queried.
+
+    Returns:
+      raw_open_prs, open_issues, source_pr_states (PR number -> OPEN/CLOSED/MERGED)
+    """
+    raw_open_prs: List[dict] = []
+    open_issues: List[dict] = []
+    source_pr_states: Dict[int, str] = dict(known_source_pr_states or {})
+    issue_cursor: str | None = None
+    pr_cursor: str | None = None
+    fetch_issues = True
+    fetch_prs = True
+    pending_lookups: List[int] = []
+
+    while fetch_issues or fetch_prs or pending_lookups:
+        lookup_prs = sorted(set(pending_lookups))
+        pending_lookups = []
+        repository = run_graphql(build_open_items_query(issue_cursor, pr_cursor, fetch_issues, fetch_prs, lookup_prs)).get("repository") or {}
+
+        for pr_num in lookup_prs:
+            node = repository.get(f"sourcePr{pr_num}")
+            if isinstance(node, dict) and node.get("state"):
+                source_pr_states[pr_num] = str(node["state"]).upper()
+
+        if fetch_prs:
+            connection = repository.get("pullRequests") or {}
+            for node in connection.get("nodes") or []:
+                if isinstance(node, dict):
+                    raw_open_prs.append(node)
+                    if isinstance(node.get("number"), int):
+                        source_pr_states[node["number"]] = "OPEN"
+            page_info = connection.get("pageInfo") or {}
+            fetch_prs = bool(page_info.get("hasNextPage"))
+            pr_cursor = page_info.get("endCursor")
+
+        if fetch_issues:
+            connection = repository.get("issues") or {}
+            for node in connection.get("nodes") or []:
+                if not isinstance(node, dict):
+                    continue
+                issue = project_issue(_graphql_issue_to_cli_shape(node))
+                open_issues.append(issue)
+                pr_num = issue["sourcePr"]
+                if pr_num and pr_num not in source_pr_states:
+                    pending_lookups.append(pr_num)
+            page_info = connection.get("pageInfo") or {}
+            fetch_issues = bool(page_info.get("hasNextPage"))
+            issue_cursor = page_info.get("endCursor")
+
+        # Drop references already resolved by the PR page fetched in this round-trip.
+        pending_lookups = [pr_num for pr_num in pending_lookups if pr_num not in source_pr_states]
+
+    return raw_open_prs, open_issues, source_pr_states
+
+
+CHANGE_PROBE_QUERY = """
+query($owner: String!, $name: String!) {
+  repository(owner: $owner, name: $name) {
+    issues(states: OPEN, first: 1, orderBy: {field: UPDATED_AT, direction: DESC}) { totalCount nodes { updatedAt } }
+    pullRequests(states: OPEN, first: 1, orderBy: {field: UPDATED_AT, direction: DESC}) { totalCount nodes { updatedAt } }
+  }
+}
+"""
+
+
+def probe_remote_changes() -> dict:
+    """Fingerprint open issues/PRs (count + newest `updatedAt`) with a single GraphQL query.
+
+    The response cache is bypassed: a cached fingerprint equals the stored one by construction.
+    """
+    repository = run_graphql(CHANGE_PROBE_QUERY, use_cache=False).get("repository") or {}
+    probe: Dict[str, dict] = {}
+    for key, connection_name in (("issues", "issues"), ("prs", "pullRequests")):
+        connection = repository.get(connection_name) or {}
+        nodes = connection.get("nodes") or []
+        probe[key] = {
+            "totalCount": int(connection.get("totalCount") or 0),
+            "maxUpdatedAt": nodes[0].get("updatedAt") if nodes and isinstance(nodes[0], dict) else None,
+        }
+    return probe
+
+
 def iso_utc(ts: int) -> str:
     return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(ts))
 
@@ -163,6 +896,32 @@ def source_pr_from_issue_body(body: str) -> int | None:
     return int(m.group(1))
 
 
+def issue_source_pr(issue: dict) -> int | None:
+    if "sourcePr" in issue:
+        return issue["sourcePr"]
+    return source_pr_from_issue_body(issue.get("body", "") or "")
+
+
+def project_issue(issue: dict) -> dict:
+    """Reduce a fetched issue to the allowlisted fields plus its Source PR binding and body hash.
+
+    Idempotent, so already-projected issues (e.g. from the persisted entity tables) pass through.
+    """
+    if "sourcePr" in issue and "body" not in issue:
+        return issue
+    body = issue.get("body", "") or ""
+    projected = {field: issue[field] for field in TASK1_ISSUE_RETAINED_FIELDS if field in issue}
+    projected["number"] = issue.get("number")
+    projected["sourcePr"] = source_pr_from_issue_body(body)
+    projected["bodyHash"] = hashlib.sha256(body.encode("utf-8")).hexdigest()[:16]
+    return projected
+
+
+def project_pr(pr: dict) -> dict:
+    # PR bodies are never read; `normalize_pr` drops them too, this covers the raw entity tables.
+    return {key: value for key, value in pr.items() if key != "body"}
+
+
 def _parse_pr_state_dict(raw: object) -> Dict[int, dict]:
     if not isinstance(raw, dict):
         return {}
@@ -219,14 +978,95 @@ def has_label(issue: dict, label_name: str) -> bool:
     return any((label.get("name") or "").lower() == label_name.lower() for label in issue.get("labels", []))
 
 
-def pr_state(pr_num: int, cache: Dict[int, str]) -> str:
+def rest_pr_state(payload: object) -> str:
+    # REST reports merged PRs as `closed`; map onto the GraphQL/`gh` OPEN/CLOSED/MERGED vocabulary.
+    if not isinstance(payload, dict):
+        return ""
+    if payload.get("merged_at") or payload.get("merged"):
+        return "MERGED"
+    return str(payload.get("state") or "").upper()
+
+
+def load_source_pr_index(state: dict) -> Dict[int, dict]:
+    return _parse_pr_state_dict(state.get("sourcePrState"))
+
+
+def seed_source_pr_cache(
+    cache: Dict[int, str], index: Dict[int, dict], open_pr_numbers: Set[int], now_ts: int
+) -> None:
+    """Pre-resolve Source PR states that cannot have changed since they were last observed.
+
+    Open-set members are OPEN; indexed MERGED/CLOSED states are final (a reopened PR shows up
+    in the open set first); indexed OPEN states are trusted until the TTL expires.
+    """
+    open_ttl_seconds = TASK1_SOURCE_PR_OPEN_TTL_MINUTES * 60
+    for pr_num, entry in index.items():
+        state = str(entry.get("state") or "").upper()
+        checked_at = entry.get("checkedAt")
+        if state in TERMINAL_PR_STATES:
+            cache[pr_num] = state
+        elif state == "OPEN" and isinstance(checked_at, (int, float)) and now_ts - checked_at < open_ttl_seconds:
+            cache[pr_num] = state
+    for pr_num in open_pr_numbers:
+        cache[pr_num] = "OPEN"
+
+
+def update_source_pr_index(
+    index: Dict[int, dict],
+    cache: Dict[int, str],
+    referenced: Set[int],
+    open_pr_numbers: Set[int],
+    now_ts: int,
+) -> Dict[str, dict]:
+    """Merge this run's resolved states into the index, keeping only PRs open issues still reference."""
+    updated: Dict[str, dict] = {}
+    for pr_num in sorted(referenced):
+        state = cache.get(pr_num)
+        previous = index.get(pr_num, {})
+        if not state:
+            # Unresolved this run (still rate limited): keep the last observation unchanged.
+            if str(previous.get("state") or "").upper() in KNOWN_PR_STATES:
+                updated[str(pr_num)] = previous
+            continue
+        checked_at = previous.get("checkedAt")
+        # Only fresh observations move `checkedAt`; reused entries keep aging toward the TTL.
+        if pr_num in open_pr_numbers or previous.get("state") != state or not isinstance(checked_at, (int, float)):
+            checked_at = now_ts
+        updated[str(pr_num)] = {"state": state, "checkedAt": checked_at}
+    return updated
+
+
+def fetch_pr_state(pr_num: int) -> str | None:
+    """Return the PR's OPEN/CLOSED/MERGED state, or None while GitHub keeps rate limiting the lookup."""
+    try:
+        if TASK1_GITHUB_BACKEND == "http":
+            return rest_pr_state(get_http_client().request_json("GET", f"/repos/{REPO}/pulls/{pr_num}"))
+        return run_gh(["pr", "view", str(pr_num), "--json", "state", "--jq", ".state"]).strip()
+    except (subprocess.CalledProcessError, GitHubHttpError) as exc:
+        if not is_rate_limit_error(exc):
+            raise
+        # Still rate limited after backing off: leave this Source PR unresolved instead of failing the scan.
+        return None
+
+
+def pr_state(pr_num: int, cache: Dict[int, str | None]) -> str | None:
+    # Unresolved (None) lookups are cached too, so a throttled PR is not retried for every issue.
     if pr_num in cache:
         return cache[pr_num]
-    state = run_gh(["pr", "view", str(pr_num), "--json", "state", "--jq", ".state"]).strip()
+    state = fetch_pr_state(pr_num)
     cache[pr_num] = state
     return state
 
 
+def prefetch_pr_states(pr_nums: Iterable[int], cache: Dict[int, str]) -> None:
+    """Resolve uncached PR states in parallel; a no-op when running sequentially."""
+    if TASK1_FETCH_CONCURRENCY <= 1:
+        return
+    missing = sorted({pr_num for pr_num in pr_nums if pr_num not in cache})
+    states = run_concurrently([lambda pr_num=pr_num: fetch_pr_state(pr_num) for pr_num in missing])
+    cache.update(zip(missing, states))
+
+
 def normalize_pr(pr: dict, now_ts: int) -> dict:
     updated_at = pr.get("updatedAt")
     updated_ts = parse_iso_utc(updated_at)
@@ -300,9 +1140,58 @@ def split_stale_open_prs(stale_open_prs: List[dict]) -> Tuple[List[dict], List[d
     return watchdog, digest, owner_ping_candidates, stable_terminal_prs
 
 
+def transition_ts(pr: dict, now_ts: int) -> int:
+    """Best known time of a transition observed now: pushes and reviews bump the PR's `updatedAt`."""
+    updated_ts = parse_iso_utc(pr.get("updatedAt"))
+    return now_ts if updated_ts is None else min(now_ts, updated_ts)
+
+
+def pr_transition_events(number: int, previous: dict, head_sha: str, review_decision: str, ts: int, now_ts: int) -> List[dict]:
+    """Events for one PR between its previous runtime state (empty on first sight) and now."""
+    base = {"ts": ts, "observedAt": now_ts, "pr": number}
+    if not previous:
+        events = [{**base, "type": "opened", "headSha": head_sha, "reviewDecision": review_decision}]
+        if review_decision == "APPROVED":
+            events.append({**base, "type": "approved"})
+        return events
+    events = []
+    previous_head = previous.get("headSha") or ""
+    previous_decision = (previous.get("reviewDecision") or "").upper()
+    if previous_head != head_sha:
+        events.append({**base, "type": "head_changed", "from": previous_head, "to": head_sha})
+    if previous_decision != review_decision:
+        events.append({**base, "type": "review_changed", "from": previous_decision, "to": review_decision})
+        if review_decision == "APPROVED":
+            events.append({**base, "type": "approved"})
+    return events
+
+
+def last_pr_event_ts(event_log: Sequence[dict], number: int, event_type: str) -> int | None:
+    for event in reversed(event_log):
+        if event.get("pr") == number and event.get("type") == event_type and isinstance(event.get("ts"), int):
+            return event["ts"]
+    return None
+
+
 def build_pr_runtime_state(
-    open_prs: List[dict], prior_state: Dict[int, dict], now_ts: int
+    open_prs: List[dict],
+    prior_state: Dict[int, dict],
+    now_ts: int,
+    fresh_fetch: bool = True,
+    events: List[dict] | None = None,
+    event_log: Sequence[dict] = (),
 ) -> Tuple[List[dict], Dict[int, dict], List[dict], List[dict], List[dict], List[dict]]:
+    """Track per-PR head/review changes against `prior_state`.
+
+    Transitions (opened, head_changed, review_changed, approved, closed) are appended to `events`,
+    stamped with `transition_ts`. `approvedAt` is the time of the PR's latest `approved` event,
+    looked up in `event_log` when the prior state does not carry it.
+
+    With `fresh_fetch=False` (the PRs come from a reused fetch) unchanged PRs keep their
+    `noUpdateStreak`, since no new observation was made; hour-based fields still advance.
+    """
+    if events is None:
+        events = []
     tracked_prs = []
     previous_prs_map = prior_state
     next_state: Dict[int, dict] = {}
@@ -326,15 +1215,16 @@ def build_pr_runtime_state(
         decision_changed = previous_decision != review_decision
         stale = bool(previous)
         changed = head_changed or decision_changed
+        transitions = pr_transition_events(number, previous, head_sha, review_decision, transition_ts(pr, now_ts), now_ts)
+        events.extend(transitions)
 
         no_update_streak = 1
         if stale and not changed:
-            no_update_streak = int(previous.get("noUpdateStreak", 0)) + 1
+            no_update_streak = int(previous.get("noUpdateStreak", 0)) + (1 if fresh_fetch else 0)
 
         if changed:
             sha_changed_prs.append(pr)
             no_update_hours = 0.0
-            approved_at = now_ts if review_decision == "APPROVED" else None
         else:
             unchanged_hours = pr.get("unchangedHours")
             no_update_hours = (
@@ -342,12 +1232,16 @@ def build_pr_runtime_state(
                 if isinstance(unchanged_hours, (int, float))
                 else round(float(previous.get("noUpdateHours", 0)), 2)
             )
-            if review_decision == "APPROVED":
+
+        approved_at = None
+        if review_decision == "APPROVED":
+            approved_at = next((event["ts"] for event in transitions if event["type"] == "approved"), None)
+            if approved_at is None:
                 approved_at = previous.get("approvedAt")
-                if not isinstance(approved_at, (int, float)):
-                    approved_at = now_ts
-            else:
-                approved_at = None
+            if not isinstance(approved_at, (int, float)):
+                approved_at = last_pr_event_ts(event_log, number, "approved")
+            if approved_at is None:
+                approved_at = transition_ts(pr, now_ts)
 
         approved_hours = 0.0
         if approved_at is not None:
@@ -374,6 +1268,9 @@ def build_pr_runtime_state(
         if not stale:
             new_prs.append(pr)
 
+    for number in sorted(set(previous_prs_map) - set(next_state)):
+        events.append({"ts": now_ts, "observedAt": now_ts, "pr": number, "type": "closed"})
+
     return tracked_prs, next_state, new_prs, sha_changed_prs, approved_but_unmerged, stable_terminal_candidates
 
 
@@ -405,11 +1302,58 @@ def compute_next_action_interval(snapshot: dict) -> tuple[int, str]:
     return TASK1_STABLE_POLL_INTERVAL_MINUTES, "downshift-stable-terminal-prs"
 
 
+def pr_threshold_deadlines(snapshot: dict) -> List[Tuple[int, int, str]]:
+    """Return `(deadline_ts, pr_number, threshold)` for every time-based PR threshold in `snapshot`."""
+    pr_states = pr_state_map(snapshot)
+    deadlines: List[Tuple[int, int, str]] = []
+    for pr in snapshot_items(snapshot, "openPrs"):
+        number = pr.get("number")
+        if not isinstance(number, int):
+            continue
+        updated_ts = parse_iso_utc(pr.get("updatedAt"))
+        if updated_ts is not None:
+            deadlines.append((updated_ts + int(STALE_OPEN_PR_HOURS * 3600), number, "stale_open_pr"))
+            owner = pr.get("author")
+            if isinstance(owner, str) and owner.strip():
+                deadlines.append((updated_ts + int(OWNER_PING_THRESHOLD_HOURS * 3600), number, "owner_ping"))
+            if is_terminal_review_state(pr):
+                deadlines.append((updated_ts + int(TASK1_STABLE_NO_UPDATE_HOURS_THRESHOLD * 3600), number, "stable_terminal"))
+        approved_at = pr_states.get(number, {}).get("approvedAt")
+        if isinstance(approved_at, (int, float)):
+            deadlines.append((int(approved_at + TASK1_APPROVED_BUT_UNMERGED_REMINDER_HOURS * 3600), number, "approved_but_unmerged_reminder"))
+            deadlines.append((int(approved_at + TASK1_APPROVED_BUT_UNMERGED_ESCALATION_HOURS * 3600), number, "approved_but_unmerged_escalation"))
+    return deadlines
+
+
+def next_threshold_deadline(snapshot: dict, now_ts: int) -> Tuple[int, int, str] | None:
+    """Return the earliest threshold deadline still ahead of `now_ts`, if any."""
+    heap = pr_threshold_deadlines(snapshot)
+    heapq.heapify(heap)
+    while heap and heap[0][0] <= now_ts:
+        heapq.heappop(heap)
+    return heap[0] if heap else None
+
+
+def schedule_next_action(snapshot: dict, now_ts: int) -> None:
+    """Set `nextActionAt` to the next PR threshold crossing, capped by the polling interval."""
+    poll_interval = int(snapshot.get("pollingIntervalMinutes") or CHECK_INTERVAL_MINUTES)
+    next_action_ts = now_ts + poll_interval * 60
+    deadline = next_threshold_deadline(snapshot, now_ts)
+    if deadline is None:
+        snapshot.pop("nextDeadline", None)
+    else:
+        deadline_ts, pr_number, threshold = deadline
+        snapshot["nextDeadline"] = {"at": iso_utc(deadline_ts), "pr": pr_number, "threshold": threshold}
+        next_action_ts = min(next_action_ts, deadline_ts)
+    snapshot["nextActionAt"] = iso_utc(next_action_ts)
+
+
 def classify_with_source_pr(
     issues: List[dict],
     pr_state_cache: Dict[int, str],
     open_pr_numbers: Set[int] | None = None,
     allow_pr_state_lookup: bool = True,
+    fallback_states: Dict[int, str] | None = None,
 ) -> Tuple[List[dict], List[dict], List[dict]]:
     """
     Classify issues by Source PR binding state.
@@ -422,6 +1366,8 @@ def classify_with_source_pr(
       - If `open_pr_numbers` is not provided and `allow_pr_state_lookup` is True, use `pr_state`.
       - If `open_pr_numbers` is not provided and `allow_pr_state_lookup` is False,
         mark actionable with reason `source-pr-lookup-skipped`.
+      - If a lookup stays rate limited, use `fallback_states` (the persisted index overlaid with the
+        open PR set) as the lightweight path would; without it, the lookup counts as skipped.
 
     Returns:
       actionable_issues: no source PR, source PR not OPEN, or lookup skipped
@@ -433,7 +1379,7 @@ def classify_with_source_pr(
     unbound: List[dict] = []
 
     for issue in issues:
-        pr_num = source_pr_from_issue_body(issue.get("body", "") or "")
+        pr_num = issue_source_pr(issue)
         if not pr_num:
             reason = {"issue": issue, "reason": "missing-source-pr"}
             actionable.append(reason)
@@ -456,6 +1402,13 @@ def classify_with_source_pr(
             continue
 
         state = pr_state(pr_num, pr_state_cache)
+        if state is None:
+            if fallback_states is None:
+                reason = {"issue": issue, "reason": "source-pr-lookup-skipped"}
+                actionable.append(reason)
+                unbound.append(reason)
+                continue
+            state = fallback_states.get(pr_num, "NOT-OPEN")
         if state == "OPEN":
             bound.append(issue)
             continue
@@ -467,6 +1420,45 @@ def classify_with_source_pr(
     return actionable, bound, unbound
 
 
+def scan_issue_pages(
+    pages: Iterable[List[dict]],
+    pr_state_cache: Dict[int, str],
+    open_pr_numbers: Set[int] | None = None,
+    fallback_states: Dict[int, str] | None = None,
+) -> Tuple[List[dict], List[dict], List[dict], Set[int]]:
+    """Classify open issues one page at a time.
+
+    Only the retained results outlive a page, so the raw listing never has to be held in
+    memory at once. Passing `open_pr_numbers` selects the lightweight (no lookup) path.
+
+    Returns:
+      actionable_with_reason, nbs_issues, unbound_nbs, referenced_source_prs
+    """
+    actionable: List[dict] = []
+    nbs_issues: List[dict] = []
+    unbound_nbs: List[dict] = []
+    referenced: Set[int] = set()
+
+    for page in pages:
+        page_refs = {issue_source_pr(issue) for issue in page} - {None}
+        if open_pr_numbers is not None:
+            page_actionable, _, _ = classify_with_source_pr(
+                page,
+                pr_state_cache,
+                open_pr_numbers=open_pr_numbers,
+                allow_pr_state_lookup=False,
+            )
+        else:
+            prefetch_pr_states(page_refs, pr_state_cache)
+            page_actionable, _, _ = classify_with_source_pr(page, pr_state_cache, fallback_states=fallback_states)
+        actionable.extend(page_actionable)
+        unbound_nbs.extend(item for item in page_actionable if has_label(item["issue"], "nbs"))
+        nbs_issues.extend(issue for issue in page if has_label(issue, "nbs"))
+        referenced.update(page_refs)
+
+    return actionable, nbs_issues, unbound_nbs, referenced
+
+
 def apply_idle_queue_state(snapshot: dict, state: dict) -> None:
     """Compute idle-queue runtime fields and persist them on the snapshot.
 
@@ -563,7 +1555,20 @@ def primary_change_source(sources: List[str]) -> str:
     return "none"
 
 
+PR_EVENT_CHANGE_SOURCES = {
+    "opened": ("sha", "reviewDecision"),
+    "closed": ("sha", "reviewDecision"),
+    "head_changed": ("sha",),
+    "review_changed": ("reviewDecision",),
+}
+
+
 def detect_change(snapshot: dict, state: dict) -> dict:
+    """Report whether this run changed anything worth a notification.
+
+    PR changes come from the events `analyze()` appended this run (`prEvents`); snapshots built
+    without an event list fall back to diffing the PR head/review maps of the previous run.
+    """
     runs = state.get("runs", [])
     if not runs:
         return {"changed": True, "sources": ["ci"], "details": {}}
@@ -572,23 +1577,30 @@ def detect_change(snapshot: dict, state: dict) -> dict:
     sources: Set[str] = set()
     details: Dict[str, object] = {}
 
-    previous_heads = pr_head_map(last)
-    current_heads = pr_head_map(snapshot)
-    if previous_heads != current_heads:
-        sources.add("sha")
-        details["headSha"] = {
-            "previous": previous_heads,
-            "current": current_heads,
-        }
-
-    previous_review = pr_review_decision_map(last)
-    current_review = pr_review_decision_map(snapshot)
-    if previous_review != current_review:
-        sources.add("reviewDecision")
-        details["reviewDecision"] = {
-            "previous": previous_review,
-            "current": current_review,
-        }
+    events = snapshot.get("prEvents")
+    if isinstance(events, list):
+        for event in events:
+            sources.update(PR_EVENT_CHANGE_SOURCES.get(event.get("type"), ()))
+        if events:
+            details["prEvents"] = events
+    else:
+        previous_heads = pr_head_map(last)
+        current_heads = pr_head_map(snapshot)
+        if previous_heads != current_heads:
+            sources.add("sha")
+            details["headSha"] = {
+                "previous": previous_heads,
+                "current": current_heads,
+            }
+
+        previous_review = pr_review_decision_map(last)
+        current_review = pr_review_decision_map(snapshot)
+        if previous_review != current_review:
+            sources.add("reviewDecision")
+            details["reviewDecision"] = {
+                "previous": previous_review,
+                "current": current_review,
+            }
 
     if any(
         count_metric(last, key, *fallback_keys) != count_metric(snapshot, key, *fallback_keys)
@@ -615,45 +1627,103 @@ def detect_change(snapshot: dict, state: dict) -> dict:
     }
 
 
-def analyze(state: dict | None = None) -> dict:
+def analyze(
+    state: dict | StateSession | None = None, event_driven: bool = False, timings: Dict[str, dict] | None = None
+) -> dict:
     state_cache: Dict[int, str] = {}
     now_ts = int(time.time())
-    if state is None:
-        state = load_state()
+    state = state_dict(state)
 
     prior_pr_state = pr_state_map(state)
     prior_idle_streak = int(state.get("idleStreak", 0))
+    source_pr_index = load_source_pr_index(state)
+    known_terminal = {
+        pr_num: str(entry.get("state")).upper()
+        for pr_num, entry in source_pr_index.items()
+        if str(entry.get("state") or "").upper() in TERMINAL_PR_STATES
+    }
+    sync_state: dict = {}
+    reused_tables = None if event_driven else fresh_entity_tables(state, now_ts)
+    prior_event_log = state.get("prEventLog") if isinstance(state.get("prEventLog"), list) else []
+    pr_events: List[dict] = []
+
+    with timed_phase(timings, "fetchOpenItems"):
+        if reused_tables is not None:
+            raw_open_prs, open_issues = _table_items(reused_tables["pr"]), _table_items(reused_tables["issue"])
+            # The indexed Source PR states were resolved by the fetch being reused.
+            state_cache.update(
+                {
+                    pr_num: str(entry.get("state")).upper()
+                    for pr_num, entry in source_pr_index.items()
+                    if str(entry.get("state") or "").upper() in KNOWN_PR_STATES
+                }
+            )
+        elif TASK1_SYNC_MODE == "incremental" or event_driven:
+            raw_open_prs, open_issues, source_pr_states, sync_state = sync_open_items(
+                state, now_ts, known_terminal, search_updates=not event_driven
+            )
+            state_cache.update(source_pr_states)
+        elif TASK1_FETCH_MODE == "graphql":
+            raw_open_prs, open_issues, source_pr_states = fetch_open_items_graphql(known_terminal)
+            state_cache.update(source_pr_states)
+        elif TASK1_FETCH_CONCURRENCY > 1:
+            # Parallel listing has to materialize both listings; the sequential path streams them.
+            raw_open_prs, open_issues = run_concurrently([lambda: list(list_json("pr")), lambda: list(list_json("issue"))])
+        elif TASK1_SNAPSHOT_MAX_AGE_SECONDS is not None:
+            # Reuse needs the raw listings persisted, so they cannot be streamed.
+            raw_open_prs, open_issues = list(list_json("pr")), list(list_json("issue"))
+        else:
+            raw_open_prs = list_json("pr")
+            open_issues = None
+        if reused_tables is None and TASK1_SNAPSHOT_MAX_AGE_SECONDS is not None and "entityTables" not in sync_state:
+            sync_state["entityTables"] = build_entity_tables(raw_open_prs, open_issues)
+        if reused_tables is None and sync_state.get("syncMode") != "event":
+            sync_state["lastFetchAt"] = now_ts
+        # Normalize PRs as pages stream in so raw payloads (bodies) are not retained.
+        open_prs = [normalize_pr(pr, now_ts) for pr in raw_open_prs]
+    open_pr_numbers = {pr.get("number") for pr in open_prs if isinstance(pr.get("number"), int)}
+    # After sustained empty-queue runs, or when the shared rate-limit budget runs low, skip per-issue
+    # PR lookups and classify using the in-memory open PR set.
+    rate_limit_low = _RATE_BUDGET.is_low(TASK1_RATE_LIMIT_LOW_WATERMARK)
+    use_lightweight_query = rate_limit_low or (
+        len(open_pr_numbers) == 0 and prior_idle_streak >= TASK1_IDLE_LIGHTWEIGHT_STREAK_THRESHOLD
+    )
 
-    raw_open_prs = list_json("pr")
-    open_pr_numbers = {pr.get("number") for pr in raw_open_prs if isinstance(pr.get("number"), int)}
-    # After sustained empty-queue runs, skip per-issue PR lookups and classify using in-memory open PR set.
-    use_lightweight_query = len(open_pr_numbers) == 0 and prior_idle_streak >= TASK1_IDLE_LIGHTWEIGHT_STREAK_THRESHOLD
-
-    open_issues = list_json("issue")
-    if use_lightweight_query:
-        actionable_open_with_reason, _, _ = classify_with_source_pr(
-            open_issues,
+    if open_issues is None:
+        open_issues = list_json("issue")
+    # Project right after fetch so issue bodies never reach the snapshot or the state file.
+    open_issues = map(project_issue, open_issues)
+    seed_source_pr_cache(state_cache, source_pr_index, open_pr_numbers, now_ts)
+    seeded_source_prs = set(state_cache)
+    # Used only for lookups that stay rate limited: the last indexed state, however old.
+    fallback_source_states = {
+        pr_num: str(entry.get("state")).upper()
+        for pr_num, entry in source_pr_index.items()
+        if str(entry.get("state") or "").upper() in KNOWN_PR_STATES
+    }
+    # Streamed issue pages are fetched lazily here, so this phase includes the issue listing.
+    with timed_phase(timings, "classifyIssues"):
+        actionable_open_with_reason, nbs_issues, unbound_nbs, referenced_source_prs = scan_issue_pages(
+            iter_chunks(open_issues, TASK1_GRAPHQL_PAGE_SIZE),
             state_cache,
-            open_pr_numbers=open_pr_numbers,
-            allow_pr_state_lookup=False,
+            open_pr_numbers=open_pr_numbers if use_lightweight_query else None,
+            fallback_states={**fallback_source_states, **{pr_num: "OPEN" for pr_num in open_pr_numbers}},
         )
-    else:
-        actionable_open_with_reason, _, _ = classify_with_source_pr(open_issues, state_cache)
     open_actionable_issues = [item["issue"] for item in actionable_open_with_reason]
-    nbs_issues = [issue for issue in open_issues if has_label(issue, "nbs")]
-    unbound_nbs = [item for item in actionable_open_with_reason if has_label(item["issue"], "nbs")]
+    source_pr_lookups = len(referenced_source_prs & (set(state_cache) - seeded_source_prs))
 
-    open_prs = [normalize_pr(pr, now_ts) for pr in raw_open_prs]
     open_prs, pr_state, new_open_prs, sha_changed_prs, approved_but_unmerged, _stable_terminal_candidates = build_pr_runtime_state(
-        open_prs, prior_pr_state, now_ts
+        open_prs, prior_pr_state, now_ts, fresh_fetch=reused_tables is None, events=pr_events, event_log=prior_event_log
     )
     change_requests = [pr for pr in open_prs if pr.get("reviewDecision") == "CHANGES_REQUESTED"]
     stale_open_prs_all = [
         pr for pr in open_prs if (pr.get("unchangedHours") is not None and pr.get("unchangedHours", 0) >= STALE_OPEN_PR_HOURS)
     ]
     stale_open_prs, stale_open_prs_digest, owner_ping_candidates, stable_terminal_prs = split_stale_open_prs(stale_open_prs_all)
-    test_files_count = count_test_files()
-    docs_superseded_count = read_docs_superseded_count()
+    with timed_phase(timings, "countTestFiles"):
+        test_files_count = count_test_files()
+    with timed_phase(timings, "readDocsSuperseded"):
+        docs_superseded_count = read_docs_superseded_count()
 
     pr208 = next((pr for pr in open_prs if pr.get("number") == 208), None)
     pr208_unchanged_hours = pr208.get("unchangedHours") if pr208 else None
@@ -690,6 +1760,9 @@ def analyze(state: dict | None = None) -> dict:
     elif approved_but_unmerged_reminder:
         signals.append("approved_but_unmerged_reminder")
 
+    if rate_limit_low:
+        signals.append("rate_limit_budget_low")
+
     oldest_unchanged_hours = max((pr.get("unchangedHours", 0) for pr in stale_open_prs), default=0)
     snapshot: dict = {
         "open": open_actionable_issues,
@@ -711,6 +1784,9 @@ def analyze(state: dict | None = None) -> dict:
         "stableTerminalPrs": stable_terminal_prs,
         "signals": signals,
         "prState": pr_state,
+        "prEvents": pr_events,
+        "prEventLog": (prior_event_log + pr_events)[-TASK1_PR_EVENT_LOG_MAX_EVENTS:],
+        "sourcePrState": update_source_pr_index(source_pr_index, state_cache, referenced_source_prs, open_pr_numbers, now_ts),
         "metrics": {
             "candidateIssues": len(actionable_open_with_reason),
             "openPrCount": len(open_prs),
@@ -724,6 +1800,8 @@ def analyze(state: dict | None = None) -> dict:
             "approvedButUnmergedCount": len(approved_but_unmerged),
             "approvedButUnmergedMaxHours": approved_but_unmerged_max_hours,
             "pr208UnchangedHours": pr208_unchanged_hours,
+            "sourcePrLookups": source_pr_lookups,
+            "prEventCount": len(pr_events),
             "testFiles": test_files_count,
             "docsSuperseded": docs_superseded_count,
         },
@@ -747,58 +1825,634 @@ def analyze(state: dict | None = None) -> dict:
         "changeDetectionSource": "ci",
         "changeDetectionSources": ["ci"],
         "queryMode": "lightweight" if use_lightweight_query else "standard",
+        "fetchMode": TASK1_FETCH_MODE,
         "ts": now_ts,
         "runAt": iso_utc(now_ts),
         "nextActionAt": iso_utc(now_ts + CHECK_INTERVAL_MINUTES * 60),
     }
 
+    snapshot.update(sync_state)
+    if reused_tables is not None:
+        snapshot["dataSource"] = "reused-fetch"
+        snapshot["reusedFetchAt"] = iso_utc(int(state["lastFetchAt"]))
+    rate_budget = _RATE_BUDGET.snapshot()
+    if rate_budget["resources"] or rate_budget["throttled"]:
+        snapshot["rateLimit"] = rate_budget
+        for resource in ("core", "graphql"):
+            remaining = rate_budget["resources"].get(resource, {}).get("remaining")
+            if remaining is not None:
+                snapshot["metrics"][f"rateLimitRemaining{resource.capitalize()}"] = remaining
     apply_idle_queue_state(snapshot, state)
     next_interval, polling_mode = compute_next_action_interval(snapshot)
-    snapshot["nextActionAt"] = iso_utc(now_ts + next_interval * 60)
     snapshot["pollingMode"] = polling_mode
     snapshot["pollingIntervalMinutes"] = next_interval
+    schedule_next_action(snapshot, now_ts)
     return snapshot
 
 
+class StateLockTimeout(RuntimeError):
+    pass
+
+
+class StateLockHeld(StateLockTimeout):
+    """The state lock belongs to a long-running (daemon/webhook) process, so waiting is pointless."""
+
+
+class StateSession:
+    """One invocation's view of the monitor state.
+
+    Entering the session takes an exclusive `fcntl` lock next to STATE_FILE (so overlapping cron
+    runs serialize instead of clobbering each other) and loads the state once. Saves made through
+    the session only update `state` in memory; `flush` (called on a clean exit) writes it once.
+
+    The lock holder records its pid and mode in the lock file. A session that finds the lock held by
+    a live daemon/webhook process raises `StateLockHeld` right away rather than waiting out
+    `lock_timeout` for a release that will not come.
+
+    A flush can only be timed after the run it belongs to was recorded, so timings still pending when
+    the session exits are kept in a small sidecar file and picked up by the next session, which is
+    how one-shot cron runs report the previous run's `saveState`/`stateFlush`.
+    """
+
+    def __init__(self, lock_timeout: float | None = None, mode: str = "scan") -> None:
+        self.lock_path = f"{STATE_FILE}.lock"
+        self.mode = mode
+        self.io_timings_path = f"{STATE_FILE}.io-timings.json"
+        self.lock_timeout = TASK1_STATE_LOCK_TIMEOUT_SECONDS if lock_timeout is None else lock_timeout
+        self.state: dict = {}
+        self.dirty = False
+        # State load/flush durations not yet attributed to a run (see `take_io_timings`).
+        self.io_timings: Dict[str, float] = {}
+        self._lock_fd: int | None = None
+
+    def __enter__(self) -> "StateSession":
+        os.makedirs(os.path.dirname(self.lock_path) or ".", exist_ok=True)
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = time.monotonic() + self.lock_timeout
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                holder = read_lock_holder(fd)
+                if holder is not None and holder.get("mode") in LONG_RUNNING_MODES:
+                    os.close(fd)
+                    raise StateLockHeld(f"state lock {self.lock_path} is held by {holder['mode']} process {holder['pid']}")
+                if time.monotonic() >= deadline:
+                    os.close(fd)
+                    raise StateLockTimeout(f"state lock {self.lock_path} still held after {self.lock_timeout:g}s")
+                time.sleep(0.1)
+        self._lock_fd = fd
+        os.ftruncate(fd, 0)
+        os.pwrite(fd, json.dumps({"pid": os.getpid(), "mode": self.mode}).encode("utf-8"), 0)
+        self.io_timings.update(self._take_pending_io_timings())
+        started = time.perf_counter()
+        self.state = load_state()
+        self.io_timings["stateLoad"] = round(time.perf_counter() - started, 4)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            if exc_type is None:
+                self.flush()
+                self._keep_pending_io_timings()
+        finally:
+            if self._lock_fd is not None:
+                os.ftruncate(self._lock_fd, 0)
+                fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+                os.close(self._lock_fd)
+                self._lock_fd = None
+
+    def flush(self) -> None:
+        if self.dirty:
+            started = time.perf_counter()
+            if TASK1_STATE_BACKEND == "sqlite":
+                # Runs and metadata reach the database as they are saved; only keys patched in place
+                # (webhook deliveries) are pending here. STATE_FILE stays the untouched import source.
+                get_state_db().set_metadata({key: self.state[key] for key in WEBHOOK_PATCHED_STATE_KEYS if key in self.state})
+                mark_state_written()
+            else:
+                write_state(self.state)
+            self.io_timings["stateFlush"] = round(time.perf_counter() - started, 4)
+            self.dirty = False
+
+    def take_io_timings(self) -> Dict[str, float]:
+        """Return and reset pending I/O timings; a run can only report the flush of an earlier run."""
+        timings, self.io_timings = self.io_timings, {}
+        return timings
+
+    def _take_pending_io_timings(self) -> Dict[str, float]:
+        try:
+            with open(self.io_timings_path, "r", encoding="utf-8") as f:
+                pending = json.load(f)
+            os.unlink(self.io_timings_path)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(pending, dict):
+            return {}
+        return {name: seconds for name, seconds in pending.items() if isinstance(seconds, (int, float))}
+
+    def _keep_pending_io_timings(self) -> None:
+        if not self.io_timings:
+            return
+        try:
+            with open(self.io_timings_path, "w", encoding="utf-8") as f:
+                json.dump(self.io_timings, f)
+        except OSError as exc:
+            print(f"failed to keep state I/O timings: {exc}", file=sys.stderr)
+
+
+def read_lock_holder(fd: int) -> dict | None:
+    """Return the `{"pid", "mode"}` record of a live lock holder, or None when unknown or gone."""
+    try:
+        holder = json.loads(os.pread(fd, 256, 0) or b"null")
+    except (OSError, ValueError):
+        return None
+    if not isinstance(holder, dict) or not isinstance(holder.get("pid"), int):
+        return None
+    try:
+        os.kill(holder["pid"], 0)
+    except ProcessLookupError:
+        # Left behind by a holder that died without cleaning up; the kernel already dropped its lock.
+        return None
+    except PermissionError:
+        pass
+    return holder
+
+
+def state_dict(state: dict | StateSession | None) -> dict:
+    if isinstance(state, StateSession):
+        return state.state
+    return state if state is not None else load_state()
+
+
 def load_state() -> dict:
+    if TASK1_STATE_BACKEND == "sqlite":
+        return get_state_db().load_state()
+    return load_json_state()
+
+
+def load_json_state() -> dict:
     try:
         with open(STATE_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
+            return rehydrate_state(json.load(f))
     except FileNotFoundError:
         return {"runs": []}
 
 
-def write_state(payload: dict) -> None:
-    with open(STATE_FILE, "w", encoding="utf-8") as f:
-        json.dump(payload, f, indent=2)
+def _intern_entity(item: object, entities: Dict[str, dict], refs: Dict[int, str]) -> object:
+    if not isinstance(item, dict):
+        return item
+    if not isinstance(item.get("number"), int):
+        nested = item.get("issue")
+        if isinstance(nested, dict) and isinstance(nested.get("number"), int):
+            return {**item, "issue": _intern_entity(nested, entities, refs)}
+        return item
+    volatile = {key: item[key] for key in VOLATILE_ENTITY_FIELDS if key in item}
+    # Rehydrated runs share entity objects, so identity short-circuits re-hashing them.
+    ref = refs.get(id(item))
+    if ref is None:
+        stable = {key: value for key, value in item.items() if key not in volatile} if volatile else item
+        digest = hashlib.sha256(json.dumps(stable, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()[:16]
+        ref = f"{item['number']}@{digest}"
+        refs[id(item)] = ref
+        entities.setdefault(ref, stable)
+    return {"entity": ref, **volatile} if volatile else ref
+
+
+def _rehydrate_entity(item: object, entities: Dict[str, dict]) -> object:
+    if isinstance(item, str) and ENTITY_REF_RE.match(item):
+        return entities.get(item, item)
+    if isinstance(item, dict) and isinstance(item.get("entity"), str) and item["entity"] in entities:
+        return {**entities[item["entity"]], **{key: value for key, value in item.items() if key != "entity"}}
+    if isinstance(item, dict) and isinstance(item.get("issue"), str):
+        return {**item, "issue": _rehydrate_entity(item["issue"], entities)}
+    return item
+
+
+def intern_run(run: dict, entities: Dict[str, dict], refs: Dict[int, str]) -> dict:
+    interned = dict(run)
+    for key in INTERNED_SNAPSHOT_LIST_KEYS:
+        if isinstance(run.get(key), list):
+            interned[key] = [_intern_entity(item, entities, refs) for item in run[key]]
+    return interned
+
+
+def rehydrate_run(run: dict, entities: Dict[str, dict]) -> dict:
+    if not entities:
+        return run
+    rehydrated = dict(run)
+    for key in INTERNED_SNAPSHOT_LIST_KEYS:
+        if isinstance(run.get(key), list):
+            rehydrated[key] = [_rehydrate_entity(item, entities) for item in run[key]]
+    return rehydrated
+
+
+def diff_run(previous: dict, current: dict) -> List[list]:
+    """JSON-patch style delta: `[path, value]` sets and `[path]` removals, recursing into dicts only."""
+    ops: List[list] = []
+
+    def walk(path: List[str], before: dict, after: dict) -> None:
+        for key in before:
+            if key not in after:
+                ops.append([path + [key]])
+        for key, value in after.items():
+            if key not in before:
+                ops.append([path + [key], value])
+            elif before[key] != value:
+                if isinstance(before[key], dict) and isinstance(value, dict):
+                    walk(path + [key], before[key], value)
+                else:
+                    ops.append([path + [key], value])
+
+    walk([], previous, current)
+    return ops
+
+
+def apply_run_delta(base: dict, ops: List[list]) -> dict:
+    run = dict(base)
+    for op in ops:
+        path = op[0]
+        node = run
+        for key in path[:-1]:
+            child = dict(node.get(key) or {})
+            node[key] = child
+            node = child
+        if len(op) == 1:
+            node.pop(path[-1], None)
+        else:
+            node[path[-1]] = op[1]
+    return run
+
 
+def _collect_entity_refs(value: object, refs: Set[str]) -> None:
+    if isinstance(value, str):
+        if ENTITY_REF_RE.match(value):
+            refs.add(value)
+    elif isinstance(value, list):
+        for item in value:
+            _collect_entity_refs(item, refs)
+    elif isinstance(value, dict):
+        for item in value.values():
+            _collect_entity_refs(item, refs)
 
-def save_state(snapshot: dict, metadata: dict | None = None) -> None:
-    payload = load_state()
-    runs = payload.get("runs", [])
-    runs.append(snapshot)
-    # keep last 300 entries as a bounded buffer (~24h for 20m cadence)
-    payload["runs"] = runs[-300:]
-    payload["latestRun"] = snapshot
-    if metadata:
-        payload.update(metadata)
-    write_state(payload)
 
+class RunHistory(Sequence):
+    """Run list backed by keyframes and per-run deltas, decoded only when a run is accessed.
 
-def save_metadata(metadata: dict) -> None:
-    payload = load_state()
+    Entries loaded from disk stay encoded (`{"ts", "keyframe"}` or `{"ts", "delta"}`) until
+    indexed; appended runs are held as-is (`{"ts", "run"}`) and encoded by `encode`.
+    Entries are ordered by `ts`, so `since` bisects straight to a report window.
+    """
+
+    def __init__(self, entries: List[dict] | None = None, entities: Dict[str, dict] | None = None) -> None:
+        self.entries: List[dict] = list(entries or [])
+        self.entities: Dict[str, dict] = dict(entities or {})
+        self._interned: Dict[int, dict] = {}
+
+    @classmethod
+    def from_runs(cls, runs: Iterable[dict]) -> "RunHistory":
+        return cls([{"ts": run.get("ts", 0), "run": run} for run in runs if isinstance(run, dict)])
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        entry = self.entries[index]
+        if "run" in entry:
+            return entry["run"]
+        return rehydrate_run(self._decode_interned(index), self.entities)
+
+    def __iter__(self) -> Iterator[dict]:
+        return (self[i] for i in range(len(self)))
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (list, RunHistory)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def _decode_interned(self, index: int) -> dict:
+        start = index
+        while start not in self._interned and "delta" in self.entries[start] and start > 0:
+            start -= 1
+        if start in self._interned:
+            run = self._interned[start]
+        else:
+            entry = self.entries[start]
+            run = entry.get("keyframe") or apply_run_delta({}, entry.get("delta", []))
+        for i in range(start + 1, index + 1):
+            run = apply_run_delta(run, self.entries[i]["delta"])
+        self._interned[index] = run
+        return run
+
+    def append(self, run: dict) -> None:
+        self.entries.append({"ts": run.get("ts", 0), "run": run})
+
+    def since(self, cutoff_ts: int) -> List[dict]:
+        start = bisect.bisect_left([entry.get("ts", 0) for entry in self.entries], cutoff_ts)
+        return self[start:]
+
+    def encode(self, max_runs: int | None = None, max_bytes: int | None = None, keyframe_interval: int | None = None) -> dict:
+        """Encode pending runs in place, trim at a keyframe and return the disk form.
+
+        Trimming keeps at least `max_runs` runs, then drops further whole keyframe groups while
+        the encoded entries exceed `max_bytes` (the newest group is always kept).
+        """
+        interval = keyframe_interval or TASK1_RUN_KEYFRAME_INTERVAL
+        refs: Dict[int, str] = {}
+        since_keyframe = 0
+        for index, entry in enumerate(self.entries):
+            if "run" in entry:
+                interned = intern_run(entry["run"], self.entities, refs)
+                if index == 0 or since_keyframe + 1 >= interval:
+                    encoded = {"ts": entry["ts"], "keyframe": interned}
+                else:
+                    previous = self._decode_interned(index - 1)
+                    encoded = {"ts": entry["ts"], "delta": diff_run(previous, interned)}
+                self.entries[index] = encoded
+                self._interned[index] = interned
+            if "bytes" not in self.entries[index]:
+                self.entries[index]["bytes"] = len(json.dumps(self.entries[index], separators=(",", ":")))
+            since_keyframe = 0 if "keyframe" in self.entries[index] else since_keyframe + 1
+
+        cut = 0
+        if max_runs is not None and len(self.entries) > max_runs:
+            # Cut at the last keyframe that still leaves at least `max_runs` runs.
+            cut = len(self.entries) - max_runs
+            while cut > 0 and "keyframe" not in self.entries[cut]:
+                cut -= 1
+        if max_bytes is not None:
+            retained_bytes = sum(entry["bytes"] for entry in self.entries[cut:])
+            keyframes = [i for i, entry in enumerate(self.entries) if i > cut and "keyframe" in entry]
+            for next_cut in keyframes:
+                if retained_bytes <= max_bytes:
+                    break
+                retained_bytes -= sum(entry["bytes"] for entry in self.entries[cut:next_cut])
+                cut = next_cut
+        if cut:
+            self.entries = self.entries[cut:]
+            self._interned = {i - cut: run for i, run in self._interned.items() if i >= cut}
+
+        referenced: Set[str] = set()
+        _collect_entity_refs(self.entries, referenced)
+        self.entities = {ref: entity for ref, entity in self.entities.items() if ref in referenced}
+        return {"version": 1, "entries": self.entries}
+
+
+def runs_since(runs: Sequence[dict], cutoff_ts: int) -> List[dict]:
+    if isinstance(runs, RunHistory):
+        return runs.since(cutoff_ts)
+    return [r for r in runs if r.get("ts", 0) >= cutoff_ts]
+
+
+def intern_state(payload: dict) -> dict:
+    """Return the on-disk form of `payload`.
+
+    Runs become a keyframe/delta `runHistory`, and every issue/PR dict is replaced by a reference
+    into the shared `snapshotEntities` table.
+    """
+    stored = dict(payload)
+    runs = payload.get("runs")
+    if isinstance(runs, list):
+        runs = RunHistory.from_runs(runs[-MAX_STATE_RUNS:])
+    if isinstance(runs, RunHistory):
+        stored.pop("runs")
+        stored["runHistory"] = runs.encode(max_runs=MAX_STATE_RUNS, max_bytes=TASK1_RUN_HISTORY_MAX_BYTES)
+        entities = runs.entities
+    else:
+        entities = {}
+    if isinstance(payload.get("latestRun"), dict):
+        stored["latestRun"] = intern_run(payload["latestRun"], entities, {})
+    stored["snapshotEntities"] = entities
+    return stored
+
+
+def rehydrate_state(stored: dict) -> dict:
+    """Inverse of `intern_state`; state files with a plain `runs` list pass through unchanged."""
+    payload = dict(stored)
+    entities = payload.pop("snapshotEntities", None)
+    if not isinstance(entities, dict):
+        entities = {}
+    history = payload.pop("runHistory", None)
+    if isinstance(history, dict):
+        payload["runs"] = RunHistory(history.get("entries"), entities)
+    elif isinstance(payload.get("runs"), list) and entities:
+        payload["runs"] = [rehydrate_run(run, entities) if isinstance(run, dict) else run for run in payload["runs"]]
+    if isinstance(payload.get("latestRun"), dict):
+        payload["latestRun"] = rehydrate_run(payload["latestRun"], entities)
+    return payload
+
+
+def mark_state_written() -> None:
+    global _STATE_GENERATION
+    _STATE_GENERATION += 1
+
+
+def state_version() -> tuple:
+    """Cheap fingerprint of the persisted state: in-process write generation plus file identity."""
+    paths = [TASK1_STATE_DB_FILE, f"{TASK1_STATE_DB_FILE}-wal"] if TASK1_STATE_BACKEND == "sqlite" else [STATE_FILE]
+    stats = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            stats.append(None)
+            continue
+        # `write_state` renames a new file into place, so the inode changes even within one mtime tick.
+        stats.append((st.st_ino, st.st_mtime_ns, st.st_size))
+    return (_STATE_GENERATION, tuple(stats))
+
+
+def write_state(payload: dict) -> None:
+    # Write-then-rename so a crash (or a daemon killed mid-flush) never leaves a truncated state file.
+    state_dir = os.path.dirname(STATE_FILE) or "."
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{os.path.basename(STATE_FILE)}.", dir=state_dir)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(intern_state(payload), f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, STATE_FILE)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+    mark_state_written()
+
+
+def persisted_run(snapshot: dict) -> dict:
+    return {key: value for key, value in snapshot.items() if key not in STATE_ONLY_SNAPSHOT_KEYS}
+
+
+def state_only_metadata(snapshot: dict) -> dict:
+    return {key: snapshot[key] for key in STATE_ONLY_SNAPSHOT_KEYS if key in snapshot}
+
+
+# Report totals kept per rollup bucket: (summary key, count key, fallback count keys).
+ROLLUP_COUNTERS = (
+    ("totalOpen", "open", ("assigned",)),
+    ("totalNbs", "nbs", ()),
+    ("totalUnboundNbs", "nbsUnbound", ()),
+    ("totalChangeRequests", "changeRequests", ()),
+    ("totalStaleOpenPrs", "staleOpenPrs", ()),
+    ("totalStableTerminalPrs", "stableTerminalPrs", ()),
+    ("totalStaleOpenPrDigest", "staleOpenPrsDigest", ()),
+    ("totalOwnerPingCandidates", "ownerPingCandidates", ()),
+    ("totalNewOpenPrs", "newOpenPrs", ()),
+    ("totalApprovedButUnmerged", "approvedButUnmerged", ()),
+)
+ROLLUP_TIERS = (("hourly", 3600), ("daily", 86400))
+
+
+def run_rollup_values(run: dict) -> Dict[str, int]:
+    values = {name: count_metric(run, key, *fallback_keys) for name, key, fallback_keys in ROLLUP_COUNTERS}
+    values["totalSignals"] = len(run.get("signals", []))
+    return values
+
+
+def update_rollups(rollups: object, run: dict) -> dict:
+    """Fold `run` into its hourly and daily buckets, then trim each tier to its byte budget."""
+    rollups = rollups if isinstance(rollups, dict) else {}
+    ts = int(run.get("ts", 0))
+    values = run_rollup_values(run)
+    for tier, width in ROLLUP_TIERS:
+        buckets = rollups.setdefault(tier, [])
+        start = ts - ts % width
+        if not buckets or buckets[-1].get("start") != start:
+            buckets.append({"start": start, "runs": 0, "totals": {}, "max": {}, "last": {}})
+        bucket = buckets[-1]
+        bucket["runs"] += 1
+        for name, value in values.items():
+            bucket["totals"][name] = bucket["totals"].get(name, 0) + value
+            bucket["max"][name] = max(bucket["max"].get(name, 0), value)
+        bucket["last"] = {
+            "ts": ts,
+            "testFiles": metric_value(run, "testFiles"),
+            "docsSuperseded": metric_value(run, "docsSuperseded"),
+            "idleStreak": run.get("idleStreak"),
+            "queryMode": run.get("queryMode"),
+        }
+        budget = TASK1_HOURLY_ROLLUP_MAX_BYTES if tier == "hourly" else TASK1_DAILY_ROLLUP_MAX_BYTES
+        # Buckets are near-uniform in size, so the newest one prices the whole tier.
+        max_buckets = max(1, budget // len(json.dumps(bucket, separators=(",", ":"))))
+        del buckets[:-max_buckets]
+    return rollups
+
+
+def rollup_window(
+    rollups: object, cutoff_ts: int, raw_runs: Sequence[dict] = (), raw_from_ts: int | None = None
+) -> Tuple[int, Dict[str, int], Dict[str, int]]:
+    """Aggregate the window starting at `cutoff_ts` from raw runs plus rollups for the older part.
+
+    `raw_runs` are the retained runs inside the window; raw history covers everything from
+    `raw_from_ts` (the oldest retained run). Tiers are combined finest first: hourly buckets cover
+    what the raw runs do not, daily buckets what neither covers. A bucket straddling the start of
+    a finer tier's coverage is included minus what that tier already counted inside it; the bucket
+    containing `cutoff_ts` is included whole. Returns (runs, totals, rollup buckets used per tier).
+    """
+    rollups = rollups if isinstance(rollups, dict) else {}
+    counted: List[Tuple[int, int, Dict[str, int]]] = [
+        (int(run.get("ts", 0)), 1, run_rollup_values(run)) for run in raw_runs
+    ]
+    covered_from = math.inf if raw_from_ts is None else raw_from_ts
+    bucket_counts = {tier: 0 for tier, _ in ROLLUP_TIERS}
+    for tier, width in ROLLUP_TIERS:
+        if covered_from <= cutoff_ts:
+            break
+        buckets = [bucket for bucket in rollups.get(tier, []) if isinstance(bucket, dict)]
+        added: List[Tuple[int, int, Dict[str, int]]] = []
+        for bucket in buckets:
+            start = int(bucket.get("start", 0))
+            end = start + width
+            if start >= covered_from or end <= cutoff_ts:
+                continue
+            runs = int(bucket.get("runs", 0))
+            totals = dict(bucket.get("totals") or {})
+            if end > covered_from:
+                for ts, finer_runs, values in counted:
+                    if start <= ts < end:
+                        runs -= finer_runs
+                        for name, value in values.items():
+                            totals[name] = totals.get(name, 0) - value
+                # Runs recorded before rollups existed are in the finer tier but not in the bucket.
+                runs = max(0, runs)
+                totals = {name: max(0, value) for name, value in totals.items()}
+            if runs:
+                added.append((start, runs, totals))
+        if buckets:
+            covered_from = min(covered_from, int(buckets[0].get("start", 0)))
+        counted.extend(added)
+        bucket_counts[tier] = len(added)
+
+    totals: Dict[str, int] = {}
+    for _, _, values in counted:
+        for name, value in values.items():
+            totals[name] = totals.get(name, 0) + value
+    return sum(runs for _, runs, _ in counted), totals, bucket_counts
+
+
+def save_state(snapshot: dict, metadata: dict | None = None, state: dict | StateSession | None = None) -> None:
+    """Append `snapshot` to the run history and persist it.
+
+    A `StateSession` is updated in memory and written once when the session flushes; a plain dict
+    is updated in place and written immediately; with neither, the state file is re-read.
+    """
+    run = persisted_run(snapshot)
+    payload = state_dict(state)
+    updates = {**state_only_metadata(snapshot), **(metadata or {}), "rollups": update_rollups(payload.get("rollups"), run)}
+    if TASK1_STATE_BACKEND == "sqlite":
+        get_state_db().append_run(run, updates, max_runs=MAX_STATE_RUNS)
+        mark_state_written()
+        # The database owns the history; the in-memory copy only needs the latest run.
+        payload["runs"] = [run]
+        payload["latestRun"] = run
+        payload.update(updates)
+        return
+
+    runs = payload.get("runs")
+    if not isinstance(runs, RunHistory):
+        # Convert a plain (new or legacy) list once, so each later write only encodes the runs
+        # appended since; RunHistory trims at a keyframe boundary when `write_state` encodes it.
+        runs = RunHistory.from_runs(list(runs or [])[-MAX_STATE_RUNS:])
+    runs.append(run)
+    payload["runs"] = runs
+    payload["latestRun"] = run
+    payload.update(updates)
+    if isinstance(state, StateSession):
+        state.dirty = True
+    else:
+        write_state(payload)
+
+
+def save_metadata(metadata: dict, state: dict | StateSession | None = None) -> None:
+    if TASK1_STATE_BACKEND == "sqlite":
+        get_state_db().set_metadata(metadata)
+        mark_state_written()
+        if state is not None:
+            state_dict(state).update(metadata)
+        return
+    payload = state_dict(state)
     payload.update(metadata)
-    write_state(payload)
+    if isinstance(state, StateSession):
+        state.dirty = True
+    else:
+        write_state(payload)
 
 
-def enrich_snapshot(snapshot: dict, state: dict) -> dict:
+def enrich_snapshot(snapshot: dict, state: dict | StateSession) -> dict:
+    state = state_dict(state)
     change = detect_change(snapshot, state)
     sources = change["sources"]
     snapshot["changeDetectionSources"] = sources
     snapshot["changeDetectionSource"] = primary_change_source(sources)
     snapshot["changeDetectionDetails"] = change["details"]
-    poll_interval = int(snapshot.get("pollingIntervalMinutes") or CHECK_INTERVAL_MINUTES)
-    snapshot["nextActionAt"] = iso_utc(int(time.time()) + poll_interval * 60)
+    schedule_next_action(snapshot, int(time.time()))
     snapshot.setdefault("signals", [])
 
     runs = state.get("runs", [])
@@ -862,6 +2516,10 @@ def summarize(snapshot: dict) -> str:
         f"idleDigestMode: {'on' if snapshot.get('idleDigestMode') else 'off'}",
         f"lastNonEmptyRunAt: {snapshot.get('lastNonEmptyRunAt') or 'n/a'}",
     ]
+    if snapshot.get("dataSource") == "stale-source":
+        lines.append(f"dataSource: stale-source (reused run from {snapshot.get('staleSourceRunAt') or 'n/a'})")
+    elif snapshot.get("dataSource") == "reused-fetch":
+        lines.append(f"dataSource: reused-fetch (GitHub data fetched at {snapshot.get('reusedFetchAt') or 'n/a'})")
 
     max_no_update_streak = metric_value(snapshot, "maxNoUpdateStreak")
     if isinstance(max_no_update_streak, int):
@@ -1029,11 +2687,48 @@ def get_previous_snapshot(state: dict) -> dict:
     return runs[-1] if runs else {}
 
 
-def maybe_publish_scan_comments(snapshot: dict, previous_snapshot: dict, change: dict, comment_pr: int | None, digest_issue: int | None) -> None:
+def reusable_snapshot(state: dict, probe: dict | None, now_ts: int) -> dict | None:
+    """Return the latest run re-stamped for `now_ts` when the remote probe shows no change.
+
+    Time-based thresholds are evaluated against the cached PRs: if any of them was crossed since the
+    latest run (or the reuse window expired), None is returned so the caller runs a full scan.
+    """
+    last = get_previous_snapshot(state)
+    last_ts = last.get("ts")
+    if probe is None or probe != state.get("remoteProbe") or not isinstance(last_ts, int):
+        return None
+    if now_ts - last_ts >= TASK1_CHANGE_PROBE_MAX_SKIP_MINUTES * 60:
+        return None
+    if any(last_ts < deadline <= now_ts for deadline, _, _ in pr_threshold_deadlines(last)):
+        return None
+    snapshot = dict(last)
+    snapshot["ts"] = now_ts
+    snapshot["runAt"] = iso_utc(now_ts)
+    snapshot["changeProbe"] = "unchanged"
+    snapshot["prEvents"] = []
+    # The reused run still counts toward the idle streak (and so toward idle digest mode).
+    snapshot["metrics"] = dict(last.get("metrics") or {})
+    apply_idle_queue_state(snapshot, state)
+    schedule_next_action(snapshot, now_ts)
+    return snapshot
+
+
+def maybe_publish_scan_comments(
+    snapshot: dict,
+    previous_snapshot: dict,
+    change: dict,
+    comment_pr: int | None,
+    digest_issue: int | None,
+    comment_cache: Dict[str, dict] | None = None,
+) -> None:
     if not change.get("changed"):
         return
-    maybe_publish_audit_delta_comment(snapshot, previous_snapshot, comment_pr)
-    maybe_publish_digest_comment(snapshot, digest_issue)
+    run_concurrently(
+        [
+            lambda: maybe_publish_audit_delta_comment(snapshot, previous_snapshot, comment_pr, comment_cache),
+            lambda: maybe_publish_digest_comment(snapshot, digest_issue, comment_cache),
+        ]
+    )
 
 
 def build_audit_delta_comment(pr_number: int, snapshot: dict, previous_snapshot: dict | None) -> str:
@@ -1096,6 +2791,9 @@ def build_low_priority_digest_comment(snapshot: dict) -> str:
 
 
 def list_issue_comments(issue_number: int) -> List[dict]:
+    if TASK1_GITHUB_BACKEND == "http":
+        pages = get_http_client().paginate(f"/repos/{REPO}/issues/{issue_number}/comments?per_page=100")
+        return [comment for comment in pages if isinstance(comment, dict)]
     raw = run_gh(["api", "--paginate", "--slurp", f"repos/{REPO}/issues/{issue_number}/comments?per_page=100"])
     pages = json.loads(raw or "[]")
     comments: List[dict] = []
@@ -1108,35 +2806,97 @@ def list_issue_comments(issue_number: int) -> List[dict]:
     return comments
 
 
-def upsert_issue_comment(issue_number: int, marker: str, body: str) -> None:
-    comments = list_issue_comments(issue_number)
-    existing_comment_id = None
-    for comment in comments:
+def find_marker_comment_id(issue_number: int, marker: str) -> int | None:
+    for comment in list_issue_comments(issue_number):
         if marker in (comment.get("body") or ""):
-            existing_comment_id = comment.get("id")
-            break
+            return comment.get("id")
+    return None
+
+
+def update_issue_comment(comment_id: int, body: str) -> None:
+    if TASK1_GITHUB_BACKEND == "http":
+        get_http_client().request_json("PATCH", f"/repos/{REPO}/issues/comments/{comment_id}", {"body": body})
+        return
+    run_gh(["api", "-X", "PATCH", f"repos/{REPO}/issues/comments/{comment_id}", "-f", f"body={body}"])
+
+
+def create_issue_comment(issue_number: int, body: str) -> int | None:
+    if TASK1_GITHUB_BACKEND == "http":
+        created = get_http_client().request_json("POST", f"/repos/{REPO}/issues/{issue_number}/comments", {"body": body})
+    else:
+        created = json.loads(run_gh(["api", f"repos/{REPO}/issues/{issue_number}/comments", "-f", f"body={body}"]) or "{}")
+    return created.get("id") if isinstance(created, dict) else None
 
-    if existing_comment_id:
-        run_gh(["api", "-X", "PATCH", f"repos/{REPO}/issues/comments/{existing_comment_id}", "-f", f"body={body}"])
+
+def is_not_found_error(exc: Exception) -> bool:
+    if isinstance(exc, GitHubHttpError):
+        return exc.status == 404
+    if isinstance(exc, subprocess.CalledProcessError):
+        return "HTTP 404" in str(exc.stderr or "")
+    return False
+
+
+# Parts of a comment body that change on every run without the audited data changing: the run
+# timestamp in the header, the next scheduled action and elapsed-time readings on PR lines.
+VOLATILE_COMMENT_PARTS_RE = re.compile(
+    r" at (?:\d{4}-\d\d-\d\dT\d\d:\d\d:\d\dZ|n/a)$|^nextActionAt: .*$| unchangedHours=\d+(?:\.\d+)?", re.MULTILINE
+)
+
+
+def comment_body_hash(body: str) -> str:
+    """Hash of `body` without its per-run volatile parts, so a run with unchanged data sends no PATCH."""
+    return hashlib.sha256(VOLATILE_COMMENT_PARTS_RE.sub("", body).encode("utf-8")).hexdigest()
+
+
+def upsert_issue_comment(issue_number: int, marker: str, body: str, cache: Dict[str, dict] | None = None) -> None:
+    """Create or update the comment carrying `marker` on `issue_number`.
+
+    With a `cache` (persisted as `commentCache`), the comment ID and body hash are remembered per
+    marker: an unchanged body (ignoring run timestamps, see `comment_body_hash`) costs no request, a
+    changed one a single PATCH, and the comment list is only searched when no ID is cached or the
+    cached comment returns 404.
+    """
+    key = f"{issue_number}:{marker}"
+    body_hash = comment_body_hash(body)
+    cached = (cache or {}).get(key) or {}
+    comment_id = cached.get("id")
+    if comment_id and cached.get("bodyHash") == body_hash:
         return
 
-    run_gh(["api", f"repos/{REPO}/issues/{issue_number}/comments", "-f", f"body={body}"])
+    if comment_id:
+        try:
+            update_issue_comment(comment_id, body)
+        except (subprocess.CalledProcessError, GitHubHttpError) as exc:
+            if not is_not_found_error(exc):
+                raise
+            comment_id = None
+    if not comment_id:
+        comment_id = find_marker_comment_id(issue_number, marker)
+        if comment_id:
+            update_issue_comment(comment_id, body)
+        else:
+            comment_id = create_issue_comment(issue_number, body)
+
+    if cache is not None and comment_id:
+        cache[key] = {"id": comment_id, "bodyHash": body_hash}
 
 
-def maybe_publish_audit_delta_comment(snapshot: dict, previous_snapshot: dict | None, comment_pr: int | None) -> None:
+def maybe_publish_audit_delta_comment(
+    snapshot: dict, previous_snapshot: dict | None, comment_pr: int | None, comment_cache: Dict[str, dict] | None = None
+) -> None:
     if not comment_pr:
         return
     body = build_audit_delta_comment(comment_pr, snapshot, previous_snapshot)
-    upsert_issue_comment(comment_pr, AUDIT_DELTA_MARKER, body)
+    upsert_issue_comment(comment_pr, AUDIT_DELTA_MARKER, body, cache=comment_cache)
 
 
-def maybe_publish_digest_comment(snapshot: dict, digest_issue: int | None) -> None:
+def maybe_publish_digest_comment(snapshot: dict, digest_issue: int | None, comment_cache: Dict[str, dict] | None = None) -> None:
     if not digest_issue:
         return
     if count_metric(snapshot, "stableTerminalPrs") == 0 and count_metric(snapshot, "staleOpenPrsDigest") == 0:
         return
     body = build_low_priority_digest_comment(snapshot)
-    upsert_issue_comment(digest_issue, DIGEST_MARKER, body)
+    upsert_issue_comment(digest_issue, DIGEST_MARKER, body, cache=comment_cache)
 
 
 def changed_since_last(snapshot: dict, state: dict) -> bool:
@@ -1153,29 +2913,65 @@ def has_actionable(snapshot: dict) -> bool:
     )
 
 
-def run_report(hours: int = 1) -> str:
-    state = load_state()
-    runs = state.get("runs", [])
-    if not runs:
-        return "No task-1 runs recorded yet."
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def format_phase_timings(runs: Iterable[dict]) -> List[str]:
+    """Report lines with p50/p95 wall time and GitHub calls per scan phase over `runs`."""
+    samples: Dict[str, Dict[str, List[float]]] = {}
+    for run in runs:
+        timings = metric_value(run, "timings")
+        if not isinstance(timings, dict):
+            continue
+        for phase, entry in timings.items():
+            if isinstance(entry, dict) and isinstance(entry.get("seconds"), (int, float)):
+                bucket = samples.setdefault(phase, {"seconds": [], "calls": []})
+                bucket["seconds"].append(float(entry["seconds"]))
+                bucket["calls"].append(float(entry.get("calls") or 0))
+    if not samples:
+        return []
+    run_count = max(len(bucket["seconds"]) for bucket in samples.values())
+    lines = [f"Scan phase timings (p50/p95 over {run_count} runs):"]
+    # Slowest phases first, with the end-to-end total on top.
+    for phase in sorted(samples, key=lambda name: (name != "total", -percentile(samples[name]["seconds"], 95), name)):
+        seconds = samples[phase]["seconds"]
+        calls = samples[phase]["calls"]
+        lines.append(
+            f"  - {phase}: {percentile(seconds, 50):.2f}s/{percentile(seconds, 95):.2f}s, "
+            f"GitHub calls {percentile(calls, 50):g}/{percentile(calls, 95):g}"
+        )
+    return lines
+
 
+def run_report(hours: int = 1, state: dict | StateSession | None = None) -> str:
     now = int(time.time())
     cutoff = now - hours * 3600
-    recent = [r for r in runs if r.get("ts", 0) >= cutoff]
+    if TASK1_STATE_BACKEND == "sqlite":
+        db = get_state_db()
+        if db.run_count() == 0:
+            return "No task-1 runs recorded yet."
+        recent = db.runs_since(cutoff)
+        oldest_raw_ts = db.oldest_run_ts()
+        rollups = db.metadata().get("rollups")
+    else:
+        payload = state_dict(state)
+        runs = payload.get("runs", [])
+        if not runs:
+            return "No task-1 runs recorded yet."
+        recent = runs_since(runs, cutoff)
+        oldest_raw_ts = runs.entries[0]["ts"] if isinstance(runs, RunHistory) else runs[0].get("ts", 0)
+        rollups = payload.get("rollups")
+
+    # Raw runs answer the part of the window they cover; rollup buckets fill in anything older.
+    run_count, window_totals, bucket_counts = rollup_window(rollups, cutoff, recent, oldest_raw_ts)
+    totals = {name: 0 for name in run_rollup_values({})}
+    totals.update(window_totals)
 
     summary = {
-        "runs": len(recent),
-        "totalOpen": sum(count_metric(r, "open", "assigned") for r in recent),
-        "totalNbs": sum(count_metric(r, "nbs") for r in recent),
-        "totalUnboundNbs": sum(count_metric(r, "nbsUnbound") for r in recent),
-        "totalChangeRequests": sum(count_metric(r, "changeRequests") for r in recent),
-        "totalStaleOpenPrs": sum(count_metric(r, "staleOpenPrs") for r in recent),
-        "totalStableTerminalPrs": sum(count_metric(r, "stableTerminalPrs") for r in recent),
-        "totalStaleOpenPrDigest": sum(count_metric(r, "staleOpenPrsDigest") for r in recent),
-        "totalOwnerPingCandidates": sum(count_metric(r, "ownerPingCandidates") for r in recent),
-        "totalNewOpenPrs": sum(count_metric(r, "newOpenPrs") for r in recent),
-        "totalApprovedButUnmerged": sum(count_metric(r, "approvedButUnmerged") for r in recent),
-        "totalSignals": sum(len(r.get("signals", [])) for r in recent),
+        "runs": run_count,
+        **totals,
         "lastTestFiles": metric_value(recent[-1], "testFiles") if recent else None,
         "lastDocsSuperseded": metric_value(recent[-1], "docsSuperseded") if recent else None,
         "latestIdleStreak": recent[-1].get("idleStreak") if recent else None,
@@ -1186,7 +2982,7 @@ def run_report(hours: int = 1) -> str:
         "windowTo": iso_utc(now),
     }
 
-    if not recent:
+    if not summary["runs"]:
         return f"No task-1 scans in the last {hours}h."
 
     if (
@@ -1200,6 +2996,11 @@ def run_report(hours: int = 1) -> str:
 
     lines = [
         f"Task-1 report ({hours}h): {summary['runs']} scan runs",
+        *(
+            [f"Aggregated from rollups: {bucket_counts['hourly']} hourly + {bucket_counts['daily']} daily buckets"]
+            if any(bucket_counts.values())
+            else []
+        ),
         f"Total open issues requiring handling: {summary['totalOpen']}",
         f"Total open nbs: {summary['totalNbs']} (unbound/non-open-source PR: {summary['totalUnboundNbs']})",
         f"Total PRs with CHANGES_REQUESTED: {summary['totalChangeRequests']}",
@@ -1221,6 +3022,7 @@ def run_report(hours: int = 1) -> str:
         lines.append(f"Latest lastNonEmptyRunAt: {summary['latestLastNonEmptyRunAt']}")
     if isinstance(summary["latestQueryMode"], str):
         lines.append(f"Latest queryMode: {summary['latestQueryMode']}")
+    lines.extend(format_phase_timings(recent))
     lines.extend(
         [
             "",
@@ -1235,7 +3037,18 @@ def parse_args() -> argparse.Namespace:
     default_comment_pr = parse_positive_int_env("TASK1_AUDIT_DELTA_PR")
     default_digest_issue = parse_positive_int_env("TASK1_DIGEST_ISSUE")
     p = argparse.ArgumentParser(description="Fiber Link hourly task 1 monitor")
-    p.add_argument("--mode", choices=["scan", "report", "scan-and-report"], default="scan")
+    p.add_argument(
+        "--mode",
+        choices=["scan", "report", "scan-and-report", "daemon", "webhook", "should-run", "serve"],
+        default="scan",
+        help=f"scan/scan-and-report exit {STATE_LOCK_HELD_EXIT_STATUS} without waiting while a daemon or webhook process holds the state lock",
+    )
+    p.add_argument(
+        "--daemon-cycle",
+        choices=["scan", "scan-and-report"],
+        default="scan-and-report",
+        help="For daemon/webhook mode, the cycle repeated at every nextActionAt",
+    )
     p.add_argument("--hours", type=int, default=1, help="Report lookback window hours")
     p.add_argument(
         "--only-changes",
@@ -1258,25 +3071,81 @@ def parse_args() -> argparse.Namespace:
 
 
 def main() -> int:
-    args = parse_args()
-    state = load_state()
+    try:
+        return run_main()
+    finally:
+        close_http_client()
+        close_state_db()
+
+
+def stale_source_snapshot(state: dict, now_ts: int, reason: str) -> dict:
+    """Re-stamp the latest persisted run for a scan that could not fetch fresh data in time."""
+    last = get_previous_snapshot(state)
+    snapshot = dict(last)
+    snapshot["openPrs"] = [
+        {**pr, "unchangedHours": normalize_pr(pr, now_ts)["unchangedHours"]} for pr in snapshot_items(last, "openPrs")
+    ]
+    snapshot["ts"] = now_ts
+    snapshot["runAt"] = iso_utc(now_ts)
+    snapshot["dataSource"] = "stale-source"
+    snapshot["prEvents"] = []
+    snapshot["staleSourceReason"] = reason
+    snapshot["staleSourceRunAt"] = last.get("runAt")
+    snapshot["signals"] = sorted(set(last.get("signals") or []) | {"scan_deadline_exceeded"})
+    return snapshot
 
-    if args.mode == "scan":
-        snapshot = analyze()
-        change = enrich_snapshot(snapshot, state)
-        previous = get_previous_snapshot(state)
-        maybe_publish_scan_comments(snapshot, previous, change, args.comment_pr, args.digest_issue)
-        save_state(snapshot, build_scan_metadata(snapshot))
-        if has_actionable(snapshot):
-            print(summarize(snapshot))
-        return 0
 
-    if args.mode == "scan-and-report":
-        snapshot = analyze()
-        change = enrich_snapshot(snapshot, state)
+def run_scan_cycle(args: argparse.Namespace, session: StateSession, report: bool, event_driven: bool = False) -> None:
+    """Run one scan (or scan-and-report) cycle against the session's in-memory state.
+
+    GitHub I/O is bounded by `TASK1_SCAN_DEADLINE_SECONDS`; when it expires the latest persisted run
+    is reused with a `stale-source` marker instead of aborting the cycle.
+    """
+    global _SCAN_DEADLINE
+    _SCAN_DEADLINE = time.monotonic() + TASK1_SCAN_DEADLINE_SECONDS
+    try:
+        _run_scan_cycle(args, session, report, event_driven)
+    finally:
+        _SCAN_DEADLINE = None
+
+
+def _run_scan_cycle(args: argparse.Namespace, session: StateSession, report: bool, event_driven: bool) -> None:
+    state = session.state
+    timings: Dict[str, dict] = {}
+    with timed_phase(timings, "total"):
+        refresh_rate_budget()
+        probe = None
+        # A fetch still inside the reuse window makes the probe pointless: analyze() will not call GitHub.
+        # Event-driven scans skip it too: webhook deltas already say what changed, and reusing the last
+        # run on an unchanged fingerprint would drop them.
+        fetch_is_fresh = not event_driven and fresh_entity_tables(state, int(time.time())) is not None
+        if report and args.only_changes and TASK1_CHANGE_PROBE == "on" and not event_driven and not fetch_is_fresh:
+            try:
+                with timed_phase(timings, "changeProbe"):
+                    probe = probe_remote_changes()
+            except (subprocess.CalledProcessError, GitHubHttpError, OSError, ValueError, ScanTimeout) as exc:
+                print(f"change probe failed, running full scan: {exc}", file=sys.stderr)
+        snapshot = reusable_snapshot(state, probe, int(time.time()))
+        if snapshot is not None:
+            change = {"changed": False, "sources": [], "details": {}}
+        else:
+            try:
+                snapshot = analyze(session, event_driven=event_driven, timings=timings)
+            except (ScanTimeout, TimeoutError) as exc:
+                if not get_previous_snapshot(state):
+                    raise
+                print(f"scan timed out, reusing the last persisted run: {exc}", file=sys.stderr)
+                snapshot = stale_source_snapshot(state, int(time.time()), str(exc))
+            with timed_phase(timings, "enrichSnapshot"):
+                change = enrich_snapshot(snapshot, session)
+        # A stale-source run reflects the old fetch, so pairing it with the new probe would let the
+        # next cycle reuse data that never saw the changes this probe describes.
+        if probe is not None and snapshot.get("dataSource") != "stale-source":
+            snapshot["remoteProbe"] = probe
         previous = get_previous_snapshot(state)
 
-        if args.only_changes and not change["changed"]:
+        skipped = report and args.only_changes and not change["changed"]
+        if skipped:
             runs = state.get("runs", [])
             last_snapshot = runs[-1] if runs else {}
             skips = int(state.get("consecutiveNoUpdateSkips", 0)) + 1
@@ -1305,15 +3174,438 @@ def main() -> int:
                     "lastNonEmptyRunAt": snapshot.get("lastNonEmptyRunAt"),
                     "idleDigestMode": bool(snapshot.get("idleDigestMode")),
                     "queryMode": snapshot.get("queryMode", metric_value(snapshot, "queryMode", "standard")),
-                }
+                    **state_only_metadata(snapshot),
+                },
+                state=session,
             )
-            return 0
-
-        maybe_publish_scan_comments(snapshot, previous, change, args.comment_pr, args.digest_issue)
-        save_state(snapshot, build_scan_metadata(snapshot))
-        output = run_report(hours=args.hours)
+        else:
+            comment_cache = dict(state.get("commentCache") or {})
+            with timed_phase(timings, "publishComments"):
+                maybe_publish_scan_comments(snapshot, previous, change, args.comment_pr, args.digest_issue, comment_cache)
+
+    # Copy `metrics`: a reused run shares the dict with the run it was copied from.
+    snapshot["metrics"] = {**(snapshot.get("metrics") or {}), "timings": timings}
+    if skipped:
+        export_metrics(snapshot)
+        return
+    # State I/O that finished since the previous run (this run's own write happens after it is recorded).
+    for name, seconds in session.take_io_timings().items():
+        timings[name] = {"seconds": seconds, "calls": 0, "bytes": 0, "retries": 0}
+    started = time.perf_counter()
+    save_state(snapshot, {**build_scan_metadata(snapshot), "commentCache": comment_cache}, state=session)
+    session.io_timings["saveState"] = round(time.perf_counter() - started, 4)
+    export_metrics(snapshot)
+    if report:
+        output = run_report(hours=args.hours, state=session)
         if output:
             print(output)
+    elif has_actionable(snapshot):
+        print(summarize(snapshot))
+
+
+def seconds_until_next_action(state: dict, now_ts: int) -> float:
+    next_action_ts = parse_iso_utc(state.get("nextActionAt"))
+    if next_action_ts is None:
+        return CHECK_INTERVAL_MINUTES * 60
+    return max(TASK1_DAEMON_MIN_SLEEP_SECONDS, next_action_ts - now_ts)
+
+
+def run_daemon(args: argparse.Namespace, max_cycles: int | None = None) -> int:
+    """Repeat scan cycles in one process, sleeping until the persisted `nextActionAt`.
+
+    The state lock is held for the daemon's lifetime, so cron-driven scans cannot interleave with it.
+    SIGHUP cuts the current sleep short; SIGTERM/SIGINT exit cleanly once the current cycle ends.
+    A failed cycle is logged and retried after the regular check interval.
+    """
+    wake = threading.Event()
+    stop = threading.Event()
+
+    def request_wake(signum: int, frame: object) -> None:
+        wake.set()
+
+    def request_stop(signum: int, frame: object) -> None:
+        stop.set()
+        wake.set()
+
+    previous_handlers = {
+        signal.SIGHUP: signal.signal(signal.SIGHUP, request_wake),
+        signal.SIGTERM: signal.signal(signal.SIGTERM, request_stop),
+        signal.SIGINT: signal.signal(signal.SIGINT, request_stop),
+    }
+    cycles = 0
+    start_metrics_server()
+    try:
+        with StateSession(mode="daemon") as session:
+            while not stop.is_set():
+                wake.clear()
+                try:
+                    run_scan_cycle(args, session, report=args.daemon_cycle == "scan-and-report")
+                    session.flush()
+                    sleep_seconds = seconds_until_next_action(session.state, int(time.time()))
+                except (subprocess.CalledProcessError, GitHubHttpError, OSError, ScanTimeout) as exc:
+                    print(f"daemon cycle failed: {exc}", file=sys.stderr)
+                    sleep_seconds = CHECK_INTERVAL_MINUTES * 60
+                except Exception:
+                    # A bug in one cycle must not take the daemon down; KeyboardInterrupt/SystemExit still do.
+                    print("daemon cycle failed unexpectedly:", file=sys.stderr)
+                    traceback.print_exc()
+                    sleep_seconds = CHECK_INTERVAL_MINUTES * 60
+                if _HTTP_CACHE is not None:
+                    _HTTP_CACHE.flush()
+                sys.stdout.flush()
+                cycles += 1
+                if max_cycles is not None and cycles >= max_cycles:
+                    break
+                wake.wait(sleep_seconds)
+    finally:
+        stop_metrics_server()
+        for signum, handler in previous_handlers.items():
+            signal.signal(signum, handler)
+    return 0
+
+
+def verify_webhook_signature(secret: str, body: bytes, signature: str | None) -> bool:
+    if not secret or not signature or not signature.startswith("sha256="):
+        return False
+    expected = "sha256=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def apply_webhook_delivery(session: StateSession, event: str, payload: dict, now_ts: int) -> bool:
+    """Apply a delivery to the session state and mark it for persisting; returns True when anything changed.
+
+    The sqlite backend stores the patched keys right away (a small metadata upsert), so a crash
+    before the next scan does not lose them; the JSON file is rewritten by the next flush.
+    """
+    if not apply_webhook_event(session.state, event, payload, now_ts):
+        return False
+    session.dirty = True
+    if TASK1_STATE_BACKEND == "sqlite":
+        session.flush()
+    return True
+
+
+def apply_webhook_event(state: dict, event: str, payload: dict, now_ts: int) -> bool:
+    """Apply one webhook delivery to the persisted entity tables; returns True when anything changed.
+
+    Review events only approximate GitHub's aggregate `reviewDecision` from the latest review; the
+    periodic full reconcile restores the exact value.
+    """
+    tables = state.get("entityTables")
+    if not isinstance(tables, dict) or not all(isinstance(tables.get(resource), dict) for resource in ("pr", "issue")):
+        # Nothing to patch yet: the first scan does a full listing.
+        return False
+
+    if event == "issues":
+        item = payload.get("issue")
+        if not isinstance(item, dict) or not isinstance(item.get("number"), int) or "pull_request" in item:
+            return False
+        key = str(item["number"])
+        if item.get("state") == "open" and payload.get("action") not in ("deleted", "transferred"):
+            tables["issue"][key] = project_issue(_rest_issue_to_cli_shape(item))
+            return True
+        return tables["issue"].pop(key, None) is not None
+
+    if event not in ("pull_request", "pull_request_review"):
+        return False
+    item = payload.get("pull_request")
+    if not isinstance(item, dict) or not isinstance(item.get("number"), int):
+        return False
+    key = str(item["number"])
+    review_decision = (tables["pr"].get(key) or {}).get("reviewDecision")
+    if event == "pull_request_review":
+        review_state = str((payload.get("review") or {}).get("state") or "").lower()
+        review_decision = WEBHOOK_REVIEW_DECISIONS.get(review_state, review_decision)
+    if item.get("state") == "open":
+        tables["pr"][key] = project_pr(_rest_pr_to_cli_shape(item, review_decision))
+        return True
+
+    # A closed PR may be an issue's Source PR; its terminal state is final, so record it directly.
+    source_entry = (state.get("sourcePrState") or {}).get(key)
+    if isinstance(source_entry, dict):
+        source_entry.update({"state": "MERGED" if item.get("merged_at") or item.get("merged") else "CLOSED", "checkedAt": now_ts})
+    return tables["pr"].pop(key, None) is not None or isinstance(source_entry, dict)
+
+
+class WebhookRequestHandler(BaseHTTPRequestHandler):
+    """Verify a GitHub delivery and queue it for the scan loop, which owns the state."""
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if not verify_webhook_signature(self.server.secret, body, self.headers.get("X-Hub-Signature-256")):
+            self._reply(401, {"error": "invalid signature"})
+            return
+        event = self.headers.get("X-GitHub-Event") or ""
+        if event not in WEBHOOK_EVENTS:
+            self._reply(200, {"status": "ignored", "event": event})
+            return
+        try:
+            payload = json.loads(body.decode("utf-8"))
+        except ValueError:
+            payload = None
+        if not isinstance(payload, dict):
+            self._reply(400, {"error": "invalid payload"})
+            return
+        self.server.events.put((event, payload))
+        self._reply(202, {"status": "queued", "event": event})
+
+    def _reply(self, status: int, payload: dict) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: object) -> None:
+        # Keep stdout for scan output.
+        pass
+
+
+def make_webhook_server(address: Tuple[str, int], secret: str, events: "queue.Queue") -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(address, WebhookRequestHandler)
+    server.secret = secret
+    server.events = events
+    return server
+
+
+def run_webhook(args: argparse.Namespace, max_cycles: int | None = None) -> int:
+    """Serve GitHub webhooks and rescan from the entity tables when deliveries change them.
+
+    The HTTP thread only verifies and queues deliveries; this thread holds the state lock, applies
+    them and runs a scan after `TASK1_WEBHOOK_DEBOUNCE_SECONDS`. Scans also run at `nextActionAt`
+    (time-based thresholds), and every `TASK1_FULL_RECONCILE_HOURS` the scan re-lists everything.
+    """
+    secret = os.environ.get("TASK1_WEBHOOK_SECRET") or ""
+    if not secret:
+        print("webhook mode requires TASK1_WEBHOOK_SECRET", file=sys.stderr)
+        return 2
+    events: "queue.Queue[Tuple[str, dict] | None]" = queue.Queue()
+    server = make_webhook_server((TASK1_WEBHOOK_HOST, TASK1_WEBHOOK_PORT), secret, events)
+    threading.Thread(target=server.serve_forever, name="webhook-server", daemon=True).start()
+
+    def request_stop(signum: int, frame: object) -> None:
+        events.put(None)
+
+    previous_handlers = {signum: signal.signal(signum, request_stop) for signum in (signal.SIGTERM, signal.SIGINT)}
+    cycles = 0
+    next_scan_ts = time.time()
+    start_metrics_server()
+    try:
+        with StateSession(mode="webhook") as session:
+            while True:
+                try:
+                    delivery = events.get(timeout=max(0.0, next_scan_ts - time.time()))
+                except queue.Empty:
+                    delivery = ()
+                if delivery is None:
+                    break
+                if delivery:
+                    if apply_webhook_delivery(session, *delivery, int(time.time())):
+                        next_scan_ts = min(next_scan_ts, time.time() + TASK1_WEBHOOK_DEBOUNCE_SECONDS)
+                    continue
+                try:
+                    run_scan_cycle(args, session, report=args.daemon_cycle == "scan-and-report", event_driven=True)
+                    session.flush()
+                    next_scan_ts = time.time() + seconds_until_next_action(session.state, int(time.time()))
+                except (subprocess.CalledProcessError, GitHubHttpError, OSError, ScanTimeout) as exc:
+                    print(f"webhook scan failed: {exc}", file=sys.stderr)
+                    next_scan_ts = time.time() + CHECK_INTERVAL_MINUTES * 60
+                except Exception:
+                    print("webhook scan failed unexpectedly:", file=sys.stderr)
+                    traceback.print_exc()
+                    next_scan_ts = time.time() + CHECK_INTERVAL_MINUTES * 60
+                if _HTTP_CACHE is not None:
+                    _HTTP_CACHE.flush()
+                sys.stdout.flush()
+                cycles += 1
+                if max_cycles is not None and cycles >= max_cycles:
+                    break
+    finally:
+        stop_metrics_server()
+        server.shutdown()
+        server.server_close()
+        for signum, handler in previous_handlers.items():
+            signal.signal(signum, handler)
+    return 0
+
+
+def run_should_run(now_ts: int) -> int:
+    """Exit status for cron gating: 0 when a scan is due, 1 while `nextActionAt` is in the future."""
+    next_action_ts = parse_iso_utc(load_state().get("nextActionAt"))
+    if next_action_ts is None or next_action_ts <= now_ts:
+        print("due")
+        return 0
+    print(f"not due until {iso_utc(next_action_ts)}")
+    return 1
+
+
+def query_latest(state: dict) -> Tuple[int, dict]:
+    latest = get_previous_snapshot(state)
+    if not latest:
+        return 404, {"error": "no runs recorded yet"}
+    return 200, {"run": latest, "summary": summarize(latest)}
+
+
+def query_report(state: dict, hours: int) -> Tuple[int, dict]:
+    return 200, {"hours": hours, "report": run_report(hours=hours, state=state)}
+
+
+def query_pr(state: dict, number: int) -> Tuple[int, dict]:
+    latest = get_previous_snapshot(state)
+    runtime = pr_state_map({"prState": latest.get("prState"), "latestRun": latest})
+    open_pr = next((pr for pr in snapshot_items(latest, "openPrs") if pr.get("number") == number), None)
+    source = load_source_pr_index(state).get(number)
+    events = [event for event in state.get("prEventLog") or [] if event.get("pr") == number]
+    if runtime.get(number) is None and open_pr is None and source is None and not events:
+        return 404, {"error": f"PR #{number} is not tracked"}
+    return 200, {
+        "number": number,
+        "runtimeState": runtime.get(number),
+        "openPr": open_pr,
+        "sourcePrState": source,
+        "events": events,
+    }
+
+
+class StateQueryCache:
+    """Parsed state plus memoised JSON responses, both dropped when `state_version()` changes.
+
+    Responses are keyed by `(kind, argument, epoch)`; time-dependent ones (report windows) use the
+    current minute as epoch, so a newer epoch replaces the entry for the same query.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.version: tuple | None = None
+        self.state: dict = {}
+        self.responses: Dict[tuple, Tuple[int, bytes, str]] = {}
+
+    def response(self, key: tuple, build: Callable[[dict], Tuple[int, dict]]) -> Tuple[int, bytes, str]:
+        with self.lock:
+            # Fingerprint before loading: a write racing the load only causes one extra reload.
+            version = state_version()
+            if version != self.version:
+                self.state = load_state()
+                self.version = version
+                self.responses = {}
+            if key not in self.responses:
+                status, payload = build(self.state)
+                body = json.dumps(payload, sort_keys=True).encode("utf-8")
+                etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+                self.responses = {cached: value for cached, value in self.responses.items() if cached[:2] != key[:2]}
+                self.responses[key] = (status, body, etag)
+            return self.responses[key]
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+class StateQueryRequestHandler(BaseHTTPRequestHandler):
+    """Read-only JSON views of the persisted state, answered from `self.server.cache`."""
+
+    # Socket timeout: an idle or stalled client would otherwise block every query and the stop signal.
+    timeout = TASK1_SERVE_CLIENT_TIMEOUT_SECONDS
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        route = url.path.rstrip("/")
+        if route == "/latest":
+            key, build = ("latest", None, None), query_latest
+        elif route == "/report":
+            try:
+                hours = int(parse_qs(url.query).get("hours", ["1"])[0])
+            except ValueError:
+                hours = 0
+            if hours <= 0:
+                self._reply(400, json.dumps({"error": "hours must be a positive integer"}).encode("utf-8"))
+                return
+            key, build = ("report", hours, int(time.time()) // 60), lambda state: query_report(state, hours)
+        elif route.startswith("/prs/") and route[len("/prs/"):].isdigit():
+            number = int(route[len("/prs/"):])
+            key, build = ("pr", number, None), lambda state: query_pr(state, number)
+        else:
+            self._reply(404, json.dumps({"error": "not found"}).encode("utf-8"))
+            return
+
+        status, body, etag = self.server.cache.response(key, build)
+        if status == 200 and etag_matches(self.headers.get("If-None-Match"), etag):
+            self._reply(304, b"", etag)
+            return
+        self._reply(status, body, etag)
+
+    def _reply(self, status: int, body: bytes, etag: str | None = None) -> None:
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        if status != 304:
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+def make_state_query_server(address: Tuple[str, int]) -> HTTPServer:
+    # Single-threaded: cached answers are cheap, and the sqlite connection is bound to one thread.
+    server = HTTPServer(address, StateQueryRequestHandler)
+    server.cache = StateQueryCache()
+    return server
+
+
+def run_serve() -> int:
+    """Serve read-only state queries until SIGTERM/SIGINT; never takes the state lock or calls GitHub."""
+    server = make_state_query_server((TASK1_SERVE_HOST, TASK1_SERVE_PORT))
+    # `handle_request` returns after this many idle seconds, so a stop signal is noticed promptly.
+    server.timeout = 1.0
+    stop = threading.Event()
+
+    def request_stop(signum: int, frame: object) -> None:
+        stop.set()
+
+    previous_handlers = {signum: signal.signal(signum, request_stop) for signum in (signal.SIGTERM, signal.SIGINT)}
+    try:
+        while not stop.is_set():
+            server.handle_request()
+    finally:
+        server.server_close()
+        for signum, handler in previous_handlers.items():
+            signal.signal(signum, handler)
+    return 0
+
+
+def run_main() -> int:
+    args = parse_args()
+
+    if args.mode == "should-run":
+        return run_should_run(int(time.time()))
+
+    if args.mode == "serve":
+        return run_serve()
+
+    if args.mode in ("scan", "scan-and-report", "daemon", "webhook"):
+        try:
+            if args.mode == "daemon":
+                return run_daemon(args)
+            if args.mode == "webhook":
+                return run_webhook(args)
+            with StateSession(mode=args.mode) as session:
+                run_scan_cycle(args, session, report=args.mode == "scan-and-report")
+        except StateLockHeld as exc:
+            print(f"skipping {args.mode}: {exc}", file=sys.stderr)
+            return STATE_LOCK_HELD_EXIT_STATUS
+        except (StateLockTimeout, ScanTimeout, TimeoutError) as exc:
+            # TimeoutError: an HTTP-backend call timed out outside analyze() (comments, marker lookup).
+            print(f"skipping {args.mode}: {exc}", file=sys.stderr)
+            return 1
         return 0
 
     output = run_report(hours=args.hours)
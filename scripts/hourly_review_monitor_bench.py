@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""Scaling benchmark for `hourly-review-monitor.py` analyze().
+
+Contract:
+- Runs `analyze()` against synthetic paginated GraphQL listings of N open issues and N open PRs;
+  no network or `gh` calls are made.
+- Reports wall time, time per item and traced peak memory for each size, so a reviewer can
+  confirm cost grows linearly with repository size.
+- Exits non-zero when per-item time at the largest size exceeds `--max-ratio` times the
+  per-item time at the smallest size.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List
+from unittest.mock import patch
+
+MODULE_PATH = Path(__file__).with_name("hourly-review-monitor.py")
+sys.path.insert(0, str(MODULE_PATH.parent))
+SPEC = importlib.util.spec_from_file_location("hourly_review_monitor", MODULE_PATH)
+MODULE = importlib.util.module_from_spec(SPEC)
+assert SPEC is not None and SPEC.loader is not None
+SPEC.loader.exec_module(MODULE)
+
+NOW_TS = 1700000000
+
+
+def synthetic_pages(size: int, page_size: int) -> Dict[str, List[dict]]:
+    issue_nodes = []
+    pr_nodes = []
+    for number in range(1, size + 1):
+        body = f"Linked from #{size + number}\n" + ("context line\n" * 40) if number % 3 == 0 else "context line\n" * 40
+        issue_nodes.append(
+            {
+                "number": number,
+                "title": f"issue {number}",
+                "url": f"https://example.com/issues/{number}",
+                "body": body,
+                "labels": {"nodes": [{"name": "nbs"}] if number % 5 == 0 else []},
+                "updatedAt": "2023-11-14T20:00:00Z",
+            }
+        )
+        pr_nodes.append(
+            {
+                "number": size + number,
+                "title": f"pr {size + number}",
+                "url": f"https://example.com/pull/{size + number}",
+                "reviewDecision": "REVIEW_REQUIRED",
+                "body": "review notes\n" * 40,
+                "headRefName": f"branch-{number}",
+                "headRefOid": f"{number:040x}",
+                "updatedAt": "2023-11-10T00:00:00Z",
+                "author": {"login": "contributor"},
+            }
+        )
+
+    def paginate(nodes: List[dict]) -> List[dict]:
+        pages = []
+        for start in range(0, max(len(nodes), 1), page_size):
+            has_next = start + page_size < len(nodes)
+            pages.append({"pageInfo": {"hasNextPage": has_next, "endCursor": str(start + page_size)}, "nodes": nodes[start : start + page_size]})
+        return pages
+
+    return {"issues": paginate(issue_nodes), "pullRequests": paginate(pr_nodes)}
+
+
+def run_once(size: int, page_size: int) -> Dict[str, float]:
+    pages = synthetic_pages(size, page_size)
+    cursors = {"issues": 0, "pullRequests": 0}
+
+    def fake_graphql(query: str, variables: dict | None = None) -> dict:
+        name = "issues" if "issues(" in query else "pullRequests"
+        page = pages[name][cursors[name]]
+        cursors[name] += 1
+        return {"repository": {name: page}}
+
+    with (
+        patch.object(MODULE, "TASK1_FETCH_MODE", "cli"),
+        patch.object(MODULE, "TASK1_SYNC_MODE", "full"),
+        patch.object(MODULE, "TASK1_GRAPHQL_PAGE_SIZE", page_size),
+        patch.object(MODULE, "run_graphql", side_effect=fake_graphql),
+        patch.object(MODULE, "pr_state", return_value="OPEN"),
+        patch.object(MODULE, "count_test_files", return_value=0),
+        patch.object(MODULE, "read_docs_superseded_count", return_value=0),
+        patch.object(MODULE.time, "time", return_value=NOW_TS),
+    ):
+        tracemalloc.start()
+        started = time.perf_counter()
+        snapshot = MODULE.analyze(state={})
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    assert len(snapshot["openPrs"]) == size, "every PR page must be consumed"
+    return {"size": size, "seconds": elapsed, "perItemMs": elapsed * 1000 / (2 * size), "peakKiB": peak / 1024}
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="250,1000,4000", help="Comma-separated open issue/PR counts")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--max-ratio", type=float, default=3.0)
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] | None = None) -> int:
+    args = parse_args(argv)
+    sizes = sorted(int(value) for value in args.sizes.split(",") if value.strip())
+    results = [run_once(size, args.page_size) for size in sizes]
+
+    print(f"{'items':>8} {'seconds':>9} {'ms/item':>9} {'peak KiB':>10}")
+    for row in results:
+        print(f"{row['size']:>8} {row['seconds']:>9.3f} {row['perItemMs']:>9.4f} {row['peakKiB']:>10.0f}")
+
+    ratio = results[-1]["perItemMs"] / max(results[0]["perItemMs"], 1e-9)
+    print(f"per-item time ratio (largest/smallest): {ratio:.2f}")
+    return 0 if ratio <= args.max_ratio else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
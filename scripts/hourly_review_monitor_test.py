@@ -1,12 +1,21 @@
+import http.client
 import importlib.util
+import itertools
 import json
+import os
+import signal
+import socket
+import sys
+import tempfile
+import threading
 from datetime import datetime, timezone
 import unittest
 from pathlib import Path
-from unittest.mock import patch
+from unittest.mock import ANY, MagicMock, patch
 
 
 MODULE_PATH = Path(__file__).with_name("hourly-review-monitor.py")
+sys.path.insert(0, str(MODULE_PATH.parent))
 SPEC = importlib.util.spec_from_file_location("hourly_review_monitor", MODULE_PATH)
 MODULE = importlib.util.module_from_spec(SPEC)
 assert SPEC is not None and SPEC.loader is not None
@@ -590,6 +599,1307 @@ class HourlyReviewMonitorTests(unittest.TestCase):
             ["api", "-X", "PATCH", f"repos/{MODULE.REPO}/issues/comments/77", "-f", f"body={body}"],
         )
 
+    def test_upsert_issue_comment_uses_cached_id_and_skips_unchanged_bodies(self) -> None:
+        marker = "<!-- marker -->"
+        body_hash = MODULE.hashlib.sha256(b"same body").hexdigest()
+        cache = {f"208:{marker}": {"id": 77, "bodyHash": body_hash}}
+        with patch.object(MODULE, "run_gh") as run_gh_mock:
+            MODULE.upsert_issue_comment(208, marker, "same body", cache=cache)
+            run_gh_mock.assert_not_called()
+
+            run_gh_mock.side_effect = [""]
+            MODULE.upsert_issue_comment(208, marker, "new body", cache=cache)
+
+        self.assertEqual(
+            [call.args[0] for call in run_gh_mock.call_args_list],
+            [["api", "-X", "PATCH", f"repos/{MODULE.REPO}/issues/comments/77", "-f", "body=new body"]],
+        )
+        self.assertEqual(cache[f"208:{marker}"]["bodyHash"], MODULE.hashlib.sha256(b"new body").hexdigest())
+
+        deleted = MODULE.subprocess.CalledProcessError(1, ["gh"], stderr="gh: Not Found (HTTP 404)")
+        with patch.object(MODULE, "run_gh", side_effect=[deleted, json.dumps([[]]), json.dumps({"id": 91})]) as run_gh_mock:
+            MODULE.upsert_issue_comment(208, marker, "newest body", cache=cache)
+
+        self.assertEqual(run_gh_mock.call_args_list[1].args[0][:3], ["api", "--paginate", "--slurp"])
+        self.assertEqual(run_gh_mock.call_args_list[2].args[0], ["api", f"repos/{MODULE.REPO}/issues/208/comments", "-f", "body=newest body"])
+        self.assertEqual(cache[f"208:{marker}"], {"id": 91, "bodyHash": MODULE.hashlib.sha256(b"newest body").hexdigest()})
+
+    def test_comment_bodies_of_unchanged_runs_send_no_patch(self) -> None:
+        def run_at(ts: int, unchanged_hours: float) -> dict:
+            pr = {"number": 5, "title": "pr", "url": "https://example.com/5", "author": "owner", "headSha": "a" * 40, "unchangedHours": unchanged_hours}
+            return {
+                "runAt": MODULE.iso_utc(ts),
+                "nextActionAt": MODULE.iso_utc(ts + 1200),
+                "counts": {"open": 2, "stableTerminalPrs": 1},
+                "openPrs": [pr],
+                "stableTerminalPrs": [pr],
+                "signals": ["stable_terminal_pr"],
+            }
+
+        previous, first, second = run_at(1700000000, 30.0), run_at(1700003600, 31.0), run_at(1700007200, 32.0)
+        changed = {**second, "counts": {"open": 3, "stableTerminalPrs": 1}}
+        cache: dict = {}
+        with patch.object(MODULE, "run_gh", return_value=json.dumps({"id": 77})) as run_gh_mock:
+            for snapshot in (first, second):
+                MODULE.upsert_issue_comment(208, MODULE.AUDIT_DELTA_MARKER, MODULE.build_audit_delta_comment(208, snapshot, previous), cache=cache)
+                MODULE.upsert_issue_comment(209, MODULE.DIGEST_MARKER, MODULE.build_low_priority_digest_comment(snapshot), cache=cache)
+            self.assertEqual(run_gh_mock.call_count, 4)  # two marker searches, two creates
+
+            MODULE.upsert_issue_comment(208, MODULE.AUDIT_DELTA_MARKER, MODULE.build_audit_delta_comment(208, changed, previous), cache=cache)
+        self.assertEqual(run_gh_mock.call_count, 5)
+        self.assertEqual(run_gh_mock.call_args.args[0][:3], ["api", "-X", "PATCH"])
+
+    def test_graphql_fetch_mode_batches_pages_and_source_pr_states(self) -> None:
+        page_one = {
+            "data": {
+                "repository": {
+                    "issues": {
+                        "pageInfo": {"hasNextPage": True, "endCursor": "issue-1"},
+                        "nodes": [
+                            {
+                                "number": 10,
+                                "title": "bound to merged PR",
+                                "url": "https://example.com/10",
+                                "body": "Source PR: https://github.com/Keith-CY/fiber-link/pull/90",
+                                "labels": {"nodes": [{"name": "nbs"}]},
+                                "assignees": {"nodes": []},
+                            }
+                        ],
+                    },
+                    "pullRequests": {
+                        "pageInfo": {"hasNextPage": False, "endCursor": "pr-1"},
+                        "nodes": [
+                            {
+                                "number": 91,
+                                "title": "open PR",
+                                "url": "https://example.com/pr/91",
+                                "reviewDecision": "REVIEW_REQUIRED",
+                                "body": "",
+                                "headRefName": "feature",
+                                "headRefOid": "9" * 40,
+                                "updatedAt": "2023-11-14T22:00:00Z",
+                                "author": {"login": "owner"},
+                            }
+                        ],
+                    },
+                }
+            }
+        }
+        page_two = {
+            "data": {
+                "repository": {
+                    "issues": {
+                        "pageInfo": {"hasNextPage": False, "endCursor": "issue-2"},
+                        "nodes": [
+                            {
+                                "number": 11,
+                                "title": "bound to open PR",
+                                "url": "https://example.com/11",
+                                "body": "Source PR: https://github.com/Keith-CY/fiber-link/pull/91",
+                                "labels": {"nodes": []},
+                                "assignees": {"nodes": []},
+                            }
+                        ],
+                    },
+                    "sourcePr90": {"number": 90, "state": "MERGED"},
+                }
+            }
+        }
+
+        with (
+            patch.object(MODULE, "TASK1_FETCH_MODE", "graphql"),
+            patch.object(MODULE, "run_gh") as run_gh_mock,
+            patch.object(MODULE, "count_test_files", return_value=10),
+            patch.object(MODULE, "read_docs_superseded_count", return_value=1),
+            patch.object(MODULE.time, "time", return_value=1700000000),
+        ):
+            run_gh_mock.side_effect = [json.dumps(page_one), json.dumps(page_two)]
+            snapshot = MODULE.analyze(state={})
+
+        self.assertEqual(run_gh_mock.call_count, 2)
+        second_query = run_gh_mock.call_args_list[1].args[0][3]
+        self.assertIn('after: "issue-1"', second_query)
+        self.assertIn("sourcePr90: pullRequest(number: 90)", second_query)
+        self.assertNotIn("pullRequests(", second_query)
+        self.assertEqual(snapshot["fetchMode"], "graphql")
+        self.assertEqual(snapshot["counts"]["openPrs"], 1)
+        self.assertEqual([item["issue"]["number"] for item in snapshot["openUnbound"]], [10])
+        self.assertEqual(snapshot["openUnbound"][0]["reason"], "source-pr-merged")
+        self.assertEqual(snapshot["counts"]["nbsUnbound"], 1)
+
+    def test_http_backend_routes_comment_upsert_and_pr_state_through_pooled_client(self) -> None:
+        client = MagicMock()
+        client.paginate.return_value = [{"id": 77, "body": "old\n<!-- marker -->"}]
+        client.request_json.side_effect = [{"id": 77}, {"state": "closed", "merged_at": "2026-02-22T00:00:00Z"}]
+
+        with (
+            patch.object(MODULE, "TASK1_GITHUB_BACKEND", "http"),
+            patch.object(MODULE, "get_http_client", return_value=client),
+            patch.object(MODULE, "run_gh") as run_gh_mock,
+        ):
+            MODULE.upsert_issue_comment(208, "<!-- marker -->", "fresh body")
+            state = MODULE.pr_state(90, {})
+
+        run_gh_mock.assert_not_called()
+        client.paginate.assert_called_once_with(f"/repos/{MODULE.REPO}/issues/208/comments?per_page=100")
+        self.assertEqual(
+            client.request_json.call_args_list[0].args,
+            ("PATCH", f"/repos/{MODULE.REPO}/issues/comments/77", {"body": "fresh body"}),
+        )
+        self.assertEqual(state, "MERGED")
+
+    def test_source_pr_index_skips_lookups_for_terminal_states_across_runs(self) -> None:
+        issues = [
+            {
+                "number": 20,
+                "title": "bound to merged PR",
+                "url": "https://example.com/20",
+                "body": "Source PR: https://github.com/Keith-CY/fiber-link/pull/90",
+                "labels": [],
+            },
+            {
+                "number": 21,
+                "title": "bound to PR with expired OPEN entry",
+                "url": "https://example.com/21",
+                "body": "Source PR: https://github.com/Keith-CY/fiber-link/pull/95",
+                "labels": [],
+            },
+        ]
+        state = {
+            "sourcePrState": {
+                "90": {"state": "MERGED", "checkedAt": 1600000000},
+                "95": {"state": "OPEN", "checkedAt": 1700000000 - 7200},
+                "96": {"state": "CLOSED", "checkedAt": 1600000000},
+            }
+        }
+
+        with (
+            patch.object(MODULE, "list_json") as list_json_mock,
+            patch.object(MODULE, "run_gh", return_value="CLOSED") as run_gh_mock,
+            patch.object(MODULE, "count_test_files", return_value=10),
+            patch.object(MODULE, "read_docs_superseded_count", return_value=1),
+            patch.object(MODULE.time, "time", return_value=1700000000),
+        ):
+            list_json_mock.side_effect = [[], issues]
+            snapshot = MODULE.analyze(state=state)
+
+        self.assertEqual(run_gh_mock.call_count, 1)
+        self.assertEqual(run_gh_mock.call_args.args[0][:3], ["pr", "view", "95"])
+        self.assertEqual(snapshot["metrics"]["sourcePrLookups"], 1)
+        self.assertEqual(
+            snapshot["sourcePrState"],
+            {
+                "90": {"state": "MERGED", "checkedAt": 1600000000},
+                "95": {"state": "CLOSED", "checkedAt": 1700000000},
+            },
+        )
+
+        with tempfile.TemporaryDirectory() as tmp, patch.object(MODULE, "STATE_FILE", str(Path(tmp) / "state.json")):
+            MODULE.save_state(snapshot)
+            persisted = MODULE.load_state()
+        self.assertEqual(persisted["sourcePrState"], snapshot["sourcePrState"])
+        self.assertNotIn("sourcePrState", persisted["runs"][-1])
+
+    def test_incremental_sync_merges_changed_items_into_entity_tables(self) -> None:
+        kept_pr = {
+            "number": 801,
+            "title": "untouched PR",
+            "url": "https://example.com/pr/801",
+            "reviewDecision": "REVIEW_REQUIRED",
+            "headRefName": "a",
+            "headRefOid": "a" * 40,
+            "updatedAt": "2023-11-14T20:00:00Z",
+            "author": {"login": "owner"},
+        }
+        closed_issue = {"number": 30, "title": "to be closed", "url": "https://example.com/30", "body": "", "labels": []}
+        state = {
+            "entityTables": {"pr": {"801": kept_pr}, "issue": {"30": closed_issue}},
+            "syncWatermarks": {"pr": "2023-11-14T20:00:00Z", "issue": "2023-11-14T19:00:00Z"},
+            "lastFullSyncAt": 1700000000 - 600,
+        }
+        search_results = {
+            "pr": {
+                "search": {
+                    "pageInfo": {"hasNextPage": False},
+                    "nodes": [
+                        {
+                            "number": 802,
+                            "title": "new PR",
+                            "url": "https://example.com/pr/802",
+                            "reviewDecision": None,
+                            "headRefName": "b",
+                            "headRefOid": "b" * 40,
+                            "updatedAt": "2023-11-14T22:00:00Z",
+                            "author": {"login": "owner"},
+                            "state": "OPEN",
+                        }
+                    ],
+                }
+            },
+            "issue": {
+                "search": {
+                    "pageInfo": {"hasNextPage": False},
+                    "nodes": [{"number": 30, "title": "to be closed", "url": "https://example.com/30", "updatedAt": "2023-11-14T21:00:00Z", "state": "CLOSED"}],
+                }
+            },
+        }
+
+        def fake_graphql(query: str, variables: dict | None = None) -> dict:
+            return search_results["issue" if "is:issue" in variables["searchQuery"] else "pr"]
+
+        with (
+            patch.object(MODULE, "TASK1_SYNC_MODE", "incremental"),
+            patch.object(MODULE, "run_graphql", side_effect=fake_graphql) as graphql_mock,
+            patch.object(MODULE, "list_json") as list_json_mock,
+            patch.object(MODULE, "count_test_files", return_value=10),
+            patch.object(MODULE, "read_docs_superseded_count", return_value=1),
+            patch.object(MODULE.time, "time", return_value=1700000000),
+        ):
+            snapshot = MODULE.analyze(state=state)
+
+        list_json_mock.assert_not_called()
+        self.assertIn("updated:>=2023-11-14T20:00:00Z", graphql_mock.call_args_list[0].args[1]["searchQuery"])
+        self.assertEqual(snapshot["syncMode"], "incremental")
+        self.assertEqual([pr["number"] for pr in snapshot["openPrs"]], [802, 801])
+        self.assertEqual(snapshot["counts"]["open"], 0)
+        self.assertEqual(snapshot["entityTables"]["issue"], {})
+        self.assertEqual(snapshot["syncWatermarks"], {"pr": "2023-11-14T22:00:00Z", "issue": "2023-11-14T21:00:00Z"})
+
+        with (
+            patch.object(MODULE, "TASK1_SYNC_MODE", "incremental"),
+            patch.object(MODULE, "list_json", side_effect=[[kept_pr], []]) as list_json_mock,
+            patch.object(MODULE, "count_test_files", return_value=10),
+            patch.object(MODULE, "read_docs_superseded_count", return_value=1),
+            patch.object(MODULE.time, "time", return_value=1700000000 + int(MODULE.TASK1_FULL_RECONCILE_HOURS * 3600)),
+        ):
+            reconciled = MODULE.analyze(state={**state, **MODULE.state_only_metadata(snapshot)})
+
+        self.assertEqual(list_json_mock.call_count, 2)
+        self.assertEqual(reconciled["syncMode"], "full")
+        self.assertEqual(list(reconciled["entityTables"]["pr"]), ["801"])
+
+    def test_list_json_streams_every_page_lazily_following_cursors(self) -> None:
+        def issue_page(numbers: list[int], has_next: bool, cursor: str) -> dict:
+            nodes = [{"number": n, "title": f"issue {n}", "url": f"https://example.com/{n}", "body": "", "labels": {"nodes": []}} for n in numbers]
+            return {"repository": {"issues": {"pageInfo": {"hasNextPage": has_next, "endCursor": cursor}, "nodes": nodes}}}
+
+        pages = [issue_page([1, 2], True, "c1"), issue_page([3, 4], True, "c2"), issue_page([5], False, "c3")]
+        with patch.object(MODULE, "run_graphql", side_effect=pages) as graphql_mock:
+            listing = MODULE.list_json("issue")
+            graphql_mock.assert_not_called()
+            first_page = list(itertools.islice(listing, 2))
+            self.assertEqual(graphql_mock.call_count, 1)
+            rest = list(listing)
+
+        self.assertEqual([issue["number"] for issue in first_page + rest], [1, 2, 3, 4, 5])
+        self.assertIn('after: "c1"', graphql_mock.call_args_list[1].args[0])
+        self.assertIn('after: "c2"', graphql_mock.call_args_list[2].args[0])
+
+        # Filtered listings stay a single capped `gh ... list` call.
+        with patch.object(MODULE, "run_gh", return_value='[{"number": 8}]') as run_gh_mock:
+            self.assertEqual(MODULE.list_json("pr", label="nbs"), [{"number": 8}])
+        gh_args = run_gh_mock.call_args.args[0]
+        self.assertEqual(gh_args[:4], ["pr", "list", "--state", "open"])
+        self.assertEqual(gh_args[-4:], ["--limit", str(MODULE.TASK1_LIST_LIMIT), "--label", "nbs"])
+        with self.assertRaises(ValueError):
+            MODULE.list_json("discussion")
+
+        pr = {"number": 900, "title": "pr", "url": "https://example.com/pr/900", "reviewDecision": None, "headRefName": "x", "headRefOid": "x" * 40, "updatedAt": "2023-11-14T22:00:00Z", "author": {"login": "owner"}}
+        issues = [{"number": n, "title": f"issue {n}", "url": f"https://example.com/{n}", "body": "", "labels": [{"name": "nbs"}]} for n in range(1, 6)]
+        with (
+            patch.object(MODULE, "TASK1_GRAPHQL_PAGE_SIZE", 2),
+            patch.object(MODULE, "list_json", side_effect=[iter([pr]), iter(issues)]),
+            patch.object(MODULE, "classify_with_source_pr", wraps=MODULE.classify_with_source_pr) as classify_mock,
+            patch.object(MODULE, "count_test_files", return_value=10),
+            patch.object(MODULE, "read_docs_superseded_count", return_value=1),
+            patch.object(MODULE.time, "time", return_value=1700000000),
+        ):
+            snapshot = MODULE.analyze()
+
+        self.assertEqual([len(call.args[0]) for call in classify_mock.call_args_list], [2, 2, 1])
+        self.assertEqual(snapshot["counts"]["open"], 5)
+        self.assertEqual(snapshot["counts"]["nbsUnbound"], 5)
+
+    def test_fetch_concurrency_overlaps_lookups_and_matches_serial_snapshot(self) -> None:
+        pr = {"number": 900, "title": "pr", "url": "https://example.com/pr/900", "reviewDecision": None, "headRefName": "x", "headRefOid": "x" * 40, "updatedAt": "2023-11-14T22:00:00Z", "author": {"login": "owner"}}
+        issues = [
+            {"number": n, "title": f"issue {n}", "url": f"https://example.com/{n}", "body": f"Source PR: https://github.com/Keith-CY/fiber-link/pull/{n + 100}", "labels": []}
+            for n in (1, 2, 3)
+        ]
+        pr_states = {101: "MERGED", 102: "OPEN", 103: "CLOSED"}
+
+        def run(concurrency: int, lookup) -> tuple[dict, list]:
+            list_calls: list = []
+
+            def fake_list_json(resource: str) -> list:
+                list_calls.append(resource)
+                return [pr] if resource == "pr" else issues
+
+            with (
+                patch.object(MODULE, "TASK1_FETCH_CONCURRENCY", concurrency),
+                patch.object(MODULE, "list_json", side_effect=fake_list_json),
+                patch.object(MODULE, "fetch_pr_state", side_effect=lookup),
+                patch.object(MODULE, "count_test_files", return_value=10),
+                patch.object(MODULE, "read_docs_superseded_count", return_value=1),
+                patch.object(MODULE.time, "time", return_value=1700000000),
+            ):
+                return MODULE.analyze(state={}), sorted(list_calls)
+
+        serial_snapshot, serial_calls = run(1, lambda pr_num: pr_states[pr_num])
+
+        # Every lookup waits at the barrier, so this only completes if all three run at once.
+        barrier = threading.Barrier(3, timeout=5)
+
+        def overlapping_lookup(pr_num: int) -> str:
+            barrier.wait()
+            return pr_states[pr_num]
+
+        concurrent_snapshot, concurrent_calls = run(4, overlapping_lookup)
+
+        self.assertEqual(concurrent_calls, serial_calls)
+        self.assertEqual(json.dumps(concurrent_snapshot, sort_keys=True), json.dumps(serial_snapshot, sort_keys=True))
+        self.assertEqual(serial_snapshot["metrics"]["sourcePrLookups"], 3)
+        self.assertEqual(serial_snapshot["counts"]["open"], 2)
+
+    def test_daemon_keeps_state_in_memory_and_wakes_early_on_sighup(self) -> None:
+        pr = {"number": 900, "title": "pr", "url": "https://example.com/pr/900", "reviewDecision": None, "headRefName": "x", "headRefOid": "x" * 40, "updatedAt": "2023-11-14T22:00:00Z", "author": {"login": "owner"}}
+        args = MODULE.argparse.Namespace(daemon_cycle="scan", only_changes=False, hours=1, comment_pr=None, digest_issue=None)
+        real_cycle = MODULE.run_scan_cycle
+        cycles: list = []
+
+        def cycle_then_hangup(*cycle_args, **cycle_kwargs) -> None:
+            real_cycle(*cycle_args, **cycle_kwargs)
+            cycles.append(cycle_args[1].state["nextActionAt"])
+            os.kill(os.getpid(), signal.SIGHUP)
+
+        with (
+            tempfile.TemporaryDirectory() as tmp,
+            patch.object(MODULE, "STATE_FILE", str(Path(tmp) / "state.json")),
+            patch.object(MODULE, "TASK1_DAEMON_MIN_SLEEP_SECONDS", 3600.0),
+            patch.object(MODULE, "list_json", side_effect=lambda resource: [pr] if resource == "pr" else []),
+            patch.object(MODULE, "count_test_files", return_value=10),
+            patch.object(MODULE, "read_docs_superseded_count", return_value=1),
+            patch.object(MODULE, "run_scan_cycle", side_effect=cycle_then_hangup),
+            patch.object(MODULE, "load_state", wraps=MODULE.load_state) as load_state_mock,
+        ):
+            started = MODULE.time.monotonic()
+            self.assertEqual(MODULE.run_daemon(args, max_cycles=2), 0)
+            elapsed = MODULE.time.monotonic() - started
+            persisted = MODULE.rehydrate_state(json.loads(Path(MODULE.STATE_FILE).read_text(encoding="utf-8")))
+
+        self.assertLess(elapsed, 60)
+        self.assertEqual(len(cycles), 2)
+        self.assertEqual(load_state_mock.call_count, 1)
+        self.assertEqual(len(persisted["runs"]), 2)
+        self.assertEqual(persisted["nextActionAt"], cycles[-1])
+        self.assertIs(signal.getsignal(signal.SIGHUP), signal.SIG_DFL)
+
+    def test_sqlite_state_backend_imports_json_state_and_reports_window(self) -> None:
+        legacy_run = {"ts": 1700000000 - 7200, "runAt": "old", "counts": {"open": 9}, "signals": []}
+        recent_run = {"ts": 1700000000 - 60, "runAt": "recent", "counts": {"open": 2}, "signals": []}
+        with tempfile.TemporaryDirectory() as tmp:
+            state_file = Path(tmp) / "state.json"
+            state_file.write_text(json.dumps({"runs": [legacy_run], "latestRun": legacy_run, "idleStreak": 3}), encoding="utf-8")
+            with (
+                patch.object(MODULE, "STATE_FILE", str(state_file)),
+                patch.object(MODULE, "TASK1_STATE_BACKEND", "sqlite"),
+                patch.object(MODULE, "TASK1_STATE_DB_FILE", str(Path(tmp) / "state.sqlite3")),
+                patch.object(MODULE.time, "time", return_value=1700000000),
+            ):
+                try:
+                    imported = MODULE.load_state()
+                    MODULE.save_state(recent_run, {"cleanRunStreak": 1})
+                    state = MODULE.load_state()
+                    report = MODULE.run_report(hours=1)
+                finally:
+                    MODULE.close_state_db()
+            legacy_file_untouched = json.loads(state_file.read_text(encoding="utf-8"))
+
+        self.assertEqual(imported["runs"], [legacy_run])
+        self.assertEqual(imported["idleStreak"], 3)
+        self.assertEqual(state["runs"], [recent_run])
+        self.assertEqual(state["cleanRunStreak"], 1)
+        self.assertIn("Task-1 report (1h): 1 scan runs", report)
+        self.assertIn("Total open issues requiring handling: 2", report)
+        self.assertEqual(legacy_file_untouched["runs"], [legacy_run])
+
+    def test_state_session_loads_once_writes_once_and_excludes_overlapping_runs(self) -> None:
+        pr = {"number": 900, "title": "pr", "url": "https://example.com/pr/900", "reviewDecision": None, "headRefName": "x", "headRefOid": "x" * 40, "updatedAt": "2023-11-14T22:00:00Z", "author": {"login": "owner"}}
+        args = MODULE.argparse.Namespace(only_changes=False, hours=1, comment_pr=None, digest_issue=None)
+        with (
+            tempfile.TemporaryDirectory() as tmp,
+            patch.object(MODULE, "STATE_FILE", str(Path(tmp) / "state.json")),
+            patch.object(MODULE, "list_json", side_effect=lambda resource: [pr] if resource == "pr" else []),
+            patch.object(MODULE, "count_test_files", return_value=10),
+            patch.object(MODULE, "read_docs_superseded_count", return_value=1),
+            patch.object(MODULE, "load_state", wraps=MODULE.load_state) as load_state_mock,
+            patch.object(MODULE, "write_state", wraps=MODULE.write_state) as write_state_mock,
+        ):
+            with MODULE.StateSession() as session:
+                MODULE.run_scan_cycle(args, session, report=True)
+                self.assertFalse(Path(MODULE.STATE_FILE).exists())
+                with self.assertRaises(MODULE.StateLockTimeout):
+                    with MODULE.StateSession(lock_timeout=0.2):
+                        pass
+            persisted = MODULE.rehydrate_state(json.loads(Path(MODULE.STATE_FILE).read_text(encoding="utf-8")))
+            with MODULE.StateSession(lock_timeout=0.2) as reopened:
+                self.assertEqual(reopened.state["runs"], persisted["runs"])
+
+        self.assertEqual(load_state_mock.call_count, 2)
+        self.assertEqual(write_state_mock.call_count, 1)
+        self.assertEqual(len(persisted["runs"]), 1)
+
+    def test_scan_fails_fast_while_a_daemon_holds_the_state_lock(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp, patch.object(MODULE, "STATE_FILE", str(Path(tmp) / "state.json")):
+            with MODULE.StateSession(mode="daemon"):
+                started = MODULE.time.monotonic()
+                with self.assertRaises(MODULE.StateLockHeld):
+                    with MODULE.StateSession(lock_timeout=30):
+                        pass
+                self.assertLess(MODULE.time.monotonic() - started, 5)
+            self.assertEqual(Path(f"{MODULE.STATE_FILE}.lock").read_bytes(), b"")
+
+            # A record left by a dead holder is ignored, so a later one-shot run only waits out the timeout.
+            with MODULE.StateSession(mode="scan") as session:
+                os.pwrite(session._lock_fd, json.dumps({"pid": 2**22 + 12345, "mode": "daemon"}).encode("utf-8"), 0)
+                with self.assertRaises(MODULE.StateLockTimeout) as raised:
+                    with MODULE.StateSession(lock_timeout=0.2):
+                        pass
+                self.assertNotIsInstance(raised.exception, MODULE.StateLockHeld)
+
+            args = MODULE.argparse.Namespace(mode="scan", only_changes=False, hours=1, comment_pr=None, digest_issue=None)
+            with (
+                MODULE.StateSession(mode="webhook"),
+                patch.object(MODULE, "parse_args", return_value=args),
+                patch("builtins.print"),
+            ):
+                self.assertEqual(MODULE.run_main(), MODULE.STATE_LOCK_HELD_EXIT_STATUS)
+
+            # A client timeout while publishing comments ends a one-shot scan with the same clean skip.
+            with (
+                patch.object(MODULE, "parse_args", return_value=args),
+                patch.object(MODULE, "run_scan_cycle", side_effect=TimeoutError("timed out")),
+                patch("builtins.print") as print_mock,
+            ):
+                self.assertEqual(MODULE.run_main(), 1)
+            self.assertIn("skipping scan: timed out", print_mock.call_args.args[0])
+
+    def test_state_file_interns_repeated_issue_and_pr_entities(self) -> None:
+        issue = {"number": 7, "title": "issue", "url": "https://example.com/7", "body": "x" * 2000, "labels": [{"name": "nbs"}]}
+        unbound = {"issue": issue, "reason": "missing-source-pr"}
+
+        def run(ts: int) -> dict:
+            # Elapsed-time fields move every run; they must not split the PR into a new entity.
+            pr = {"number": 208, "title": "pr", "url": "https://example.com/pr/208", "headSha": "a" * 40, "reviewDecision": "APPROVED", "unchangedHours": 30.0 + ts, "noUpdateStreak": ts}
+            return {
+                "ts": ts,
+                "open": [issue],
+                "assigned": [issue],
+                "openUnbound": [unbound],
+                "assignedUnbound": [unbound],
+                "nbs": [issue],
+                "nbsUnbound": [unbound],
+                "openPrs": [pr],
+                "staleOpenPrsAll": [pr],
+                "staleOpenPrsDigest": [pr],
+                "approvedButUnmerged": [pr],
+                "signals": ["stable_terminal_pr_digest"],
+            }
+
+        with tempfile.TemporaryDirectory() as tmp, patch.object(MODULE, "STATE_FILE", str(Path(tmp) / "state.json")):
+            MODULE.save_state(run(1))
+            MODULE.save_state(run(2))
+            stored = json.loads(Path(MODULE.STATE_FILE).read_text(encoding="utf-8"))
+            loaded = MODULE.load_state()
+
+        self.assertEqual(len(stored["snapshotEntities"]), 2)
+        keyframe = stored["runHistory"]["entries"][0]["keyframe"]
+        issue_ref = keyframe["open"][0]
+        self.assertRegex(issue_ref, r"^7@[0-9a-f]{16}$")
+        self.assertEqual(keyframe["nbsUnbound"], [{"issue": issue_ref, "reason": "missing-source-pr"}])
+        pr_ref = keyframe["openPrs"][0]["entity"]
+        self.assertEqual(keyframe["openPrs"], [{"entity": pr_ref, "unchangedHours": 31.0, "noUpdateStreak": 1}])
+        self.assertEqual(stored["latestRun"]["openPrs"], [{"entity": pr_ref, "unchangedHours": 32.0, "noUpdateStreak": 2}])
+        self.assertNotIn("unchangedHours", stored["snapshotEntities"][pr_ref])
+        self.assertEqual(loaded["runs"], [run(1), run(2)])
+        self.assertEqual(MODULE.snapshot_items(loaded["latestRun"], "staleOpenPrsDigest"), run(2)["openPrs"])
+        self.assertLess(len(json.dumps(stored)), len(json.dumps({**loaded, "runs": list(loaded["runs"])})) / 5)
+
+    def test_issue_projection_drops_bodies_before_snapshot(self) -> None:
+        bound_body = "Source PR: https://github.com/Keith-CY/fiber-link/pull/77\n" + "details " * 500
+        issues = [
+            {"number": 1, "title": "bound", "url": "https://example.com/1", "body": bound_body, "labels": [{"name": "nbs"}], "assignees": []},
+            {"number": 2, "title": "unbound", "url": "https://example.com/2", "body": "no link " * 500, "labels": [{"name": "nbs"}], "assignees": []},
+        ]
+        with (
+            patch.object(MODULE, "TASK1_ISSUE_RETAINED_FIELDS", ("title", "labels")),
+            patch.object(MODULE, "list_json", side_effect=[[], issues]),
+            patch.object(MODULE, "pr_state", return_value="MERGED") as pr_state_mock,
+            patch.object(MODULE, "count_test_files", return_value=10),
+            patch.object(MODULE, "read_docs_superseded_count", return_value=1),
+            patch.object(MODULE.time, "time", return_value=1700000000),
+        ):
+            snapshot = MODULE.analyze(state={})
+
+        pr_state_mock.assert_called_once_with(77, ANY)
+        self.assertEqual([item["reason"] for item in snapshot["openUnbound"]], ["source-pr-merged", "missing-source-pr"])
+        first = snapshot["nbs"][0]
+        self.assertEqual(set(first), {"number", "title", "labels", "sourcePr", "bodyHash"})
+        self.assertEqual(first["sourcePr"], 77)
+        self.assertEqual(first["bodyHash"], MODULE.hashlib.sha256(bound_body.encode("utf-8")).hexdigest()[:16])
+        self.assertNotIn("details", json.dumps(snapshot))
+        self.assertIs(MODULE.project_issue(first), first)
+
+    def test_run_history_stores_keyframes_and_deltas_and_decodes_lazily(self) -> None:
+        def run(ts: int) -> dict:
+            return {
+                "ts": ts,
+                "runAt": f"run-{ts}",
+                "counts": {"open": ts % 3, "openPrs": 1},
+                "openPrs": [{"number": 208, "headSha": "a" * 40, "unchangedHours": ts / 10}],
+                "signals": ["stale_open_pr_watchdog"] if ts % 2 else [],
+            }
+
+        with (
+            tempfile.TemporaryDirectory() as tmp,
+            patch.object(MODULE, "STATE_FILE", str(Path(tmp) / "state.json")),
+            patch.object(MODULE, "MAX_STATE_RUNS", 10),
+            patch.object(MODULE, "TASK1_RUN_KEYFRAME_INTERVAL", 4),
+        ):
+            with MODULE.StateSession() as session:
+                for ts in range(1, 15):
+                    MODULE.save_state(run(ts), state=session)
+            stored = json.loads(Path(MODULE.STATE_FILE).read_text(encoding="utf-8"))
+            history = MODULE.load_state()["runs"]
+
+        entries = stored["runHistory"]["entries"]
+        self.assertEqual([entry["ts"] for entry in entries], list(range(5, 15)))
+        self.assertEqual(["keyframe" in entry for entry in entries], [True, False, False, False] * 2 + [True, False])
+        self.assertEqual(entries[1]["delta"][0], [["ts"], 6])
+
+        self.assertIsInstance(history, MODULE.RunHistory)
+        self.assertEqual(history[-1], run(14))
+        self.assertEqual(set(history._interned), {9})
+        self.assertEqual(MODULE.runs_since(history, 12), [run(12), run(13), run(14)])
+        self.assertEqual(history, [run(ts) for ts in range(5, 15)])
+        self.assertEqual(MODULE.get_previous_snapshot({"runs": history}), run(14))
+
+    def test_session_converts_plain_run_list_to_history_once(self) -> None:
+        legacy = [{"ts": ts, "runAt": f"run-{ts}", "counts": {"open": 1}} for ts in (1, 2)]
+        with (
+            tempfile.TemporaryDirectory() as tmp,
+            patch.object(MODULE, "STATE_FILE", str(Path(tmp) / "state.json")),
+            patch.object(MODULE, "MAX_STATE_RUNS", 3),
+            patch.object(MODULE, "TASK1_RUN_KEYFRAME_INTERVAL", 2),
+        ):
+            Path(MODULE.STATE_FILE).write_text(json.dumps({"runs": legacy}), encoding="utf-8")
+            with MODULE.StateSession() as session:
+                self.assertIsInstance(session.state["runs"], list)
+                MODULE.save_state({"ts": 3, "runAt": "run-3", "counts": {"open": 2}}, state=session)
+                history = session.state["runs"]
+                self.assertIsInstance(history, MODULE.RunHistory)
+                session.flush()
+                encoded_first = history.entries[0]
+
+                with patch.object(MODULE, "intern_run", wraps=MODULE.intern_run) as intern_mock:
+                    MODULE.save_state({"ts": 4, "runAt": "run-4", "counts": {"open": 2}}, state=session)
+                    session.flush()
+
+        self.assertIs(session.state["runs"], history)
+        # Only the appended run (and latestRun) are interned again; older entries keep their encoding.
+        self.assertEqual(intern_mock.call_count, 2)
+        # Trimming to 3 runs would split the 1-2 keyframe group, so it is kept whole.
+        self.assertEqual([entry["ts"] for entry in history.entries], [1, 2, 3, 4])
+        self.assertIs(history.entries[0], encoded_first)
+        self.assertEqual(["keyframe" in entry for entry in history.entries], [True, False, True, False])
+
+    def test_rollup_buckets_answer_reports_beyond_raw_run_retention(self) -> None:
+        start_ts = 1700006400  # midnight UTC
+        with (
+            tempfile.TemporaryDirectory() as tmp,
+            patch.object(MODULE, "STATE_FILE", str(Path(tmp) / "state.json")),
+            patch.object(MODULE, "MAX_STATE_RUNS", 6),
+            patch.object(MODULE, "TASK1_RUN_KEYFRAME_INTERVAL", 1),
+        ):
+            with MODULE.StateSession() as session:
+                # Three runs an hour for two days, each with one open issue and one signal.
+                for index in range(144):
+                    ts = start_ts + index * 1200
+                    run = {"ts": ts, "runAt": MODULE.iso_utc(ts), "counts": {"open": 1, "changeRequests": index % 2}, "signals": ["x"]}
+                    MODULE.save_state(run, state=session)
+            with patch.object(MODULE.time, "time", return_value=start_ts + 48 * 3600):
+                week_report = MODULE.run_report(hours=168)
+                hour_report = MODULE.run_report(hours=1)
+            rollups = MODULE.load_state()["rollups"]
+
+            with (
+                patch.object(MODULE, "TASK1_HOURLY_ROLLUP_MAX_BYTES", 2000),
+                patch.object(MODULE.time, "time", return_value=start_ts + 48 * 3600),
+            ):
+                state = {"runs": [run], "rollups": {}}
+                for index in range(144):
+                    MODULE.update_rollups(state["rollups"], {"ts": start_ts + index * 1200, "counts": {"open": 1}, "signals": []})
+                trimmed_runs, trimmed_totals, tiers = MODULE.rollup_window(state["rollups"], start_ts)
+
+        self.assertEqual(len(rollups["hourly"]), 48)
+        self.assertEqual(len(rollups["daily"]), 2)
+        self.assertEqual((rollups["hourly"][0]["start"], rollups["hourly"][0]["runs"]), (start_ts, 3))
+        self.assertEqual(rollups["hourly"][0]["totals"]["totalChangeRequests"], 1)
+        self.assertEqual(rollups["hourly"][0]["max"]["totalChangeRequests"], 1)
+        self.assertIn("Task-1 report (168h): 144 scan runs", week_report)
+        # The last two hours are answered by the six retained raw runs.
+        self.assertIn("Aggregated from rollups: 46 hourly + 0 daily buckets", week_report)
+        self.assertIn("Total open issues requiring handling: 144", week_report)
+        self.assertIn("Total PRs with CHANGES_REQUESTED: 72", week_report)
+        self.assertIn("Task-1 report (1h): 3 scan runs", hour_report)
+        self.assertNotIn("Aggregated from rollups", hour_report)
+
+        self.assertLess(tiers["hourly"], 24)
+        # The second day straddles the oldest hourly bucket and contributes its uncovered part.
+        self.assertEqual(tiers["daily"], 2)
+        self.assertEqual(trimmed_runs, 144)
+        self.assertEqual(trimmed_totals["totalOpen"], 144)
+
+    def test_report_window_combines_raw_runs_with_older_rollup_buckets(self) -> None:
+        hour = 1700006400 + 10 * 3600
+
+        def bucket(start: int, runs: int) -> dict:
+            return {"start": start, "runs": runs, "totals": {"totalOpen": runs, "totalSignals": 0}, "max": {}, "last": {}}
+
+        def raw(ts: int) -> dict:
+            return {"ts": ts, "runAt": MODULE.iso_utc(ts), "counts": {"open": 1}, "signals": []}
+
+        # Two young runs inside one hourly bucket: the window must not lose them to the rollups.
+        young = [raw(hour + 1800), raw(hour + 3000)]
+        state = {"runs": young, "rollups": {"hourly": [bucket(hour, 2)], "daily": [bucket(hour - hour % 86400, 2)]}}
+        with patch.object(MODULE.time, "time", return_value=hour + 4200):
+            young_report = MODULE.run_report(hours=1, state=state)
+        self.assertIn("Task-1 report (1h): 2 scan runs", young_report)
+        self.assertNotIn("Aggregated from rollups", young_report)
+
+        # Raw runs from before rollups existed, plus older buckets: the bucket holding the cutoff
+        # counts whole, the one straddling the oldest raw run only for its rolled-up-only run.
+        older = [raw(hour - 2 * 3600 + 1800), raw(hour - 3600 + 1800), raw(hour + 1800)]
+        rollups = {"hourly": [bucket(hour - 4 * 3600, 3), bucket(hour - 3 * 3600, 3), bucket(hour - 2 * 3600, 2)]}
+        with patch.object(MODULE.time, "time", return_value=hour + 2400):
+            mixed_report = MODULE.run_report(hours=4, state={"runs": older, "rollups": rollups})
+        self.assertIn("Task-1 report (4h): 10 scan runs", mixed_report)
+        self.assertIn("Aggregated from rollups: 3 hourly + 0 daily buckets", mixed_report)
+        self.assertIn("Total open issues requiring handling: 10", mixed_report)
+
+    def test_change_probe_reuses_latest_run_until_a_time_threshold_is_crossed(self) -> None:
+        now_ts = 1700000000
+        probe = {"issues": {"totalCount": 3, "maxUpdatedAt": "2023-11-14T20:00:00Z"}, "prs": {"totalCount": 1, "maxUpdatedAt": "2023-11-14T20:00:00Z"}}
+        # Updated just under 24h before the previous run: the stale threshold falls between the two runs.
+        pr = {"number": 5, "headSha": "a" * 40, "reviewDecision": "REVIEW_REQUIRED", "updatedAt": MODULE.iso_utc(now_ts - 600 - 24 * 3600 + 300), "author": None}
+        last_run = {"ts": now_ts - 600, "runAt": MODULE.iso_utc(now_ts - 600), "openPrs": [pr], "counts": {"openPrs": 1}, "pollingIntervalMinutes": 20}
+        args = MODULE.argparse.Namespace(only_changes=True, hours=1, comment_pr=None, digest_issue=None)
+
+        def run_cycle(run: dict) -> tuple[MagicMock, dict]:
+            with (
+                tempfile.TemporaryDirectory() as tmp,
+                patch.object(MODULE, "STATE_FILE", str(Path(tmp) / "state.json")),
+                patch.object(MODULE, "TASK1_STATE_BACKEND", "json"),
+                patch.object(MODULE, "probe_remote_changes", return_value=probe),
+                patch.object(MODULE, "analyze", side_effect=RuntimeError("full scan")) as analyze_mock,
+                patch.object(MODULE.time, "time", return_value=now_ts),
+                patch("builtins.print"),
+            ):
+                MODULE.write_state({"runs": [run], "latestRun": run, "remoteProbe": probe})
+                with MODULE.StateSession() as session:
+                    try:
+                        MODULE.run_scan_cycle(args, session, report=True)
+                    except RuntimeError:
+                        pass
+            return analyze_mock, session.state
+
+        fresh_pr = {**pr, "updatedAt": MODULE.iso_utc(now_ts - 3600)}
+        analyze_mock, state = run_cycle({**last_run, "openPrs": [fresh_pr]})
+        analyze_mock.assert_not_called()
+        self.assertEqual(state["consecutiveNoUpdateSkips"], 1)
+        self.assertEqual(state["nextActionAt"], MODULE.iso_utc(now_ts + 20 * 60))
+
+        analyze_mock, _ = run_cycle(last_run)
+        analyze_mock.assert_called_once()
+
+    def test_change_probe_bypasses_response_cache_and_is_skipped_for_event_driven_scans(self) -> None:
+        with patch.object(MODULE, "run_graphql", return_value={"repository": {}}) as graphql_mock:
+            MODULE.probe_remote_changes()
+        self.assertFalse(graphql_mock.call_args.kwargs["use_cache"])
+
+        args = MODULE.argparse.Namespace(only_changes=True, hours=1, comment_pr=None, digest_issue=None)
+        with (
+            tempfile.TemporaryDirectory() as tmp,
+            patch.object(MODULE, "STATE_FILE", str(Path(tmp) / "state.json")),
+            patch.object(MODULE, "refresh_rate_budget"),
+            patch.object(MODULE, "probe_remote_changes") as probe_mock,
+            patch.object(MODULE, "analyze", side_effect=RuntimeError("full scan")) as analyze_mock,
+        ):
+            with MODULE.StateSession() as session:
+                with self.assertRaises(RuntimeError):
+                    MODULE.run_scan_cycle(args, session, report=True, event_driven=True)
+        probe_mock.assert_not_called()
+        self.assertTrue(analyze_mock.call_args.kwargs["event_driven"])
+
+    def test_next_action_tracks_earliest_pr_threshold_and_should_run_gates_on_it(self) -> None:
+        now_ts = 1700000000
+        snapshot = {
+            "openPrs": [
+                {"number": 1, "reviewDecision": "APPROVED", "updatedAt": MODULE.iso_utc(now_ts - 3600), "author": "owner"},
+                {"number": 2, "reviewDecision": None, "updatedAt": MODULE.iso_utc(now_ts - 30 * 3600), "author": "owner"},
+            ],
+            # PR 1 hits the 48h approved reminder 10 minutes from now, before the 120-minute poll.
+            "prState": {"1": {"approvedAt": now_ts - 48 * 3600 + 600}, "2": {"approvedAt": None}},
+            "pollingIntervalMinutes": 120,
+        }
+
+        MODULE.schedule_next_action(snapshot, now_ts)
+
+        self.assertEqual(snapshot["nextActionAt"], MODULE.iso_utc(now_ts + 600))
+        self.assertEqual(snapshot["nextDeadline"], {"at": MODULE.iso_utc(now_ts + 600), "pr": 1, "threshold": "approved_but_unmerged_reminder"})
+
+        snapshot["prState"] = {}
+        MODULE.schedule_next_action(snapshot, now_ts)
+        self.assertEqual(snapshot["nextActionAt"], MODULE.iso_utc(now_ts + 120 * 60))
+        self.assertEqual(snapshot["nextDeadline"]["threshold"], "stable_terminal")
+
+        with (
+            patch.object(MODULE, "load_state", return_value={"nextActionAt": MODULE.iso_utc(now_ts + 600)}),
+            patch.object(MODULE, "run_gh") as run_gh_mock,
+            patch("builtins.print"),
+        ):
+            self.assertEqual(MODULE.run_should_run(now_ts), 1)
+            self.assertEqual(MODULE.run_should_run(now_ts + 600), 0)
+        run_gh_mock.assert_not_called()
+
+    def test_webhook_server_verifies_signatures_and_deliveries_patch_entity_tables(self) -> None:
+        secret = "s3cret"
+        review_payload = {
+            "action": "submitted",
+            "review": {"state": "approved"},
+            "pull_request": {
+                "number": 801,
+                "title": "webhook PR",
+                "html_url": "https://example.com/pr/801",
+                "state": "open",
+                "head": {"ref": "a", "sha": "c" * 40},
+                "updated_at": "2023-11-14T22:00:00Z",
+                "user": {"login": "owner"},
+            },
+        }
+        body = json.dumps(review_payload).encode("utf-8")
+        signature = "sha256=" + MODULE.hmac.new(secret.encode("utf-8"), body, MODULE.hashlib.sha256).hexdigest()
+        events = MODULE.queue.Queue()
+        server = MODULE.make_webhook_server(("127.0.0.1", 0), secret, events)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            statuses = []
+            for headers in (
+                {"X-GitHub-Event": "pull_request_review", "X-Hub-Signature-256": "sha256=" + "0" * 64},
+                {"X-GitHub-Event": "pull_request_review", "X-Hub-Signature-256": signature},
+            ):
+                conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+                conn.request("POST", "/", body=body, headers=headers)
+                statuses.append(conn.getresponse().status)
+                conn.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.assertEqual(statuses, [401, 202])
+        self.assertEqual(events.get_nowait(), ("pull_request_review", review_payload))
+        self.assertTrue(events.empty())
+
+        state = {
+            "entityTables": {"pr": {"801": {"number": 801, "reviewDecision": "REVIEW_REQUIRED", "headRefOid": "a" * 40}, "900": {"number": 900}}, "issue": {"30": {"number": 30}}},
+            "syncWatermarks": {"pr": "2023-11-14T20:00:00Z", "issue": "2023-11-14T19:00:00Z"},
+            "lastFullSyncAt": 1700000000 - 600,
+            "sourcePrState": {"900": {"state": "OPEN", "checkedAt": 1700000000 - 60}},
+        }
+        self.assertTrue(MODULE.apply_webhook_event(state, "pull_request_review", review_payload, 1700000000))
+        self.assertTrue(MODULE.apply_webhook_event(state, "pull_request", {"action": "closed", "pull_request": {"number": 900, "state": "closed", "merged_at": "2023-11-14T22:00:00Z"}}, 1700000000))
+        self.assertTrue(MODULE.apply_webhook_event(state, "issues", {"action": "closed", "issue": {"number": 30, "state": "closed"}}, 1700000000))
+        self.assertEqual(state["sourcePrState"]["900"], {"state": "MERGED", "checkedAt": 1700000000})
+
+        with (
+            patch.object(MODULE, "run_graphql") as graphql_mock,
+            patch.object(MODULE, "list_json") as list_json_mock,
+            patch.object(MODULE, "count_test_files", return_value=10),
+            patch.object(MODULE, "read_docs_superseded_count", return_value=1),
+            patch.object(MODULE.time, "time", return_value=1700000000),
+        ):
+            snapshot = MODULE.analyze(state=state, event_driven=True)
+
+        graphql_mock.assert_not_called()
+        list_json_mock.assert_not_called()
+        self.assertEqual(snapshot["syncMode"], "event")
+        self.assertEqual([(pr["number"], pr["headSha"], pr["reviewDecision"]) for pr in snapshot["openPrs"]], [(801, "c" * 40, "APPROVED")])
+        self.assertEqual(snapshot["entityTables"]["issue"], {})
+
+    def test_sqlite_backend_persists_webhook_patches_without_touching_state_file(self) -> None:
+        tables = {"pr": {"801": {"number": 801, "reviewDecision": "REVIEW_REQUIRED", "headRefOid": "a" * 40}}, "issue": {"30": {"number": 30}}}
+        legacy = {"runs": [], "idleStreak": 3}
+        closed_issue = {"action": "closed", "issue": {"number": 30, "state": "closed"}}
+        with tempfile.TemporaryDirectory() as tmp:
+            state_file = Path(tmp) / "state.json"
+            state_file.write_text(json.dumps(legacy), encoding="utf-8")
+            with (
+                patch.object(MODULE, "STATE_FILE", str(state_file)),
+                patch.object(MODULE, "TASK1_STATE_BACKEND", "sqlite"),
+                patch.object(MODULE, "TASK1_STATE_DB_FILE", str(Path(tmp) / "state.sqlite3")),
+                patch.object(MODULE, "write_state") as write_state_mock,
+            ):
+                try:
+                    MODULE.save_metadata({"entityTables": tables, "sourcePrState": {}})
+                    with MODULE.StateSession(mode="webhook") as session:
+                        self.assertTrue(MODULE.apply_webhook_delivery(session, "issues", closed_issue, 1700000000))
+                        self.assertFalse(session.dirty)
+                        persisted = MODULE.get_state_db().metadata()
+                finally:
+                    MODULE.close_state_db()
+            legacy_file = json.loads(state_file.read_text(encoding="utf-8"))
+
+        write_state_mock.assert_not_called()
+        self.assertEqual(legacy_file, legacy)
+        self.assertEqual(persisted["entityTables"]["issue"], {})
+        self.assertIn("801", persisted["entityTables"]["pr"])
+
+    def test_low_rate_limit_budget_degrades_to_lightweight_classification(self) -> None:
+        issue = {"number": 7, "title": "bound", "url": "https://example.com/7", "body": "Source PR: https://github.com/Keith-CY/fiber-link/pull/300", "labels": []}
+        pr = {"number": 301, "title": "pr", "url": "https://example.com/pr/301", "reviewDecision": None, "headRefName": "x", "headRefOid": "x" * 40, "updatedAt": "2023-11-14T22:00:00Z", "author": {"login": "owner"}}
+        budget = MODULE.RateLimitBudget()
+        budget.update_from_rate_limit({"resources": {"core": {"remaining": 42, "limit": 5000, "reset": 1700001000}, "graphql": {"remaining": 4000, "limit": 5000}}})
+
+        with (
+            patch.object(MODULE, "_RATE_BUDGET", budget),
+            patch.object(MODULE, "list_json", side_effect=lambda resource: [pr] if resource == "pr" else [issue]),
+            patch.object(MODULE, "fetch_pr_state") as fetch_pr_state_mock,
+            patch.object(MODULE, "count_test_files", return_value=10),
+            patch.object(MODULE, "read_docs_superseded_count", return_value=1),
+            patch.object(MODULE.time, "time", return_value=1700000000),
+        ):
+            snapshot = MODULE.analyze(state={})
+
+        fetch_pr_state_mock.assert_not_called()
+        self.assertEqual(snapshot["queryMode"], "lightweight")
+        self.assertIn("rate_limit_budget_low", snapshot["signals"])
+        self.assertEqual(snapshot["openUnbound"][0]["reason"], "source-pr-not-open")
+        self.assertEqual(snapshot["metrics"]["rateLimitRemainingCore"], 42)
+        self.assertEqual(snapshot["metrics"]["rateLimitRemainingGraphql"], 4000)
+
+        rate_limited = MODULE.subprocess.CalledProcessError(1, ["gh"], stderr="HTTP 403: API rate limit exceeded")
+        with (
+            patch.object(MODULE, "_RATE_BUDGET", MODULE.RateLimitBudget(max_retries=2, sleep=lambda seconds: None)),
+            patch.object(MODULE.subprocess, "run", side_effect=rate_limited) as run_mock,
+        ):
+            self.assertIsNone(MODULE.fetch_pr_state(300))
+        self.assertEqual(run_mock.call_count, 3)
+
+        # A throttled lookup falls back to the indexed state (even past its TTL) or the open PR set,
+        # and the unresolved PR keeps its last index entry instead of persisting a placeholder.
+        issues = [
+            {"number": 1, "title": "a", "url": "u1", "body": "Source PR: https://github.com/Keith-CY/fiber-link/pull/300", "labels": []},
+            {"number": 2, "title": "b", "url": "u2", "body": "Source PR: https://github.com/Keith-CY/fiber-link/pull/301", "labels": []},
+        ]
+        index = {"sourcePrState": {"300": {"state": "OPEN", "checkedAt": 1700000000 - 86400}}}
+        with (
+            patch.object(MODULE, "list_json", side_effect=lambda resource: [] if resource == "pr" else issues),
+            patch.object(MODULE, "fetch_pr_state", return_value=None),
+            patch.object(MODULE, "count_test_files", return_value=10),
+            patch.object(MODULE, "read_docs_superseded_count", return_value=1),
+            patch.object(MODULE.time, "time", return_value=1700000000),
+        ):
+            throttled = MODULE.analyze(state=index)
+
+        self.assertEqual([(item["issue"]["number"], item["reason"]) for item in throttled["openUnbound"]], [(2, "source-pr-not-open")])
+        self.assertEqual(throttled["sourcePrState"], {"300": {"state": "OPEN", "checkedAt": 1700000000 - 86400}})
+
+    def test_scan_deadline_falls_back_to_last_run_with_stale_source_marker(self) -> None:
+        now_ts = 1700000000
+        pr = {"number": 5, "headSha": "a" * 40, "reviewDecision": None, "updatedAt": MODULE.iso_utc(now_ts - 7200), "unchangedHours": 1.0}
+        last_run = {"ts": now_ts - 1200, "runAt": MODULE.iso_utc(now_ts - 1200), "openPrs": [pr], "counts": {"openPrs": 1}, "metrics": {}, "signals": []}
+        args = MODULE.argparse.Namespace(only_changes=False, hours=1, comment_pr=None, digest_issue=None)
+        with (
+            tempfile.TemporaryDirectory() as tmp,
+            patch.object(MODULE, "STATE_FILE", str(Path(tmp) / "state.json")),
+            patch.object(MODULE, "refresh_rate_budget"),
+            patch.object(MODULE, "analyze", side_effect=MODULE.ScanTimeout("scan deadline of 900s expired")),
+            patch.object(MODULE.time, "time", return_value=now_ts),
+            patch("builtins.print"),
+        ):
+            MODULE.write_state({"runs": [last_run], "latestRun": last_run})
+            with MODULE.StateSession() as session:
+                MODULE.run_scan_cycle(args, session, report=False)
+            saved = session.state["latestRun"]
+
+        self.assertIsNone(MODULE._SCAN_DEADLINE)
+        self.assertEqual(saved["dataSource"], "stale-source")
+        self.assertEqual(saved["staleSourceRunAt"], last_run["runAt"])
+        self.assertIn("scan_deadline_exceeded", saved["signals"])
+        self.assertEqual(saved["openPrs"][0]["unchangedHours"], 2.0)
+        self.assertEqual(len(session.state["runs"]), 2)
+
+        # A probe taken before the fallback must not be stored next to the stale data it does not describe.
+        probe = {"issues": {"totalCount": 3, "maxUpdatedAt": "2023-11-14T20:00:00Z"}, "prs": {"totalCount": 1, "maxUpdatedAt": "2023-11-14T20:00:00Z"}}
+        changes_args = MODULE.argparse.Namespace(only_changes=True, hours=1, comment_pr=None, digest_issue=None)
+        with (
+            tempfile.TemporaryDirectory() as tmp,
+            patch.object(MODULE, "STATE_FILE", str(Path(tmp) / "state.json")),
+            patch.object(MODULE, "refresh_rate_budget"),
+            patch.object(MODULE, "probe_remote_changes", return_value=probe),
+            patch.object(MODULE, "analyze", side_effect=MODULE.ScanTimeout("scan deadline of 900s expired")),
+            patch.object(MODULE.time, "time", return_value=now_ts),
+            patch("builtins.print"),
+        ):
+            MODULE.write_state({"runs": [last_run], "latestRun": last_run})
+            with MODULE.StateSession() as session:
+                MODULE.run_scan_cycle(changes_args, session, report=True)
+        self.assertNotIn("remoteProbe", session.state)
+
+        timeout = MODULE.subprocess.TimeoutExpired(["gh"], 1.0)
+        with (
+            patch.object(MODULE, "_SCAN_DEADLINE", MODULE.time.monotonic() + 30),
+            patch.object(MODULE.subprocess, "run", side_effect=timeout) as run_mock,
+        ):
+            with self.assertRaises(MODULE.ScanTimeout):
+                MODULE.run_gh(["pr", "view", "5"])
+        self.assertEqual(run_mock.call_count, MODULE.TASK1_GH_CALL_RETRIES + 1)
+        self.assertLessEqual(run_mock.call_args.kwargs["timeout"], 30)
+
+        # A timed-out write may already have been applied, so it is never resent.
+        with (
+            patch.object(MODULE, "TASK1_GITHUB_BACKEND", "gh"),
+            patch.object(MODULE.subprocess, "run", side_effect=timeout) as run_mock,
+        ):
+            with self.assertRaises(MODULE.ScanTimeout):
+                MODULE.create_issue_comment(208, "body")
+        self.assertEqual(run_mock.call_count, 1)
+        self.assertFalse(MODULE.gh_call_is_retry_safe(["api", "-X", "PATCH", "repos/o/r/issues/comments/1", "-f", "body=x"]))
+        self.assertTrue(MODULE.gh_call_is_retry_safe(["api", "graphql", "-f", "query=query { viewer { login } }"]))
+        self.assertTrue(MODULE.gh_call_is_retry_safe(["api", "--paginate", "repos/o/r/issues/1/comments"]))
+
+        with patch.object(MODULE, "_SCAN_DEADLINE", MODULE.time.monotonic() - 1):
+            with self.assertRaises(MODULE.ScanTimeout):
+                MODULE.github_call_timeout()
+
+    def test_scan_records_phase_timings_and_report_shows_percentiles(self) -> None:
+        issue = {"number": 7, "title": "bound", "url": "https://example.com/7", "body": "Source PR: https://github.com/Keith-CY/fiber-link/pull/300", "labels": []}
+        args = MODULE.argparse.Namespace(only_changes=False, hours=1, comment_pr=None, digest_issue=None)
+        gh_result = MODULE.subprocess.CompletedProcess(["gh"], 0, stdout="OPEN\n", stderr="")
+        with (
+            tempfile.TemporaryDirectory() as tmp,
+            patch.object(MODULE, "STATE_FILE", str(Path(tmp) / "state.json")),
+            patch.object(MODULE, "refresh_rate_budget"),
+            patch.object(MODULE, "list_json", side_effect=lambda resource: [] if resource == "pr" else [issue]),
+            patch.object(MODULE.subprocess, "run", return_value=gh_result),
+            patch.object(MODULE, "count_test_files", return_value=10),
+            patch.object(MODULE, "read_docs_superseded_count", return_value=1),
+        ):
+            with MODULE.StateSession() as session:
+                MODULE.run_scan_cycle(args, session, report=False)
+            timings = session.state["latestRun"]["metrics"]["timings"]
+            # A one-shot (cron) run hands its own write timings to the next invocation.
+            with MODULE.StateSession() as session:
+                MODULE.run_scan_cycle(args, session, report=False)
+            next_timings = MODULE.load_state()["latestRun"]["metrics"]["timings"]
+
+        self.assertEqual(
+            set(timings),
+            {"total", "fetchOpenItems", "classifyIssues", "countTestFiles", "readDocsSuperseded", "enrichSnapshot", "publishComments", "stateLoad"},
+        )
+        self.assertEqual((timings["classifyIssues"]["calls"], timings["classifyIssues"]["bytes"]), (1, 5))
+        self.assertEqual(timings["fetchOpenItems"]["calls"], 0)
+        self.assertEqual(timings["total"]["calls"], 1)
+        self.assertLessEqual({"saveState", "stateFlush", "stateLoad"}, set(next_timings))
+
+        runs = [{"metrics": {"timings": {"total": {"seconds": float(n), "calls": n % 3}, "fetchOpenItems": {"seconds": n / 10}}}} for n in range(1, 21)]
+        self.assertEqual(
+            MODULE.format_phase_timings(runs),
+            [
+                "Scan phase timings (p50/p95 over 20 runs):",
+                "  - total: 10.00s/19.00s, GitHub calls 1/2",
+                "  - fetchOpenItems: 1.00s/1.90s, GitHub calls 0/0",
+            ],
+        )
+
+    def test_scan_exports_prometheus_textfile_and_metrics_endpoint(self) -> None:
+        args = MODULE.argparse.Namespace(only_changes=False, hours=1, comment_pr=None, digest_issue=None)
+        with tempfile.TemporaryDirectory() as tmp:
+            textfile = Path(tmp) / "collector" / "monitor.prom"
+            server = MODULE.MetricsServer("127.0.0.1", 0)
+            with (
+                patch.object(MODULE, "STATE_FILE", str(Path(tmp) / "state.json")),
+                patch.object(MODULE, "TASK1_PROMETHEUS_TEXTFILE", str(textfile)),
+                patch.object(MODULE, "_METRICS_SERVER", server),
+                patch.object(MODULE, "refresh_rate_budget"),
+                patch.object(MODULE, "list_json", return_value=[]),
+                patch.object(MODULE, "count_test_files", return_value=10),
+                patch.object(MODULE, "read_docs_superseded_count", return_value=1),
+            ):
+                with MODULE.StateSession() as session:
+                    MODULE.run_scan_cycle(args, session, report=False)
+                exported = textfile.read_text(encoding="utf-8")
+            server.close()
+
+        self.assertEqual(server.text, exported)
+        self.assertIn('fiber_link_monitor_count{name="open"} 0\n', exported)
+        self.assertIn('fiber_link_monitor_phase_seconds{phase="total"}', exported)
+
+    def test_serve_mode_caches_state_and_answers_conditional_requests(self) -> None:
+        now = int(MODULE.time.time())
+        run = {
+            "ts": now - 60,
+            "runAt": MODULE.iso_utc(now - 60),
+            "counts": {"open": 1, "openPrs": 1},
+            "signals": ["stale_open_pr"],
+            "openPrs": [{"number": 300, "title": "pending", "url": "https://example.com/300", "reviewDecision": "APPROVED", "headSha": "a" * 40}],
+            "prState": {"300": {"headSha": "a" * 40, "reviewDecision": "APPROVED", "noUpdateStreak": 2, "noUpdateHours": 3.0, "approvedAt": now - 7200}},
+        }
+
+        def get(conn, path: str, headers: dict | None = None):
+            conn.request("GET", path, headers=headers or {})
+            response = conn.getresponse()
+            body = response.read()
+            return response.status, response.getheader("ETag"), json.loads(body) if body else None
+
+        with tempfile.TemporaryDirectory() as tmp, patch.object(MODULE, "STATE_FILE", str(Path(tmp) / "state.json")):
+            MODULE.write_state({"runs": [run], "latestRun": run, "sourcePrState": {"301": {"state": "MERGED", "checkedAt": now}}})
+            server = MODULE.make_state_query_server(("127.0.0.1", 0))
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+            try:
+                with patch.object(MODULE, "load_state", wraps=MODULE.load_state) as load_mock:
+                    status, etag, latest = get(conn, "/latest")
+                    self.assertEqual((status, latest["run"]["runAt"]), (200, run["runAt"]))
+                    self.assertIn("stale_open_pr", latest["summary"])
+                    self.assertEqual(get(conn, "/latest", {"If-None-Match": etag}), (304, etag, None))
+
+                    status, _, pr = get(conn, "/prs/300")
+                    self.assertEqual((status, pr["runtimeState"]["noUpdateStreak"], pr["openPr"]["title"]), (200, 2, "pending"))
+                    self.assertEqual(get(conn, "/prs/301")[2]["sourcePrState"]["state"], "MERGED")
+                    self.assertEqual(get(conn, "/prs/999")[0], 404)
+
+                    status, _, report = get(conn, "/report?hours=2")
+                    self.assertEqual((status, report["hours"]), (200, 2))
+                    self.assertIn("Task-1 report (2h): 1 scan runs", report["report"])
+                    self.assertEqual(get(conn, "/report?hours=zero")[0], 400)
+                    self.assertEqual(load_mock.call_count, 1)
+
+                    newer = {**run, "ts": now, "runAt": MODULE.iso_utc(now), "signals": []}
+                    MODULE.write_state({"runs": [run, newer], "latestRun": newer})
+                    status, new_etag, latest = get(conn, "/latest", {"If-None-Match": etag})
+                    self.assertEqual((status, latest["run"]["runAt"]), (200, newer["runAt"]))
+                    self.assertNotEqual(new_etag, etag)
+                    self.assertEqual(load_mock.call_count, 2)
+            finally:
+                conn.close()
+                server.shutdown()
+                server.server_close()
+
+    def test_serve_mode_drops_idle_clients_instead_of_blocking_queries(self) -> None:
+        run = {"ts": 1700000000, "runAt": MODULE.iso_utc(1700000000), "counts": {"open": 0}, "signals": []}
+        with (
+            tempfile.TemporaryDirectory() as tmp,
+            patch.object(MODULE, "STATE_FILE", str(Path(tmp) / "state.json")),
+            patch.object(MODULE.StateQueryRequestHandler, "timeout", 0.2),
+        ):
+            MODULE.write_state({"runs": [run], "latestRun": run})
+            server = MODULE.make_state_query_server(("127.0.0.1", 0))
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            idle = socket.create_connection(server.server_address, timeout=5)
+            conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+            try:
+                conn.request("GET", "/latest")
+                response = conn.getresponse()
+                response.read()
+                self.assertEqual(response.status, 200)
+                self.assertEqual(idle.recv(1), b"")
+            finally:
+                idle.close()
+                conn.close()
+                server.shutdown()
+                server.server_close()
+
+    def test_snapshot_reuse_window_rebuilds_from_persisted_fetch_without_github_calls(self) -> None:
+        t0 = 1_700_000_000
+        pr = {"number": 300, "title": "approved", "url": "https://example.com/300", "reviewDecision": "APPROVED", "headRefOid": "a" * 40, "updatedAt": MODULE.iso_utc(t0 - 3600), "body": "long body"}
+        issue = {"number": 7, "title": "bound", "url": "https://example.com/7", "body": "Source PR: https://github.com/Keith-CY/fiber-link/pull/300", "labels": []}
+
+        def analyze_at(ts: int, state: dict, **patches) -> dict:
+            with (
+                patch.object(MODULE.time, "time", return_value=ts),
+                patch.object(MODULE, "count_test_files", return_value=10),
+                patch.object(MODULE, "read_docs_superseded_count", return_value=1),
+                patch.object(MODULE, "TASK1_SNAPSHOT_MAX_AGE_SECONDS", 300),
+                patch.multiple(MODULE, **patches),
+            ):
+                snapshot = MODULE.analyze(state=state)
+            MODULE.save_state(snapshot, state=state)
+            return snapshot
+
+        fetch = MagicMock(side_effect=lambda resource: [pr] if resource == "pr" else [issue])
+        with tempfile.TemporaryDirectory() as tmp, patch.object(MODULE, "STATE_FILE", str(Path(tmp) / "state.json")):
+            state = {"runs": []}
+            first = analyze_at(t0, state, list_json=fetch)
+            self.assertEqual(fetch.call_count, 2)
+            self.assertEqual(state["lastFetchAt"], t0)
+            self.assertNotIn("body", state["entityTables"]["pr"]["300"])
+
+            no_github = MagicMock(side_effect=AssertionError("GitHub must not be called inside the reuse window"))
+            analyze_at(t0 + 60, state, list_json=no_github, fetch_pr_state=no_github)
+            reused = analyze_at(t0 + 240, state, list_json=no_github, fetch_pr_state=no_github)
+            self.assertEqual(state["lastFetchAt"], t0)
+            refetched = analyze_at(t0 + 360, state, list_json=fetch)
+
+        self.assertNotIn("dataSource", first)
+        self.assertEqual(reused["dataSource"], "reused-fetch")
+        self.assertEqual(reused["reusedFetchAt"], MODULE.iso_utc(t0))
+        self.assertEqual(reused["openPrs"][0]["unchangedHours"], round((3600 + 240) / 3600, 2))
+        self.assertEqual(reused["prState"][300]["noUpdateStreak"], 1)
+        self.assertEqual(reused["counts"]["open"], 0)
+        self.assertIn("dataSource: reused-fetch", MODULE.summarize(reused))
+        self.assertEqual(fetch.call_count, 4)
+        self.assertNotIn("dataSource", refetched)
+        self.assertEqual(refetched["prState"][300]["noUpdateStreak"], 2)
+
+    def test_pr_event_log_drives_change_detection_and_exact_approval_time(self) -> None:
+        t0 = 1_700_000_000
+        approved_ts = t0 - 5 * 3600
+        pr = {"number": 900, "title": "timeline", "url": "https://example.com/900", "reviewDecision": "APPROVED", "headRefOid": "a" * 40, "updatedAt": MODULE.iso_utc(approved_ts)}
+
+        def scan_at(ts: int, state: dict, prs: list) -> tuple:
+            with (
+                patch.object(MODULE.time, "time", return_value=ts),
+                patch.object(MODULE, "list_json", side_effect=lambda resource: prs if resource == "pr" else []),
+                patch.object(MODULE, "count_test_files", return_value=10),
+                patch.object(MODULE, "read_docs_superseded_count", return_value=1),
+                patch.object(MODULE, "TASK1_PR_EVENT_LOG_MAX_EVENTS", 4),
+            ):
+                snapshot = MODULE.analyze(state=state)
+                change = MODULE.enrich_snapshot(snapshot, state)
+            MODULE.save_state(snapshot, state=state)
+            return snapshot, change
+
+        with tempfile.TemporaryDirectory() as tmp, patch.object(MODULE, "STATE_FILE", str(Path(tmp) / "state.json")):
+            state = {"runs": []}
+            first, _ = scan_at(t0, state, [pr])
+            unchanged, _ = scan_at(t0 + 1200, state, [pr])
+            _, steady_change = scan_at(t0 + 1500, state, [pr])
+            pushed_ts = t0 + 1800
+            pushed = {**pr, "headRefOid": "b" * 40, "reviewDecision": "CHANGES_REQUESTED", "updatedAt": MODULE.iso_utc(pushed_ts)}
+            changed, change = scan_at(t0 + 2400, state, [pushed])
+            closed, closed_change = scan_at(t0 + 3600, state, [])
+            log = state["prEventLog"]
+
+        self.assertEqual([(event["type"], event["ts"]) for event in first["prEvents"]], [("opened", approved_ts), ("approved", approved_ts)])
+        self.assertEqual(first["prState"][900]["approvedAt"], approved_ts)
+        self.assertEqual(first["openPrs"][0]["approvedButUnmergedHours"], 5.0)
+        self.assertEqual(unchanged["prEvents"], [])
+        self.assertEqual(unchanged["openPrs"][0]["approvedButUnmergedHours"], round((5 * 3600 + 1200) / 3600, 2))
+        self.assertFalse(steady_change["changed"])
+        self.assertEqual(
+            [(event["type"], event.get("from"), event["ts"]) for event in changed["prEvents"]],
+            [("head_changed", "a" * 40, pushed_ts), ("review_changed", "APPROVED", pushed_ts)],
+        )
+        self.assertTrue({"reviewDecision", "sha"} <= set(change["sources"]))
+        self.assertEqual(change["details"]["prEvents"], changed["prEvents"])
+        self.assertIsNone(changed["prState"][900]["approvedAt"])
+        self.assertEqual([event["type"] for event in closed["prEvents"]], ["closed"])
+        self.assertTrue({"reviewDecision", "sha"} <= set(closed_change["sources"]))
+        self.assertEqual(changed["metrics"]["prEventCount"], 2)
+        self.assertEqual([event["type"] for event in log], ["approved", "head_changed", "review_changed", "closed"])
+
+        prior = {900: {"headSha": "a" * 40, "reviewDecision": "APPROVED", "noUpdateStreak": 1, "noUpdateHours": 0.0}}
+        event_log = [{"ts": approved_ts, "observedAt": t0, "pr": 900, "type": "approved"}]
+        normalized = MODULE.normalize_pr(pr, t0 + 7200)
+        _, next_state, *_ = MODULE.build_pr_runtime_state([normalized], prior, t0 + 7200, event_log=event_log)
+        self.assertEqual(next_state[900]["approvedAt"], approved_ts)
+
+    def test_reused_probe_run_advances_idle_streak_into_digest_mode(self) -> None:
+        now_ts = 1700000000
+        probe = {"issues": {"totalCount": 0, "maxUpdatedAt": None}, "prs": {"totalCount": 0, "maxUpdatedAt": None}}
+        last_run = {"ts": now_ts - 600, "runAt": MODULE.iso_utc(now_ts - 600), "openPrs": [], "counts": {"openPrs": 0}, "metrics": {"idleStreak": 2}, "idleStreak": 2}
+        streak = MODULE.TASK1_IDLE_DIGEST_STREAK_THRESHOLD - 1
+        args = MODULE.argparse.Namespace(only_changes=True, hours=1, comment_pr=None, digest_issue=None)
+        with (
+            tempfile.TemporaryDirectory() as tmp,
+            patch.object(MODULE, "STATE_FILE", str(Path(tmp) / "state.json")),
+            patch.object(MODULE, "TASK1_STATE_BACKEND", "json"),
+            patch.object(MODULE, "refresh_rate_budget"),
+            patch.object(MODULE, "probe_remote_changes", return_value=probe),
+            patch.object(MODULE, "analyze", side_effect=AssertionError("full scan")),
+            patch.object(MODULE.time, "time", return_value=now_ts),
+            patch("builtins.print"),
+        ):
+            MODULE.write_state({"runs": [last_run], "latestRun": last_run, "remoteProbe": probe, "idleStreak": streak})
+            with MODULE.StateSession() as session:
+                MODULE.run_scan_cycle(args, session, report=True)
+            saved = MODULE.load_state()
+
+        self.assertEqual(saved["idleStreak"], streak + 1)
+        self.assertTrue(saved["idleDigestMode"])
+        self.assertEqual(saved["latestRun"]["metrics"], {"idleStreak": 2})
+
+    def test_fetch_workers_are_long_lived_and_dead_thread_clients_are_retired(self) -> None:
+        def make_client(**_kwargs) -> MagicMock:
+            client = MagicMock()
+            client.stats = {"requests": 1, "bytesReceived": 10, "retries": 0}
+            return client
+
+        with (
+            patch.object(MODULE, "TASK1_FETCH_CONCURRENCY", 2),
+            patch.object(MODULE, "GitHubHttpClient", side_effect=make_client),
+            patch.object(MODULE, "build_http_cache"),
+            patch.object(MODULE, "_HTTP_CLIENTS", {}),
+            patch.object(MODULE, "_RETIRED_HTTP_STATS", {"requests": 0, "bytesReceived": 0, "retries": 0}),
+        ):
+            try:
+                barrier = threading.Barrier(2, timeout=5)
+
+                def fetch() -> threading.Thread:
+                    barrier.wait()
+                    MODULE.get_http_client()
+                    return threading.current_thread()
+
+                first = set(MODULE.run_concurrently([fetch, fetch]))
+                second = set(MODULE.run_concurrently([fetch, fetch]))
+                self.assertEqual(first, second)
+                self.assertEqual(set(MODULE._HTTP_CLIENTS), first)
+
+                worker = threading.Thread(target=MODULE.get_http_client)
+                worker.start()
+                worker.join()
+                before = MODULE.github_call_totals()
+                MODULE.get_http_client()
+                self.assertNotIn(worker, MODULE._HTTP_CLIENTS)
+                self.assertEqual(len(MODULE._HTTP_CLIENTS), 3)
+                self.assertEqual(MODULE.github_call_totals()["calls"], before["calls"] + 1)
+            finally:
+                MODULE.close_http_client()
+        self.assertIsNone(MODULE._FETCH_EXECUTOR)
+
+    def test_daemon_survives_unexpected_cycle_errors_but_not_interrupts(self) -> None:
+        args = MODULE.argparse.Namespace(daemon_cycle="scan", only_changes=False, hours=1, comment_pr=None, digest_issue=None)
+        failures = [KeyError("latestRun"), KeyboardInterrupt()]
+
+        def failing_cycle(*_args, **_kwargs) -> None:
+            os.kill(os.getpid(), signal.SIGHUP)
+            raise failures.pop(0)
+
+        with (
+            tempfile.TemporaryDirectory() as tmp,
+            patch.object(MODULE, "STATE_FILE", str(Path(tmp) / "state.json")),
+            patch.object(MODULE, "run_scan_cycle", side_effect=failing_cycle) as cycle_mock,
+            patch.object(MODULE.traceback, "print_exc") as print_exc_mock,
+            patch("builtins.print"),
+        ):
+            with self.assertRaises(KeyboardInterrupt):
+                MODULE.run_daemon(args, max_cycles=5)
+
+        self.assertEqual(cycle_mock.call_count, 2)
+        print_exc_mock.assert_called_once()
+        self.assertIs(signal.getsignal(signal.SIGHUP), signal.SIG_DFL)
+
     def test_build_audit_delta_comment_includes_key_counts(self) -> None:
         previous = {
             "runAt": "2026-02-22T06:00:00Z",
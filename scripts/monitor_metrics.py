@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""Prometheus exposition for `hourly-review-monitor.py` snapshots.
+
+Contract:
+- Stdlib only; renders the text exposition format (version 0.0.4).
+- `render_prometheus(snapshot)` covers numeric `metrics`/`counts`, active `signals`, polling and
+  query mode, idle streak and the per-phase scan timings recorded under `metrics.timings`.
+- `write_textfile` replaces the target atomically (temp file in the same directory + `os.replace`),
+  so the node_exporter textfile collector never reads a half-written file.
+- `MetricsServer` serves the latest rendered text from memory on `GET /metrics`.
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+PREFIX = "fiber_link_monitor"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+PHASE_FIELDS = (
+    ("seconds", "phase_seconds", "Wall time spent in a scan phase."),
+    ("calls", "phase_github_calls", "GitHub API calls made during a scan phase."),
+    ("bytes", "phase_github_bytes", "GitHub response bytes received during a scan phase."),
+    ("retries", "phase_github_retries", "GitHub call retries during a scan phase."),
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class _Family:
+    def __init__(self, name: str, help_text: str) -> None:
+        self.name = f"{PREFIX}_{name}"
+        self.help_text = help_text
+        self.samples: List[Tuple[Dict[str, str], float]] = []
+
+    def add(self, value: float, **labels: str) -> None:
+        self.samples.append((labels, float(value)))
+
+    def render(self) -> Iterable[str]:
+        if not self.samples:
+            return
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} gauge"
+        for labels, value in self.samples:
+            label_text = ",".join(f'{key}="{_escape(str(label))}"' for key, label in sorted(labels.items()))
+            yield f"{self.name}{{{label_text}}} {value:g}" if label_text else f"{self.name} {value:g}"
+
+
+def render_prometheus(snapshot: dict) -> str:
+    metrics = snapshot.get("metrics") if isinstance(snapshot.get("metrics"), dict) else {}
+    counts = snapshot.get("counts") if isinstance(snapshot.get("counts"), dict) else {}
+
+    last_run = _Family("last_run_timestamp_seconds", "Unix time of the scan this export describes.")
+    metric = _Family("metric", "Numeric snapshot metric by name.")
+    count = _Family("count", "Snapshot item count by name.")
+    signal = _Family("signal_active", "1 for every signal emitted by the scan.")
+    polling = _Family("polling_interval_minutes", "Polling interval chosen by the scan, labelled with the polling mode.")
+    query_mode = _Family("query_mode", "1 for the issue classification mode used by the scan.")
+    idle = _Family("idle_streak", "Consecutive scans with an empty PR queue.")
+    phases = {field: _Family(name, help_text) for field, name, help_text in PHASE_FIELDS}
+
+    if _is_number(snapshot.get("ts")):
+        last_run.add(snapshot["ts"])
+    for name, value in sorted(metrics.items()):
+        if _is_number(value):
+            metric.add(value, name=name)
+    for name, value in sorted(counts.items()):
+        if _is_number(value):
+            count.add(value, name=name)
+    for name in sorted(set(snapshot.get("signals") or [])):
+        signal.add(1, signal=str(name))
+    if _is_number(snapshot.get("pollingIntervalMinutes")):
+        polling.add(snapshot["pollingIntervalMinutes"], mode=str(snapshot.get("pollingMode") or "normal"))
+    query_mode.add(1, mode=str(snapshot.get("queryMode") or metrics.get("queryMode") or "standard"))
+    if _is_number(snapshot.get("idleStreak")):
+        idle.add(snapshot["idleStreak"])
+    timings = metrics.get("timings")
+    for phase, entry in sorted(timings.items() if isinstance(timings, dict) else []):
+        if not isinstance(entry, dict):
+            continue
+        for field, family in phases.items():
+            if _is_number(entry.get(field)):
+                family.add(entry[field], phase=phase)
+
+    families = [last_run, metric, count, signal, polling, query_mode, idle, *phases.values()]
+    return "".join(f"{line}\n" for family in families for line in family.render())
+
+
+def write_textfile(path: str | Path, text: str) -> None:
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{target.name}.", dir=str(target.parent))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        # mkstemp creates 0600 files; the collector usually runs as another user.
+        os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, target)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        data = self.server.metrics.text.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+        return
+
+
+class MetricsServer:
+    """Background `/metrics` endpoint serving the most recently published exposition text."""
+
+    def __init__(self, host: str, port: int) -> None:
+        self._lock = threading.Lock()
+        self._text = ""
+        self.httpd = ThreadingHTTPServer((host, port), _MetricsHandler)
+        self.httpd.metrics = self
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="metrics-server", daemon=True)
+
+    @property
+    def port(self) -> int:
+        return int(self.httpd.server_address[1])
+
+    @property
+    def text(self) -> str:
+        with self._lock:
+            return self._text
+
+    def publish(self, text: str) -> None:
+        with self._lock:
+            self._text = text
+
+    def start(self) -> "MetricsServer":
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""SQLite state store for `hourly-review-monitor.py`.
+
+Contract:
+- Stdlib only (`sqlite3`); selected with `TASK1_STATE_BACKEND=sqlite`.
+- `runs` holds one row per persisted run (JSON payload) with an index on `ts`, so report windows
+  are indexed range scans instead of a linear pass over every stored snapshot.
+- `metrics` flattens numeric `counts.*` / `metrics.*` values per run for ad-hoc SQL queries.
+- `pr_state` keeps the latest per-PR runtime state, `metadata` the top-level state keys.
+- Writes are inserts/upserts inside one transaction; the JSON state file can be imported once.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts INTEGER NOT NULL,
+    run_at TEXT,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_ts ON runs (ts);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (run_id, name)
+);
+CREATE TABLE IF NOT EXISTS pr_state (
+    pr_number INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL,
+    ts INTEGER NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+# Keys owned by the run history rather than by the metadata table.
+RUN_HISTORY_KEYS = {"runs", "latestRun"}
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+
+def numeric_metrics(run: dict) -> Iterable[Tuple[str, float]]:
+    for section in ("counts", "metrics"):
+        values = run.get(section)
+        if not isinstance(values, dict):
+            continue
+        for name, value in values.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                yield f"{section}.{name}", float(value)
+    yield "signals", float(len(run.get("signals") or []))
+
+
+class StateDb:
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def run_count(self) -> int:
+        return int(self.conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0])
+
+    def oldest_run_ts(self) -> int | None:
+        row = self.conn.execute("SELECT MIN(ts) FROM runs").fetchone()
+        return None if row[0] is None else int(row[0])
+
+    def is_empty(self) -> bool:
+        return self.run_count() == 0 and self.conn.execute("SELECT 1 FROM metadata LIMIT 1").fetchone() is None
+
+    def _insert_run(self, run: dict) -> int:
+        cursor = self.conn.execute(
+            "INSERT INTO runs (ts, run_at, payload) VALUES (?, ?, ?)",
+            (int(run.get("ts") or 0), run.get("runAt"), _dumps(run)),
+        )
+        run_id = int(cursor.lastrowid)
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO metrics (run_id, name, value) VALUES (?, ?, ?)",
+            [(run_id, name, value) for name, value in numeric_metrics(run)],
+        )
+        pr_states = run.get("prState")
+        if isinstance(pr_states, dict):
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO pr_state (pr_number, run_id, ts, payload) VALUES (?, ?, ?, ?)",
+                [
+                    (int(pr_number), run_id, int(run.get("ts") or 0), _dumps(details))
+                    for pr_number, details in pr_states.items()
+                    if str(pr_number).isdigit()
+                ],
+            )
+        return run_id
+
+    def _upsert_metadata(self, metadata: Dict[str, Any]) -> None:
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)",
+            [(key, _dumps(value)) for key, value in metadata.items() if key not in RUN_HISTORY_KEYS],
+        )
+
+    def _trim_runs(self, max_runs: int | None) -> None:
+        if max_runs is None:
+            return
+        self.conn.execute(
+            "DELETE FROM runs WHERE id <= (SELECT id FROM runs ORDER BY id DESC LIMIT 1 OFFSET ?)",
+            (max_runs,),
+        )
+
+    def append_run(self, run: dict, metadata: Dict[str, Any] | None = None, max_runs: int | None = None) -> int:
+        with self.conn:
+            run_id = self._insert_run(run)
+            if metadata:
+                self._upsert_metadata(metadata)
+            self._trim_runs(max_runs)
+        return run_id
+
+    def set_metadata(self, metadata: Dict[str, Any]) -> None:
+        with self.conn:
+            self._upsert_metadata(metadata)
+
+    def metadata(self) -> Dict[str, Any]:
+        return {key: json.loads(value) for key, value in self.conn.execute("SELECT key, value FROM metadata")}
+
+    def latest_runs(self, limit: int) -> List[dict]:
+        rows = self.conn.execute("SELECT payload FROM runs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [json.loads(payload) for (payload,) in reversed(rows)]
+
+    def runs_since(self, since_ts: int) -> List[dict]:
+        rows = self.conn.execute("SELECT payload FROM runs WHERE ts >= ? ORDER BY ts, id", (since_ts,))
+        return [json.loads(payload) for (payload,) in rows]
+
+    def pr_states(self) -> Dict[int, dict]:
+        return {int(number): json.loads(payload) for number, payload in self.conn.execute("SELECT pr_number, payload FROM pr_state")}
+
+    def load_state(self) -> dict:
+        """Return the state dict the monitor expects, carrying only the most recent run."""
+        runs = self.latest_runs(1)
+        state: Dict[str, Any] = {"runs": runs}
+        if runs:
+            state["latestRun"] = runs[-1]
+        state.update(self.metadata())
+        return state
+
+    def import_json_state(self, payload: dict, max_runs: int | None = None) -> int:
+        """Copy a legacy JSON state payload into the store; returns the number of imported runs."""
+        runs = [run for run in payload.get("runs") or [] if isinstance(run, dict)]
+        with self.conn:
+            for run in runs:
+                self._insert_run(run)
+            self._upsert_metadata(payload)
+            self._trim_runs(max_runs)
+        return len(runs)
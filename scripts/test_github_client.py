@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import http.client
+import json
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from github_client import GitHubHttpClient, GitHubHttpError, RateLimitBudget, ResponseCache, is_retry_safe  # noqa: E402
+
+
+class StandInGitHubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+        return
+
+    def _respond(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        self.server.requests.append(
+            {
+                "method": self.command,
+                "path": self.path,
+                "headers": dict(self.headers),
+                "body": json.loads(body) if body else None,
+                "clientPort": self.client_address[1],
+            }
+        )
+        route = self.server.routes.get((self.command, self.path), (404, {}, {"message": "Not Found"}))
+        # A list of responses is served in order, one per request.
+        status, headers, payload = route.pop(0) if isinstance(route, list) else route
+        if status is None:
+            # Drop the connection without answering, like a reset keep-alive socket.
+            self.close_connection = True
+            return
+        if headers.get("ETag") and self.headers.get("If-None-Match") == headers["ETag"]:
+            self.send_response(304)
+            self.send_header("ETag", headers["ETag"])
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value.replace("{base}", self.server.base_url))
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = _respond
+    do_POST = _respond
+    do_PATCH = _respond
+
+
+class GitHubHttpClientTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StandInGitHubHandler)
+        self.server.requests = []
+        self.server.routes = {}
+        self.server.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.client = GitHubHttpClient(base_url=self.server.base_url, token="test-token")
+
+    def tearDown(self) -> None:
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_reuses_single_connection_and_sends_token(self) -> None:
+        self.server.routes[("GET", "/repos/o/r/pulls/1")] = (200, {}, {"state": "open"})
+        self.server.routes[("PATCH", "/repos/o/r/issues/comments/7")] = (200, {}, {"id": 7})
+
+        self.assertEqual(self.client.request_json("GET", "repos/o/r/pulls/1"), {"state": "open"})
+        self.assertEqual(self.client.request_json("PATCH", "/repos/o/r/issues/comments/7", {"body": "x"}), {"id": 7})
+        self.assertEqual(self.client.request_json("GET", "/repos/o/r/pulls/1"), {"state": "open"})
+
+        self.assertEqual(self.client.connections_opened, 1)
+        self.assertEqual(len({req["clientPort"] for req in self.server.requests}), 1)
+        self.assertEqual(self.server.requests[0]["headers"]["Authorization"], "Bearer test-token")
+        self.assertEqual(self.server.requests[1]["body"], {"body": "x"})
+
+    def test_dropped_connection_is_resent_only_for_idempotent_requests(self) -> None:
+        self.server.routes[("GET", "/repos/o/r/pulls/1")] = [(None, {}, {}), (200, {}, {"state": "open"})]
+        self.server.routes[("POST", "/repos/o/r/issues/1/comments")] = [(None, {}, {}), (201, {}, {"id": 9})]
+
+        self.assertEqual(self.client.request_json("GET", "/repos/o/r/pulls/1"), {"state": "open"})
+        with self.assertRaises(http.client.RemoteDisconnected):
+            self.client.request_json("POST", "/repos/o/r/issues/1/comments", {"body": "x"})
+
+        self.assertEqual([req["method"] for req in self.server.requests], ["GET", "GET", "POST"])
+        self.assertTrue(is_retry_safe("POST", "graphql", {"query": "query { viewer { login } }"}))
+        self.assertFalse(is_retry_safe("POST", "graphql", {"query": "mutation { addComment }"}))
+        self.assertFalse(is_retry_safe("PATCH", "core", {"body": "x"}))
+
+    def test_paginate_follows_link_header(self) -> None:
+        self.server.routes[("GET", "/items?per_page=2")] = (200, {"Link": '<{base}/items?per_page=2&page=2>; rel="next"'}, [1, 2])
+        self.server.routes[("GET", "/items?per_page=2&page=2")] = (200, {}, [3])
+
+        self.assertEqual(self.client.paginate("/items?per_page=2"), [1, 2, 3])
+        self.assertEqual(list(self.client.iter_pages("/items?per_page=2")), [[1, 2], [3]])
+
+    def test_graphql_errors_and_http_errors_raise(self) -> None:
+        self.server.routes[("POST", "/graphql")] = (200, {}, {"errors": [{"message": "bad query"}]})
+
+        with self.assertRaises(GitHubHttpError):
+            self.client.graphql("query { viewer { login } }")
+        with self.assertRaises(GitHubHttpError) as raised:
+            self.client.request_json("GET", "/missing")
+        self.assertEqual(raised.exception.status, 404)
+
+    def test_response_cache_revalidates_with_etag_and_persists_across_clients(self) -> None:
+        self.server.routes[("GET", "/repos/o/r/issues?state=open")] = (200, {"ETag": '"v1"'}, [{"number": 1}])
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_path = Path(tmp) / "cache.json"
+            first = GitHubHttpClient(base_url=self.server.base_url, token="t", cache=ResponseCache(cache_path))
+            self.assertEqual(first.request_json("GET", "/repos/o/r/issues?state=open"), [{"number": 1}])
+            first.close()
+
+            cache = ResponseCache(cache_path)
+            second = GitHubHttpClient(base_url=self.server.base_url, token="t", cache=cache)
+            self.assertEqual(second.request_json("GET", "/repos/o/r/issues?state=open"), [{"number": 1}])
+            second.close()
+
+        self.assertEqual(self.server.requests[1]["headers"]["If-None-Match"], '"v1"')
+        self.assertEqual(cache.stats["notModified"], 1)
+
+    def test_response_cache_max_age_skips_request_and_lru_bounds_entries(self) -> None:
+        now = [1000.0]
+        cache = ResponseCache(None, max_entries=2, max_age_rules=[(r"/pulls/\d+$", 60)], clock=lambda: now[0])
+        client = GitHubHttpClient(base_url=self.server.base_url, token="t", cache=cache)
+        for number in (1, 2, 3):
+            self.server.routes[("GET", f"/repos/o/r/pulls/{number}")] = (200, {}, {"state": "open"})
+
+        client.request_json("GET", "/repos/o/r/pulls/1")
+        client.request_json("GET", "/repos/o/r/pulls/1")
+        self.assertEqual(len(self.server.requests), 1)
+
+        client.request_json("GET", "/repos/o/r/pulls/2")
+        client.request_json("GET", "/repos/o/r/pulls/1")
+        client.request_json("GET", "/repos/o/r/pulls/3")
+        self.assertEqual(list(cache.entries), ["GET /repos/o/r/pulls/1", "GET /repos/o/r/pulls/3"])
+
+        now[0] += 61
+        client.request_json("GET", "/repos/o/r/pulls/1")
+        self.assertEqual(len(self.server.requests), 4)
+        client.close()
+
+    def test_graphql_cache_bypass_always_asks_github(self) -> None:
+        cache = ResponseCache(None, max_age_rules=[(r"^POST /graphql ", 60)])
+        client = GitHubHttpClient(base_url=self.server.base_url, token="t", cache=cache)
+        self.server.routes[("POST", "/graphql")] = [
+            (200, {}, {"data": {"n": 1}}),
+            (200, {}, {"data": {"n": 2}}),
+            (200, {}, {"data": {"n": 3}}),
+        ]
+
+        self.assertEqual(client.graphql("query { n }"), {"n": 1})
+        self.assertEqual(client.graphql("query { n }", use_cache=False), {"n": 2})
+        self.assertEqual(client.graphql("query { n }"), {"n": 1})
+        self.assertEqual(len(self.server.requests), 2)
+        client.close()
+
+    def test_rate_limit_budget_tracks_headers_and_retries_throttled_requests(self) -> None:
+        waits: list[float] = []
+        budget = RateLimitBudget(pace_below=10, clock=lambda: 1000.0, sleep=waits.append, jitter=lambda: 0.0)
+        client = GitHubHttpClient(base_url=self.server.base_url, token="t", budget=budget)
+        self.server.routes[("GET", "/repos/o/r/pulls/1")] = [
+            (403, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "1002"}, {"message": "API rate limit exceeded"}),
+            (429, {"Retry-After": "3"}, {"message": "secondary rate limit"}),
+            (200, {"X-RateLimit-Remaining": "5", "X-RateLimit-Limit": "5000", "X-RateLimit-Reset": "1020", "X-RateLimit-Resource": "core"}, {"state": "open"}),
+            (200, {}, {"state": "closed"}),
+        ]
+
+        self.assertEqual(client.request_json("GET", "/repos/o/r/pulls/1"), {"state": "open"})
+        self.assertEqual(waits, [2.0, 3.0])
+        self.assertEqual(budget.remaining("core"), 5)
+        self.assertTrue(budget.is_low(100))
+
+        # With 5 calls left and 20s to the reset, the next request is paced by 4s.
+        client.request_json("GET", "/repos/o/r/pulls/1")
+        self.assertEqual(waits, [2.0, 3.0, 4.0])
+        self.assertEqual(budget.snapshot()["throttled"], 2)
+        client.close()
+
+        exhausted = GitHubHttpClient(base_url=self.server.base_url, token="t", budget=RateLimitBudget(max_retries=1, sleep=waits.append))
+        self.server.routes[("GET", "/repos/o/r/pulls/2")] = (403, {"X-RateLimit-Remaining": "0"}, {"message": "API rate limit exceeded"})
+        with self.assertRaises(GitHubHttpError):
+            exhausted.request_json("GET", "/repos/o/r/pulls/2")
+        exhausted.close()
+
+    def test_timeout_provider_sets_per_request_timeout_and_can_refuse_requests(self) -> None:
+        budget_left = [2.5]
+
+        def timeout_provider() -> float:
+            if budget_left[0] <= 0:
+                raise TimeoutError("deadline expired")
+            return budget_left[0]
+
+        client = GitHubHttpClient(base_url=self.server.base_url, token="t", timeout_provider=timeout_provider, timeout_retries=1)
+        self.server.routes[("GET", "/repos/o/r/pulls/1")] = (200, {}, {"state": "open"})
+
+        self.assertEqual(client.request_json("GET", "/repos/o/r/pulls/1"), {"state": "open"})
+        self.assertEqual(client._conn.sock.gettimeout(), 2.5)
+        budget_left[0] = 0
+        with self.assertRaises(TimeoutError):
+            client.request_json("GET", "/repos/o/r/pulls/1")
+        self.assertEqual(len(self.server.requests), 1)
+        client.close()
+
+    def test_timed_out_writes_are_not_resent(self) -> None:
+        client = GitHubHttpClient(base_url=self.server.base_url, token="t", timeout_retries=2)
+        self.server.routes[("GET", "/repos/o/r/pulls/1")] = (200, {}, {"state": "open"})
+        self.server.routes[("POST", "/repos/o/r/issues/1/comments")] = (201, {}, {"id": 9})
+
+        with patch.object(http.client.HTTPConnection, "getresponse", side_effect=TimeoutError("timed out")):
+            with self.assertRaises(TimeoutError):
+                client.request_json("POST", "/repos/o/r/issues/1/comments", {"body": "x"})
+            self.assertEqual(client.stats["requests"], 1)
+            with self.assertRaises(TimeoutError):
+                client.request_json("GET", "/repos/o/r/pulls/1")
+        client.close()
+
+        self.assertEqual(client.stats["requests"], 4)
+        self.assertEqual(client.stats["retries"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import http.client
+import os
+import stat
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from monitor_metrics import CONTENT_TYPE, MetricsServer, render_prometheus, write_textfile  # noqa: E402
+
+
+def make_snapshot() -> dict:
+    return {
+        "ts": 1_700_000_000,
+        "counts": {"open": 3, "openPrs": 1},
+        "metrics": {
+            "maxNoUpdateHours": 1.5,
+            "queryMode": "standard",
+            "timings": {
+                "total": {"seconds": 2.25, "calls": 7, "bytes": 4096, "retries": 1},
+                "fetchOpenItems": {"seconds": 1.0, "calls": 2, "bytes": 2048, "retries": 0},
+            },
+        },
+        "signals": ["stale_open_pr", 'quote"d'],
+        "pollingIntervalMinutes": 30,
+        "pollingMode": "normal",
+        "idleStreak": 0,
+    }
+
+
+class RenderPrometheusTest(unittest.TestCase):
+    def test_renders_gauges_with_labels(self) -> None:
+        text = render_prometheus(make_snapshot())
+
+        self.assertIn("# TYPE fiber_link_monitor_metric gauge\n", text)
+        self.assertIn('fiber_link_monitor_metric{name="maxNoUpdateHours"} 1.5\n', text)
+        self.assertNotIn('name="queryMode"', text)
+        self.assertIn('fiber_link_monitor_count{name="open"} 3\n', text)
+        self.assertIn('fiber_link_monitor_signal_active{signal="quote\\"d"} 1\n', text)
+        self.assertIn('fiber_link_monitor_query_mode{mode="standard"} 1\n', text)
+        self.assertIn('fiber_link_monitor_polling_interval_minutes{mode="normal"} 30\n', text)
+        self.assertIn("fiber_link_monitor_last_run_timestamp_seconds 1.7e+09\n", text)
+        self.assertIn('fiber_link_monitor_phase_seconds{phase="total"} 2.25\n', text)
+        self.assertIn('fiber_link_monitor_phase_github_calls{phase="fetchOpenItems"} 2\n', text)
+        self.assertIn('fiber_link_monitor_phase_github_retries{phase="total"} 1\n', text)
+
+    def test_skips_empty_families(self) -> None:
+        text = render_prometheus({"metrics": {}})
+
+        self.assertNotIn("phase_seconds", text)
+        self.assertNotIn("signal_active", text)
+        self.assertIn('fiber_link_monitor_query_mode{mode="standard"} 1\n', text)
+
+
+class WriteTextfileTest(unittest.TestCase):
+    def test_replaces_target_atomically(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            target = Path(tmp) / "collector" / "monitor.prom"
+            write_textfile(target, "first 1\n")
+            write_textfile(target, "second 2\n")
+
+            self.assertEqual(target.read_text(encoding="utf-8"), "second 2\n")
+            self.assertEqual(stat.S_IMODE(os.stat(target).st_mode), 0o644)
+            self.assertEqual(sorted(p.name for p in target.parent.iterdir()), ["monitor.prom"])
+
+
+class MetricsServerTest(unittest.TestCase):
+    def test_serves_latest_published_text(self) -> None:
+        server = MetricsServer("127.0.0.1", 0).start()
+        try:
+            server.publish("fiber_link_monitor_idle_streak 2\n")
+            conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+            conn.request("GET", "/metrics")
+            response = conn.getresponse()
+            body = response.read().decode("utf-8")
+            self.assertEqual(response.status, 200)
+            self.assertEqual(response.getheader("Content-Type"), CONTENT_TYPE)
+            self.assertEqual(body, "fiber_link_monitor_idle_streak 2\n")
+
+            conn.request("GET", "/other")
+            missing = conn.getresponse()
+            missing.read()
+            self.assertEqual(missing.status, 404)
+            conn.close()
+        finally:
+            server.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
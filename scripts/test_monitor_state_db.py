@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from monitor_state_db import StateDb  # noqa: E402
+
+
+def make_run(ts: int, open_count: int) -> dict:
+    return {
+        "ts": ts,
+        "runAt": f"run-{ts}",
+        "counts": {"open": open_count, "openPrs": 1},
+        "metrics": {"maxNoUpdateHours": 1.5, "queryMode": "standard"},
+        "signals": ["a", "b"],
+        "prState": {"208": {"headSha": f"sha-{ts}"}},
+    }
+
+
+class StateDbTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = StateDb(Path(self.tmp.name) / "state.sqlite3")
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.tmp.cleanup()
+
+    def test_append_run_trims_history_and_queries_window_by_ts(self) -> None:
+        for ts in (100, 200, 300, 400):
+            self.db.append_run(make_run(ts, ts // 100), {"idleStreak": ts}, max_runs=3)
+
+        self.assertEqual(self.db.run_count(), 3)
+        self.assertEqual([run["ts"] for run in self.db.runs_since(250)], [300, 400])
+        self.assertEqual(self.db.pr_states(), {208: {"headSha": "sha-400"}})
+        self.assertEqual(self.db.load_state(), {"runs": [make_run(400, 4)], "latestRun": make_run(400, 4), "idleStreak": 400})
+
+        metrics = dict(self.db.conn.execute("SELECT name, value FROM metrics WHERE run_id = (SELECT MAX(id) FROM runs)"))
+        self.assertEqual(metrics, {"counts.open": 4.0, "counts.openPrs": 1.0, "metrics.maxNoUpdateHours": 1.5, "signals": 2.0})
+        orphaned = self.db.conn.execute("SELECT COUNT(*) FROM metrics WHERE run_id NOT IN (SELECT id FROM runs)").fetchone()[0]
+        self.assertEqual(orphaned, 0)
+        plan = " ".join(row[-1] for row in self.db.conn.execute("EXPLAIN QUERY PLAN SELECT payload FROM runs WHERE ts >= ?", (0,)))
+        self.assertIn("runs_ts", plan)
+
+    def test_import_json_state_copies_runs_and_metadata(self) -> None:
+        self.assertTrue(self.db.is_empty())
+        payload = {"runs": [make_run(100, 1), make_run(200, 2)], "latestRun": make_run(200, 2), "cleanRunStreak": 4}
+
+        self.assertEqual(self.db.import_json_state(payload), 2)
+
+        self.assertFalse(self.db.is_empty())
+        self.assertEqual(self.db.metadata(), {"cleanRunStreak": 4})
+        self.assertEqual(self.db.latest_runs(5), payload["runs"])
+
+
+if __name__ == "__main__":
+    unittest.main()